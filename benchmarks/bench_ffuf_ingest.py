@@ -0,0 +1,81 @@
+"""Benchmark streaming ffuf result ingestion against a full ``json.loads``.
+
+Run with ``python benchmarks/bench_ffuf_ingest.py [results]`` (default 500000).
+A synthetic ``-of json`` document, as ffuf writes against a catch-all server,
+is written to a temporary file and ingested both ways; the streaming reader's
+peak memory should stay roughly constant while the full load grows with the
+result count.
+"""
+
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from reconator.ffuf import HitWriter, _hit, iter_ffuf_results  # noqa: E402
+
+
+def write_synthetic(path: Path, results: int) -> None:
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write('{"commandline": "ffuf -u http://192.0.2.1:80/FUZZ", "results": [\n')
+        for index in range(results):
+            item = {
+                "input": {"FUZZ": f"word{index}"},
+                "position": index,
+                "status": 200,
+                "length": 1234,
+                "words": 56,
+                "lines": 7,
+                "content-type": "text/html",
+                "redirectlocation": "",
+                "url": f"http://192.0.2.1:80/word{index}",
+                "host": "192.0.2.1:80",
+            }
+            handle.write(("," if index else "") + json.dumps(item) + "\n")
+        handle.write('], "config": {}}\n')
+
+
+def full_load(path: Path, out: Path) -> int:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    hits = [_hit(item) for item in data.get("results", [])]
+    out.write_text(json.dumps(hits), encoding="utf-8")
+    return len(hits)
+
+
+def streaming(path: Path, out: Path) -> int:
+    writer = HitWriter(out)
+    writer.add("http://192.0.2.1:80/", iter_ffuf_results(path))
+    writer.close()
+    return writer.counts["http://192.0.2.1:80/"]["kept"]
+
+
+def measure(func, path: Path, out: Path) -> tuple:
+    # Time and memory are measured in separate runs; tracemalloc skews timings.
+    start = time.perf_counter()
+    result = func(path, out)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(path, out)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def main() -> None:
+    results = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "ffuf_80.json"
+        write_synthetic(path, results)
+        size_mb = path.stat().st_size / (1024 * 1024)
+        print(f"{results} results, {size_mb:.1f} MiB of JSON")
+        print(f"{'reader':<12}{'hits':>10}{'seconds':>10}{'peak MiB':>10}")
+        for name, func in (("json.loads", full_load), ("streaming", streaming)):
+            hits, elapsed, peak = measure(func, path, Path(tmp) / "hits.out")
+            print(f"{name:<12}{hits:>10}{elapsed:>10.2f}{peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark streaming nmap XML parsing against a full ``ElementTree`` load.
+
+Run with ``python benchmarks/bench_nmap_xml.py [hosts]`` (default 100000).
+A synthetic multi-host run is written to a temporary file and parsed both
+ways; the streaming parser's peak memory should stay roughly constant while
+the full tree grows with the host count.
+"""
+
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from reconator.nmap import iter_nmap_hosts  # noqa: E402
+
+PORTS = (22, 80, 443, 8080)
+
+
+def write_synthetic(path: Path, hosts: int) -> None:
+    with path.open("w", encoding="utf-8") as handle:
+        handle.write('<?xml version="1.0"?>\n<nmaprun scanner="nmap" args="nmap -sV -iL targets.txt">\n')
+        for index in range(hosts):
+            address = f"10.{(index >> 16) & 0xFF}.{(index >> 8) & 0xFF}.{index & 0xFF}"
+            state = "down" if index % 10 == 0 else "up"
+            handle.write(f'<host><status state="{state}"/><address addr="{address}" addrtype="ipv4"/><ports>')
+            for port in PORTS:
+                handle.write(
+                    f'<port protocol="tcp" portid="{port}"><state state="open"/>'
+                    f'<service name="http" product="nginx" version="1.25"/>'
+                    f'<script id="http-title" output="Example {index}"/></port>'
+                )
+            handle.write("</ports></host>\n")
+        handle.write("</nmaprun>\n")
+
+
+def full_tree(path: Path) -> int:
+    count = 0
+    root = ET.parse(path).getroot()
+    for host in root.findall("host"):
+        status = host.find("status")
+        if status is not None and status.get("state") == "down":
+            continue
+        count += len(host.findall("ports/port"))
+    return count
+
+
+def streaming(path: Path) -> int:
+    return sum(len(record.ports) for record in iter_nmap_hosts(path) if not record.is_down)
+
+
+def measure(func, path: Path) -> tuple:
+    # Time and memory are measured in separate runs; tracemalloc skews timings.
+    start = time.perf_counter()
+    result = func(path)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / (1024 * 1024)
+
+
+def main() -> None:
+    hosts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "nmap.xml"
+        write_synthetic(path, hosts)
+        size_mb = path.stat().st_size / (1024 * 1024)
+        print(f"{hosts} hosts, {size_mb:.1f} MiB of XML")
+        print(f"{'parser':<12}{'ports':>10}{'seconds':>10}{'peak MiB':>10}")
+        for name, func in (("ET.parse", full_tree), ("iterparse", streaming)):
+            ports, elapsed, peak = measure(func, path)
+            print(f"{name:<12}{ports:>10}{elapsed:>10.2f}{peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Micro-benchmark for scope lookups as the allow-list grows.
+
+Run with ``python benchmarks/bench_scope.py``. The compiled ``ScopeIndex``
+cost per lookup should stay roughly flat while the linear ``ipaddress`` scan
+grows with the number of CIDRs.
+"""
+
+import ipaddress
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from reconator.scope import ScopeIndex  # noqa: E402
+
+LOOKUPS = 2000
+
+
+def make_cidrs(count: int, version: int) -> list:
+    rng = random.Random(count)
+    cidrs = []
+    for _ in range(count):
+        if version == 4:
+            base = rng.getrandbits(32) & ~0xFF
+            cidrs.append(f"{ipaddress.IPv4Address(base)}/24")
+        else:
+            base = rng.getrandbits(128) & ~((1 << 64) - 1)
+            cidrs.append(f"{ipaddress.IPv6Address(base)}/64")
+    return cidrs
+
+
+def make_targets(cidrs: list) -> list:
+    rng = random.Random(0)
+    targets = []
+    for _ in range(LOOKUPS):
+        network = ipaddress.ip_network(rng.choice(cidrs), strict=False)
+        if rng.random() < 0.5:
+            targets.append(str(network.network_address + 1))
+        else:
+            targets.append(str(network.broadcast_address + 1))
+    return targets
+
+
+def per_lookup_us(func, targets: list) -> float:
+    start = time.perf_counter()
+    for target in targets:
+        func(target)
+    return (time.perf_counter() - start) / len(targets) * 1e6
+
+
+def main() -> None:
+    print(f"{'family':<7}{'cidrs':>8}{'index us':>12}{'linear us':>12}")
+    for version in (4, 6):
+        for count in (10, 100, 1000, 10000):
+            cidrs = make_cidrs(count, version)
+            targets = make_targets(cidrs)
+            index = ScopeIndex(cidrs)
+            networks = [ipaddress.ip_network(item, strict=False) for item in cidrs]
+            indexed = per_lookup_us(index.__contains__, targets)
+            linear_targets = targets[: max(10, LOOKUPS // count)]
+            linear = per_lookup_us(
+                lambda t: any(ipaddress.ip_address(t) in n for n in networks), linear_targets
+            )
+            print(f"IPv{version:<5}{count:>8}{indexed:>12.2f}{linear:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
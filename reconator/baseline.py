@@ -0,0 +1,248 @@
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from .ffuf import export_hits_json
+from .nuclei import rollup_findings
+from .state import HostState, init_module_state, mark_finished
+from .utils import read_json, write_json
+
+_BASELINE: Optional["Baseline"] = None
+
+# Service fields compared between runs; a port whose fields all match is unchanged.
+FINGERPRINT_FIELDS = ("name", "product", "version", "tunnel")
+
+Services = Dict[int, Dict[str, str]]
+
+
+def _fingerprint(meta: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(meta.get(name) or "" for name in FINGERPRINT_FIELDS)
+
+
+@dataclass
+class ServiceDelta:
+    added: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    changed: List[int] = field(default_factory=list)
+    unchanged: List[int] = field(default_factory=list)
+
+    @property
+    def is_unchanged(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+def diff_services(before: Services, after: Services) -> ServiceDelta:
+    delta = ServiceDelta()
+    for port in sorted(after):
+        if port not in before:
+            delta.added.append(port)
+        elif _fingerprint(before[port]) != _fingerprint(after[port]):
+            delta.changed.append(port)
+        else:
+            delta.unchanged.append(port)
+    delta.removed = sorted(port for port in before if port not in after)
+    return delta
+
+
+def load_services(path: Path) -> Optional[Services]:
+    data = read_json(path)
+    if data is None:
+        return None
+    return {int(port): meta for port, meta in data.items()}
+
+
+class Baseline:
+    """Results of an earlier engagement that a differential rescan builds on.
+
+    A port is unchanged when the baseline has it open with the same service
+    fingerprint. A port without a fingerprint (connect triage) is never
+    unchanged; :meth:`unverified` lists the ones worth fingerprinting before
+    deciding. Hosts
+    whose baseline run did not finish every module in ``modules`` are treated
+    as new and rescanned in full.
+    """
+
+    def __init__(self, root: Path, modules: Sequence[str] = ()) -> None:
+        self.root = root
+        self.name = root.name
+        self.modules = tuple(modules)
+        self._services: Dict[str, Optional[Services]] = {}
+
+    def host_dir(self, host: str) -> Path:
+        return self.root / host
+
+    def services(self, host: str) -> Optional[Services]:
+        if host not in self._services:
+            services = load_services(self.host_dir(host) / "services.json")
+            if services and not all(self.module_ok(host, name) for name in ("nmap", *self.modules)):
+                services = None
+            self._services[host] = services
+        return self._services[host]
+
+    def is_unchanged(self, host: str, port: int, meta: Dict[str, str]) -> bool:
+        before = self.services(host)
+        if not before or port not in before:
+            return False
+        current = _fingerprint(meta)
+        return any(current) and current == _fingerprint(before[port])
+
+    def unverified(self, host: str, ports: Services) -> List[int]:
+        """Return the ports of ``ports`` the baseline has open but that carry no fingerprint to compare."""
+        before = self.services(host) or {}
+        return [port for port, meta in ports.items() if port in before and not any(_fingerprint(meta))]
+
+    def module_ok(self, host: str, name: str) -> bool:
+        data = read_json(self.host_dir(host) / "state.json") or {}
+        return data.get("modules", {}).get(name, {}).get("status") == "OK"
+
+    def carry_over(
+        self,
+        host: str,
+        host_dir: Path,
+        engagement_name: str,
+        services: Services,
+        modules: Sequence[str],
+    ) -> None:
+        """Merge the baseline results of ``host``'s unchanged services into ``host_dir``.
+
+        Files are hard-linked where possible and ``baseline_carried`` counts the
+        merged entries (TLS ports, ffuf hits, nuclei results). Modules that did
+        not run this time (every service was unchanged) are marked OK so resume
+        and reporting treat them as done.
+        """
+        unchanged = {port for port, meta in services.items() if self.is_unchanged(host, port, meta)}
+        if not unchanged:
+            return
+        state_path = host_dir / "state.json"
+        state = HostState.load(state_path, engagement_name=engagement_name, host=host)
+        for name in modules:
+            merge = _MERGERS.get(name)
+            if merge is None:
+                continue
+            module = init_module_state(state, name)
+            if (
+                module.status == "OK"
+                and module.artifacts.get("baseline") == self.name
+                and module.artifacts.get("baseline_merged_at") == module.finished_at
+            ):
+                # Already merged into this module's current results.
+                continue
+            carried = merge(self.host_dir(host), host_dir, unchanged)
+            if module.status != "OK":
+                mark_finished(module, "OK", exit_code=None)
+            module.artifacts["baseline"] = self.name
+            module.artifacts["baseline_carried"] = str(carried)
+            module.artifacts["baseline_merged_at"] = module.finished_at or ""
+        state.save(state_path)
+
+
+def _link(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        target.unlink()
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _port_of(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return urlsplit(value if "://" in value else f"//{value}").port
+    except ValueError:
+        return None
+
+
+def _merge_sslscan(source: Path, target: Path, unchanged: Iterable[int]) -> int:
+    before = read_json(source / "tls" / "tls_summary.json") or {}
+    carried = sorted(set(before.get("ports", [])) & set(unchanged))
+    for port in carried:
+        for name in (f"sslscan_{port}.txt", f"sslscan_{port}.xml"):
+            report = source / "tls" / name
+            if report.exists():
+                _link(report, target / "tls" / name)
+    summary = read_json(target / "tls" / "tls_summary.json") or {}
+    summary["ports"] = sorted(set(summary.get("ports", [])) | set(carried))
+    carried_endpoints = {
+        port: entry for port, entry in before.get("endpoints", {}).items() if int(port) in carried
+    }
+    if carried_endpoints:
+        endpoints = {**summary.get("endpoints", {}), **carried_endpoints}
+        summary["endpoints"] = dict(sorted(endpoints.items(), key=lambda item: int(item[0])))
+    write_json(target / "tls" / "tls_summary.json", summary)
+    return len(carried)
+
+
+def _merge_ffuf(source: Path, target: Path, unchanged: Iterable[int]) -> int:
+    ports = set(unchanged)
+    for port in ports:
+        for name in (f"ffuf_{port}.json", f"ffuf_{port}.jsonl"):
+            report = source / "web" / name
+            if report.exists():
+                _link(report, target / "web" / name)
+    target_hits = target / "web" / "ffuf_hits.jsonl"
+    target_hits.parent.mkdir(parents=True, exist_ok=True)
+    carried = 0
+    with target_hits.open("a", encoding="utf-8") as handle:
+        for hit in _iter_hits(source / "web"):
+            if _port_of(hit.get("url")) in ports:
+                handle.write(json.dumps(hit, sort_keys=True) + "\n")
+                carried += 1
+    export_hits_json(target / "web")
+    return carried
+
+
+def _iter_hits(web_dir: Path) -> Iterator[dict]:
+    """Yield a host's ffuf hits, from ``ffuf_hits.jsonl`` or a pre-streaming ``ffuf_hits.json``."""
+    path = web_dir / "ffuf_hits.jsonl"
+    if path.exists():
+        with path.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+        return
+    yield from read_json(web_dir / "ffuf_hits.json") or []
+
+
+def _merge_nuclei(source: Path, target: Path, unchanged: Iterable[int]) -> int:
+    ports = set(unchanged)
+    results = source / "nuclei" / "results.jsonl"
+    target_results = target / "nuclei" / "results.jsonl"
+    target_results.parent.mkdir(parents=True, exist_ok=True)
+    carried = 0
+    if results.exists():
+        with results.open(encoding="utf-8") as lines, target_results.open("a", encoding="utf-8") as handle:
+            for line in lines:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if _port_of(data.get("matched-at") or data.get("host")) in ports:
+                    handle.write(line.rstrip("\n") + "\n")
+                    carried += 1
+    write_json(target / "nuclei" / "findings.json", rollup_findings(target_results))
+    return carried
+
+
+_MERGERS = {
+    "sslscan": _merge_sslscan,
+    "ffuf": _merge_ffuf,
+    "nuclei": _merge_nuclei,
+}
+
+
+def set_baseline(baseline: Optional[Baseline]) -> None:
+    global _BASELINE
+    _BASELINE = baseline
+
+
+def get_baseline() -> Optional[Baseline]:
+    return _BASELINE
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .pipeline import Feed
+from .utils import random_label, write_json
+
+_SCAN_CACHE: Optional["ScanCache"] = None
+
+
+class ScanCache:
+    """Content-addressed tool result cache shared across engagements.
+
+    Entries are keyed by tool, normalised command line, target and the
+    identity of the tool binary (resolved path, size and mtime), so upgrading
+    a tool or changing its flags never reuses stale results. Each entry holds
+    copies of the module's artifacts plus a small metadata dict, expires after
+    ``ttl_s`` and is evicted least-recently-used once the cache grows past
+    ``max_bytes``.
+    """
+
+    def __init__(self, root: Path, ttl_s: int, max_bytes: int) -> None:
+        self.root = root.expanduser().resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.root / "index.db"), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, tool TEXT NOT NULL, target TEXT NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL, size INTEGER NOT NULL,"
+            " meta TEXT NOT NULL)"
+        )
+        self._binaries: Dict[str, str] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def key(self, tool: str, command: Sequence[str], target: str, host_dir: Path) -> str:
+        """Return the cache key for running ``command`` against ``target``.
+
+        Paths under ``host_dir`` are replaced with a placeholder so the same scan
+        in a different engagement directory maps to the same key.
+        """
+        prefix = str(host_dir)
+        normalized = [str(item).replace(prefix, "{host_dir}") for item in command]
+        material = json.dumps([tool, normalized, target, self._binary_identity(tool)])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _binary_identity(self, tool: str) -> str:
+        identity = self._binaries.get(tool)
+        if identity is None:
+            path = shutil.which(tool)
+            if path is None:
+                identity = "missing"
+            else:
+                real = os.path.realpath(path)
+                stat = os.stat(real)
+                identity = f"{real}:{stat.st_size}:{stat.st_mtime_ns}"
+            self._binaries[tool] = identity
+        return identity
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / "objects" / key[:2] / key
+
+    def _count(self, tool: str, outcome: str) -> None:
+        counters = self.stats.setdefault(tool, {"hits": 0, "misses": 0, "stores": 0})
+        counters[outcome] += 1
+
+    def fetch(self, tool: str, key: str, dest_dir: Path) -> Optional[dict]:
+        """Copy a fresh entry's artifacts into ``dest_dir`` and return its metadata.
+
+        The copy is made under the lock, so a concurrent :meth:`store` or
+        eviction cannot remove the entry halfway through.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created, meta FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            entry_dir = self._entry_dir(key)
+            if row is None or time.time() - row[0] > self.ttl_s or not entry_dir.exists():
+                self._count(tool, "misses")
+                return None
+            meta = json.loads(row[1])
+            try:
+                for relative in meta.get("artifacts", []):
+                    target = dest_dir / relative
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(entry_dir / relative, target)
+            except FileNotFoundError:
+                # Removed behind the index's back (another process sharing the cache).
+                self._count(tool, "misses")
+                return None
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._count(tool, "hits")
+        return meta
+
+    def store(self, tool: str, key: str, target: str, src_dir: Path, artifacts: List[str], meta: dict) -> None:
+        """Copy the existing ``artifacts`` of ``src_dir`` into the cache under ``key``."""
+        present = [relative for relative in artifacts if (src_dir / relative).is_file()]
+        entry_dir = self._entry_dir(key)
+        staging = entry_dir.with_name(f".{key}.{random_label()}")
+        size = 0
+        for relative in present:
+            destination = staging / relative
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(src_dir / relative, destination)
+            size += destination.stat().st_size
+        staging.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(staging, entry_dir)
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, tool, target, created, last_used, size, meta)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, tool, target, now, now, size, json.dumps({**meta, "artifacts": present})),
+            )
+            self._count(tool, "stores")
+            self._evict()
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.ttl_s
+        expired = [row[0] for row in self._conn.execute("SELECT key FROM entries WHERE created < ?", (cutoff,))]
+        for key in expired:
+            self._remove(key)
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_used ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+
+    def _remove(self, key: str) -> None:
+        self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def write_stats(self, path: Path) -> None:
+        with self._lock:
+            write_json(path, self.stats)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+async def fetch_when_closed(
+    cache: ScanCache,
+    tool: str,
+    feed: Feed,
+    key_for: Callable[[list], str],
+    dest_dir: Path,
+    work: "asyncio.Future",
+) -> Optional[dict]:
+    """Let ``work`` consume ``feed`` and look its final items up once it closes.
+
+    Streaming work starts before the cache key (which depends on every item)
+    is known. When the feed closes first and the cache has an entry for its
+    items, ``work`` is cancelled, the entry is restored into ``dest_dir`` and
+    its metadata returned. Otherwise ``work`` is awaited and ``None`` returned.
+    """
+    closed = asyncio.ensure_future(feed.wait_closed())
+    try:
+        await asyncio.wait({closed, work}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if not closed.done():
+            closed.cancel()
+    if closed.done() and not closed.cancelled() and not work.done():
+        # Restore into a staging directory so running work cannot overwrite it.
+        staging = dest_dir / f".cache.{random_label()}"
+        meta = cache.fetch(tool, key_for(closed.result()), staging)
+        if meta is not None:
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+            for relative in meta.get("artifacts", []):
+                target = dest_dir / relative
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(staging / relative, target)
+            shutil.rmtree(staging, ignore_errors=True)
+            return meta
+    await work
+    return None
+
+
+def set_scan_cache(cache: Optional[ScanCache]) -> None:
+    global _SCAN_CACHE
+    _SCAN_CACHE = cache
+
+
+def get_scan_cache() -> Optional[ScanCache]:
+    return _SCAN_CACHE
@@ -0,0 +1,87 @@
+import hashlib
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from .httpclient import REQUEST_ERRORS, HttpConnection, HttpResponse
+from .utils import random_label
+
+# Random paths requested per URL before fuzzing it.
+CALIBRATION_PROBES = 3
+
+# Status codes ffuf reports as hits by default (its ``-mc`` default).
+FFUF_MATCH_CODES = frozenset([*range(200, 300), 301, 302, 307, 401, 403, 405, 500])
+
+# Response properties tried in order as a filter for catch-all pages.
+FILTER_FIELDS = ("length", "words", "lines")
+
+
+@dataclass
+class Calibration:
+    url: str
+    fingerprints: List[Optional[Dict[str, object]]] = field(default_factory=list)
+    filters: Dict[str, int] = field(default_factory=dict)
+    skip_reason: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+def fingerprint(response: HttpResponse) -> Dict[str, object]:
+    return {
+        "status": response.status,
+        "length": response.size,
+        "words": response.words,
+        "lines": response.lines,
+        "sha256": hashlib.sha256(response.body).hexdigest(),
+    }
+
+
+def decide(fingerprints: List[Optional[Dict[str, object]]]) -> Calibration:
+    """Derive filters or a skip reason from the responses to random paths.
+
+    Random paths a server answers with a non-matching status (typically 404)
+    need nothing. When every one of them would be reported as a hit, the
+    first of length, word count and line count that is identical across
+    them becomes a filter; if none is, the URL is skipped as an unstable
+    catch-all. A URL that answered fewer than two probes (a transient error,
+    or a TLS setup the built-in client cannot negotiate) is fuzzed unfiltered.
+    """
+    calibration = Calibration(url="", fingerprints=list(fingerprints))
+    answered = [item for item in fingerprints if item is not None]
+    if len(answered) < 2 or any(item["status"] not in FFUF_MATCH_CODES for item in answered):
+        return calibration
+    for name in FILTER_FIELDS:
+        values = {item[name] for item in answered}
+        if len(values) == 1:
+            calibration.filters[name] = values.pop()
+            return calibration
+    calibration.skip_reason = "catch_all_unstable"
+    return calibration
+
+
+async def calibrate(url: str, timeout_s: float = 10.0, probes: int = CALIBRATION_PROBES) -> Calibration:
+    """Request ``probes`` random paths under ``url`` over one keep-alive connection."""
+    base = url if url.endswith("/") else f"{url}/"
+    fingerprints: List[Optional[Dict[str, object]]] = []
+    try:
+        connection = HttpConnection(base, timeout_s=timeout_s)
+    except ValueError:
+        return Calibration(url=url)
+    prefix = urlsplit(base).path or "/"
+    try:
+        for _ in range(probes):
+            try:
+                response = await connection.get(f"{prefix}{random_label(16)}")
+            except REQUEST_ERRORS:
+                fingerprints.append(None)
+                if not any(fingerprints):
+                    # Nothing answered yet; more probes would only wait out timeouts.
+                    break
+                continue
+            fingerprints.append(fingerprint(response))
+    finally:
+        await connection.close()
+    calibration = decide(fingerprints)
+    calibration.url = url
+    return calibration
@@ -1,4 +1,5 @@
 import argparse
+from typing import Dict, Optional
 
 from .orchestrator import orchestrate
 
@@ -11,10 +12,55 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--output", default="./output")
     parser.add_argument("--profile", choices=["safe", "standard", "aggressive"], default="safe")
     parser.add_argument("--resume", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--resume-verify", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--baseline")
     parser.add_argument("--dry-run", action="store_true")
 
     parser.add_argument("--max-hosts", type=int, default=5)
     parser.add_argument("--max-procs", type=int, default=10)
+    parser.add_argument("--nmap-batch-size", type=int, default=1)
+    parser.add_argument("--nmap-batch-timeout", type=int, default=0)
+    parser.add_argument("--nse-selection", choices=["default", "targeted"], default="default")
+    parser.add_argument("--ffuf-batch-size", type=int, default=1)
+    parser.add_argument("--ffuf-threads", type=int, default=200)
+    parser.add_argument("--ffuf-calibrate", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--ffuf-max-hits", type=int, default=0)
+    parser.add_argument("--ffuf-hit-sample", type=int, default=0)
+    parser.add_argument("--nuclei-batch-size", type=int, default=1)
+    parser.add_argument("--nuclei-shards", type=int, default=2)
+    parser.add_argument("--nuclei-rate-limit", type=int, default=150)
+    parser.add_argument("--nuclei-batch-timeout", type=int, default=0)
+    parser.add_argument("--nuclei-templates", choices=["full", "targeted"], default="full")
+    parser.add_argument("--nuclei-tech-map")
+    parser.add_argument("--cpu-budget", type=int)
+    parser.add_argument("--mem-budget-mb", type=int)
+    parser.add_argument("--max-load", type=float)
+    parser.add_argument("--tool-weights")
+    parser.add_argument("--tool-memory-mb")
+    parser.add_argument("--tool-limits")
+
+    parser.add_argument("--discovery", choices=["none", "ping", "connect", "both"], default="none")
+    parser.add_argument("--discovery-ports", default="22,80,443,445,3389,8080")
+    parser.add_argument("--discovery-chunk-size", type=int, default=4096)
+    parser.add_argument("--triage-engine", choices=["nmap", "connect"], default="nmap")
+    parser.add_argument("--connect-ports", default="top100")
+    parser.add_argument("--connect-concurrency", type=int, default=500)
+    parser.add_argument("--connect-rate", type=float, default=0)
+    parser.add_argument("--connect-timeout-ms", type=int, default=1000)
+    parser.add_argument("--connect-max-timeout-ms", type=int, default=0)
+
+    parser.add_argument("--tls-engine", choices=["sslscan", "native"], default="sslscan")
+    parser.add_argument("--tls-concurrency", type=int, default=100)
+    parser.add_argument("--tls-timeout", type=float, default=5.0)
+    parser.add_argument("--tls-endpoint-concurrency", type=int, default=8)
+
+    parser.add_argument("--fuzz-engine", choices=["ffuf", "native"], default="ffuf")
+    parser.add_argument("--fuzz-connections", type=int, default=5)
+    parser.add_argument("--fuzz-concurrency", type=int, default=200)
+    parser.add_argument("--fuzz-rate-per-host", type=float, default=0)
+    parser.add_argument("--fuzz-rate", type=float, default=0)
+    parser.add_argument("--fuzz-pipeline", type=int, default=4)
+    parser.add_argument("--fuzz-timeout", type=float, default=10.0)
 
     parser.add_argument("--timeout-nmap", type=int, default=900)
     parser.add_argument("--timeout-sslscan", type=int, default=300)
@@ -29,6 +75,10 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--scope-allow-regex")
     parser.add_argument("--scope-deny-regex")
 
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--cache-ttl-hours", type=float, default=72)
+    parser.add_argument("--cache-max-mb", type=int, default=2048)
+
     parser.add_argument("--skip-nmap", action="store_true")
     parser.add_argument("--skip-ssl", action="store_true")
     parser.add_argument("--skip-ffuf", action="store_true")
@@ -50,8 +100,26 @@ def main() -> None:
         if args.scope_allow_cidrs
         else None
     )
+    args.tool_weights = _parse_tool_map(parser, "--tool-weights", args.tool_weights)
+    args.tool_memory_mb = _parse_tool_map(parser, "--tool-memory-mb", args.tool_memory_mb)
+    args.tool_limits = _parse_tool_map(parser, "--tool-limits", args.tool_limits)
     orchestrate(args)
 
 
+def _parse_tool_map(parser: argparse.ArgumentParser, flag: str, value: Optional[str]) -> Dict[str, int]:
+    """Parse ``nmap=4,nuclei=8`` into ``{"nmap": 4, "nuclei": 8}``."""
+    result: Dict[str, int] = {}
+    if not value:
+        return result
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, sep, number = item.partition("=")
+        if not sep or not number.strip().isdigit():
+            parser.error(f"{flag} expects tool=N pairs, got {item!r}")
+        result[name.strip()] = int(number)
+    return result
+
+
 if __name__ == "__main__":
     main()
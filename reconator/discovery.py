@@ -0,0 +1,91 @@
+import hashlib
+import ipaddress
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from .nmap import iter_nmap_hosts
+from .portscan import ConnectScanner
+from .state import HostState, export_state, init_module_state, mark_finished
+from .utils import run_command_async, write_json
+
+DISCOVERY_METHODS = ("none", "ping", "connect", "both")
+
+
+class HostSweeper:
+    """Engagement-wide liveness check run before any per-host work.
+
+    ``ping`` runs one ``nmap -sn`` over a whole chunk of targets, ``connect``
+    probes a few common ports with the connect scanner, and ``both`` runs the
+    connect probe on the hosts the ping sweep did not find.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        work_dir: Path,
+        timeout_s: int,
+        scanner: Optional[ConnectScanner] = None,
+    ) -> None:
+        if method not in DISCOVERY_METHODS[1:]:
+            raise ValueError(f"Unknown discovery method: {method}")
+        if method in ("connect", "both") and scanner is None:
+            raise ValueError("Connect discovery needs a scanner")
+        self.method = method
+        self.work_dir = work_dir
+        self.timeout_s = timeout_s
+        self.scanner = scanner
+        self.stats: Dict[str, int] = {"swept": 0, "alive": 0, "down": 0}
+
+    async def sweep(self, hosts: List[str]) -> Set[str]:
+        """Return the subset of ``hosts`` (one address family) that answered."""
+        alive: Set[str] = set()
+        if self.method in ("ping", "both"):
+            alive |= await self._ping(hosts)
+        if self.method in ("connect", "both"):
+            alive |= await self._connect([host for host in hosts if host not in alive])
+        self.stats["swept"] += len(hosts)
+        self.stats["alive"] += len(alive)
+        self.stats["down"] += len(hosts) - len(alive)
+        return alive
+
+    async def _ping(self, hosts: List[str]) -> Set[str]:
+        sweep_id = hashlib.sha1("\n".join(hosts).encode("utf-8")).hexdigest()[:12]
+        sweep_dir = self.work_dir / sweep_id
+        sweep_dir.mkdir(parents=True, exist_ok=True)
+        targets_path = sweep_dir / "targets.txt"
+        targets_path.write_text("\n".join(hosts), encoding="utf-8")
+        sweep_xml = sweep_dir / "sweep.xml"
+        family_flags = ["-6"] if ipaddress.ip_address(hosts[0]).version == 6 else []
+        command = ["nmap", *family_flags, "-sn", "-oX", str(sweep_xml), "-iL", str(targets_path)]
+        # A timed-out sweep still reports the hosts it found before the kill.
+        await run_command_async(command, sweep_dir / "stdout.log", sweep_dir / "stderr.log", self.timeout_s)
+        wanted = {str(ipaddress.ip_address(host)): host for host in hosts}
+        return {
+            wanted[record.address]
+            for record in iter_nmap_hosts(sweep_xml)
+            if record.status == "up" and record.address in wanted
+        }
+
+    async def _connect(self, hosts: List[str]) -> Set[str]:
+        if not hosts:
+            return set()
+        return {scan.host async for scan in self.scanner.scan(hosts) if scan.responded}
+
+    def write_stats(self, path: Path) -> None:
+        write_json(path, {"method": self.method, **self.stats})
+
+
+def record_down_host(host_dir: Path, host: str, engagement_name: str, method: str) -> None:
+    """Record ``host`` as down in its nmap state so it is never scanned or resumed."""
+    host_dir.mkdir(parents=True, exist_ok=True)
+    state_path = host_dir / "state.json"
+    state = HostState.load(state_path, engagement_name=engagement_name, host=host)
+    module = init_module_state(state, "nmap")
+    module.artifacts.clear()
+    module.artifacts["host_state"] = "down"
+    module.artifacts["open_ports"] = "0"
+    module.artifacts["discovery"] = method
+    write_json(host_dir / "services.json", {})
+    mark_finished(module, "OK", exit_code=None)
+    state.save(state_path)
+    export_state(state_path)
@@ -1,9 +1,26 @@
+import asyncio
+import hashlib
 import json
+import os
+import re
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+from .calibration import Calibration, calibrate as calibrate_url
+from .pipeline import Feed, iterate
 from .state import HostState, init_module_state, mark_finished, mark_running
-from .utils import format_command, run_command, write_json
+from .utils import format_command, run_command_async, write_json
+from .webfuzz import get_content_discovery
+
+_FFUF_BATCHER: Optional["FfufBatcher"] = None
+
+# Threads per URL, matching the ``-t 5`` of a single-URL run.
+THREADS_PER_URL = 5
+
+FILTER_FLAGS = {"length": "-fs", "words": "-fw", "lines": "-fl"}
+
+_RESULTS_ARRAY = re.compile(r'"results"\s*:\s*\[')
 
 
 def discover_wordlist() -> Path:
@@ -17,7 +34,306 @@ def discover_wordlist() -> Path:
     raise FileNotFoundError("No default wordlist found")
 
 
-def run_ffuf(host_dir: Path, host: str, urls: List[str], timeout_s: int, resume: bool) -> None:
+def _port_of_url(url: str) -> str:
+    return url.split(":")[2].split("/")[0]
+
+
+def iter_ffuf_results(path: Path, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """Yield ffuf result items from ``path`` without loading the whole file.
+
+    ``.jsonl`` files hold one item per line. Anything else is read as ffuf's
+    ``-of json`` document, whose ``results`` array is decoded one item at a
+    time, so memory is bounded by the largest item rather than the file.
+    Output that is missing, truncated or malformed ends the iteration at the
+    last complete item.
+    """
+    if not path.exists():
+        return
+    if path.suffix == ".jsonl":
+        with path.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A cancelled run may leave a partial last line.
+                    continue
+        return
+    decoder = json.JSONDecoder()
+    with path.open(encoding="utf-8") as handle:
+        buffer = ""
+        while True:
+            match = _RESULTS_ARRAY.search(buffer)
+            if match is not None:
+                buffer = buffer[match.end() :]
+                break
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                return
+            # Keep a tail in case the key straddles two chunks.
+            buffer = buffer[-32:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                if position >= len(buffer):
+                    raise ValueError("Need more data")
+                item, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                chunk = handle.read(chunk_size)
+                if not chunk:
+                    return
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            if isinstance(item, dict):
+                yield item
+            if position > chunk_size:
+                buffer = buffer[position:]
+                position = 0
+
+
+def filter_args(filters: Dict[str, int]) -> Tuple[str, ...]:
+    """Translate calibration filters into ffuf filter flags."""
+    return tuple(arg for name, value in sorted(filters.items()) for arg in (FILTER_FLAGS[name], str(value)))
+
+
+def _hit(item: dict) -> Dict[str, object]:
+    return {
+        "url": item.get("url"),
+        "status": item.get("status"),
+        "length": item.get("length"),
+        "words": item.get("words"),
+    }
+
+
+def export_hits_json(web_dir: Path) -> None:
+    """Rewrite ``ffuf_hits.json`` (a JSON array) from ``ffuf_hits.jsonl``, one hit at a time.
+
+    Kept for consumers of the pre-streaming format.
+    """
+    source = web_dir / "ffuf_hits.jsonl"
+    if not source.exists():
+        return
+    target = web_dir / "ffuf_hits.json"
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with source.open(encoding="utf-8") as lines, tmp_path.open("w", encoding="utf-8") as handle:
+        separator = "[\n"
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            handle.write(separator + "  " + line)
+            separator = ",\n"
+        handle.write("\n]\n" if separator == ",\n" else "[]\n")
+    os.replace(tmp_path, target)
+
+
+class HitWriter:
+    """Streams one host's hits to ``ffuf_hits.jsonl`` as results are parsed.
+
+    Per URL the first ``max_hits`` results are kept (0 keeps all) and after
+    that every ``sample_every``-th one (0 keeps none), so a catch-all server
+    cannot flood the file. ``counts`` records results seen and kept per URL.
+    :meth:`add` may be called from several executor threads at once.
+    """
+
+    def __init__(self, path: Path, max_hits: int = 0, sample_every: int = 0) -> None:
+        self.max_hits = max_hits
+        self.sample_every = sample_every
+        self.counts: Dict[str, Dict[str, int]] = {}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = path.open("w", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def add(self, url: str, items: Iterable[dict]) -> None:
+        with self._lock:
+            self._add(url, items)
+
+    def _add(self, url: str, items: Iterable[dict]) -> None:
+        counts = self.counts.setdefault(url, {"results": 0, "kept": 0})
+        for item in items:
+            counts["results"] += 1
+            overflow = counts["results"] - self.max_hits
+            if self.max_hits and overflow > 0 and (not self.sample_every or overflow % self.sample_every):
+                continue
+            counts["kept"] += 1
+            self._handle.write(json.dumps(_hit(item), sort_keys=True) + "\n")
+        self._handle.flush()
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class FfufBatcher:
+    """Engagement-wide ffuf runner that fuzzes the URLs of many hosts at once.
+
+    URLs submitted by any host are collected for up to ``linger_s`` seconds or
+    until ``batch_size`` are pending, then fuzzed by one ffuf process using
+    the URL list and the wordlist as two keywords (``-w urls.txt:URL -w
+    wordlist:FUZZ``). Each URL gets :data:`THREADS_PER_URL` threads, so
+    per-target load and speed stay those of a single-URL run and
+    ``timeout_s`` still fits; ``batch_size`` is capped at ``max_threads //
+    THREADS_PER_URL`` to keep it so. Results are streamed back out by their
+    ``URL`` input into each submitting host's output file. ffuf's filters
+    apply to a whole run, so URLs are only batched with URLs calibrated to
+    the same filters.
+    """
+
+    def __init__(
+        self,
+        work_dir: Path,
+        wordlist: Path,
+        timeout_s: int,
+        batch_size: int = 64,
+        max_threads: int = 200,
+        linger_s: float = 2.0,
+    ) -> None:
+        self.work_dir = work_dir
+        self.wordlist = wordlist
+        self.timeout_s = timeout_s
+        self.batch_size = max(1, min(batch_size, max_threads // THREADS_PER_URL))
+        self.max_threads = max_threads
+        self.linger_s = linger_s
+        self._pending: Dict[Tuple[str, ...], Dict[str, List[Tuple["asyncio.Future[str]", Path]]]] = {}
+        self._timers: Dict[Tuple[str, ...], asyncio.TimerHandle] = {}
+        self._runs: set = set()
+
+    async def fuzz(self, url: str, output_path: Path, filters: Tuple[str, ...] = ()) -> str:
+        """Fuzz ``url`` in the next batch and return the batch id once it has run.
+
+        ``url``'s results are written to ``output_path``, one JSON item per
+        line. ``filters`` are extra ffuf arguments (such as ``-fs 1234``).
+        """
+        future: "asyncio.Future[str]" = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(filters, {})
+        pending.setdefault(url, []).append((future, output_path))
+        if len(pending) >= self.batch_size:
+            self._flush(filters)
+        elif filters not in self._timers:
+            self._timers[filters] = asyncio.get_running_loop().call_later(self.linger_s, self._flush, filters)
+        return await future
+
+    def _flush(self, filters: Tuple[str, ...]) -> None:
+        timer = self._timers.pop(filters, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(filters, None)
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._run(batch, filters))
+        self._runs.add(task)
+        task.add_done_callback(self._runs.discard)
+
+    async def _run(self, batch: Dict[str, List[Tuple["asyncio.Future[str]", Path]]], filters: Tuple[str, ...]) -> None:
+        urls = sorted(batch)
+        batch_id = hashlib.sha1("\n".join([*filters, *urls]).encode("utf-8")).hexdigest()[:12]
+        batch_dir = self.work_dir / batch_id
+        futures = [future for waiting in batch.values() for future, _ in waiting]
+        try:
+            batch_dir.mkdir(parents=True, exist_ok=True)
+            urls_path = batch_dir / "urls.txt"
+            urls_path.write_text("\n".join(urls) + "\n", encoding="utf-8")
+            output_path = batch_dir / "results.json"
+            if output_path.exists():
+                output_path.unlink()
+            command = [
+                "ffuf",
+                "-u",
+                "URLFUZZ",
+                "-w",
+                f"{urls_path}:URL",
+                "-w",
+                f"{self.wordlist}:FUZZ",
+                "-of",
+                "json",
+                "-o",
+                str(output_path),
+                "-t",
+                str(THREADS_PER_URL * len(urls)),
+                "-timeout",
+                str(self.timeout_s),
+                *filters,
+            ]
+            await run_command_async(command, batch_dir / "stdout.log", batch_dir / "stderr.log", self.timeout_s)
+            # Parsing a large result file would stall every other host's work on the loop.
+            await asyncio.get_running_loop().run_in_executor(None, self._split, batch, output_path)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for future in futures:
+            if not future.done():
+                future.set_result(batch_id)
+
+    def _split(self, batch: Dict[str, List[Tuple["asyncio.Future[str]", Path]]], output_path: Path) -> None:
+        urls = sorted(batch)
+        handles = {}
+        try:
+            for url, waiting in batch.items():
+                for _, path in waiting:
+                    if path not in handles:
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        handles[path] = path.open("w", encoding="utf-8")
+            for item in iter_ffuf_results(output_path):
+                url = _batch_url(item, urls)
+                if url is None:
+                    continue
+                line = json.dumps(item, sort_keys=True) + "\n"
+                for path in {path for _, path in batch[url]}:
+                    handles[path].write(line)
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+
+def _batch_url(item: dict, urls: List[str]) -> Optional[str]:
+    """Return the batch URL a result belongs to, from its ``URL`` input or its URL prefix."""
+    value = (item.get("input") or {}).get("URL")
+    if value in urls:
+        return value
+    found = item.get("url") or ""
+    matches = [url for url in urls if found.startswith(url)]
+    return max(matches, key=len) if matches else None
+
+
+async def run_ffuf(
+    host_dir: Path,
+    host: str,
+    urls: Union[List[str], Feed[str]],
+    timeout_s: int,
+    resume: bool,
+    calibrate: bool = False,
+    max_hits: int = 0,
+    hit_sample: int = 0,
+) -> None:
+    """Fuzz ``urls`` of one host, one ffuf process per URL or through the run's batcher.
+
+    With a :class:`FfufBatcher` set, every URL is handed to it as soon as it
+    arrives; each URL's share of the batch results is written to
+    ``ffuf_<port>.jsonl``. With a
+    :class:`~reconator.webfuzz.ContentDiscovery` engine set, it replaces ffuf:
+    URLs are fuzzed concurrently and matches are streamed to
+    ``ffuf_<port>.jsonl``, each within ``timeout_s``.
+
+    With ``calibrate``, a few random paths are requested under each URL
+    first. URLs answering them like real content are fuzzed with a matching
+    filter or, when no filter fits, skipped; see :func:`reconator.calibration.decide`.
+    Calibration results are written to ``calibration.json`` and skipped URLs
+    are recorded in the module's ``skipped_urls`` artifact.
+
+    Raw results are read back as a stream, in an executor thread, and hits
+    are appended to ``ffuf_hits.jsonl`` as they are parsed, at most
+    ``max_hits`` per URL plus every ``hit_sample``-th one beyond that (see
+    :class:`HitWriter`). ``ffuf_hits.json`` is exported from it at the end.
+    """
     state_path = host_dir / "state.json"
     state = HostState.load(state_path, engagement_name=host, host=host)
     module = init_module_state(state, "ffuf")
@@ -31,13 +347,19 @@ def run_ffuf(host_dir: Path, host: str, urls: List[str], timeout_s: int, resume:
     if resume and module.status == "OK":
         return
 
-    (web_dir / "urls.txt").write_text("\n".join(urls), encoding="utf-8")
+    engine = get_content_discovery()
+    batcher = get_ffuf_batcher() if engine is None else None
     stdout_path = web_dir / "stdout.log"
     stderr_path = web_dir / "stderr.log"
-    mark_running(module, "ffuf", stdout_path, stderr_path)
+    if engine is not None:
+        command = "content-discovery (native)"
+    else:
+        command = "ffuf (batched)" if batcher is not None else "ffuf"
+    mark_running(module, command, stdout_path, stderr_path)
+    for name in ("batch", "calibration_filtered", "skipped_urls", "hits", "hits_dropped"):
+        module.artifacts.pop(name, None)
     state.save(state_path)
 
-    hits = []
     try:
         wordlist = discover_wordlist()
     except FileNotFoundError as exc:
@@ -45,39 +367,91 @@ def run_ffuf(host_dir: Path, host: str, urls: List[str], timeout_s: int, resume:
         state.save(state_path)
         return
 
-    for url in urls:
-        port = url.split(":")[2].split("/")[0]
-        output_path = web_dir / f"ffuf_{port}.json"
-        command = [
-            "ffuf",
-            "-u",
-            f"{url}FUZZ",
-            "-w",
-            str(wordlist),
-            "-of",
-            "json",
-            "-o",
-            str(output_path),
-            "-t",
-            "5",
-            "-timeout",
-            str(timeout_s),
-        ]
-        run_command(command, stdout_path, stderr_path, timeout_s)
-        if output_path.exists():
+    calibrations: Dict[str, Calibration] = {}
+    batch_ids = set()
+    writer = HitWriter(web_dir / "ffuf_hits.jsonl", max_hits=max_hits, sample_every=hit_sample)
+
+    async def fuzz_one(url: str) -> None:
+        filters: Dict[str, int] = {}
+        if calibrate:
+            calibration = calibrations[url] = await calibrate_url(url)
+            if calibration.skip_reason is not None:
+                return
+            filters = calibration.filters
+        port = _port_of_url(url)
+        if engine is not None:
+            output_path = web_dir / f"ffuf_{port}.jsonl"
             try:
-                data = json.loads(output_path.read_text(encoding="utf-8"))
-            except json.JSONDecodeError:
-                continue
-            for item in data.get("results", []):
-                hits.append(
-                    {
-                        "url": item.get("url"),
-                        "status": item.get("status"),
-                        "length": item.get("length"),
-                        "words": item.get("words"),
-                    }
-                )
-    write_json(web_dir / "ffuf_hits.json", hits)
+                await asyncio.wait_for(engine.fuzz(url, wordlist, output_path, filters), timeout_s)
+            except asyncio.TimeoutError:
+                pass
+        elif batcher is not None:
+            output_path = web_dir / f"ffuf_{port}.jsonl"
+            batch_ids.add(await batcher.fuzz(url, output_path, filter_args(filters)))
+        else:
+            output_path = web_dir / f"ffuf_{port}.json"
+            command = [
+                "ffuf",
+                "-u",
+                f"{url}FUZZ",
+                "-w",
+                str(wordlist),
+                "-of",
+                "json",
+                "-o",
+                str(output_path),
+                "-t",
+                str(THREADS_PER_URL),
+                "-timeout",
+                str(timeout_s),
+                *filter_args(filters),
+            ]
+            await run_command_async(command, stdout_path, stderr_path, timeout_s)
+        # Results can be large; parse and write them off the event loop.
+        await asyncio.get_running_loop().run_in_executor(None, writer.add, url, iter_ffuf_results(output_path))
+
+    fuzzed: List[str] = []
+    try:
+        if batcher is not None or engine is not None:
+            pending: List[asyncio.Task] = []
+            try:
+                async for url in iterate(urls):
+                    fuzzed.append(url)
+                    pending.append(asyncio.ensure_future(fuzz_one(url)))
+                await asyncio.gather(*pending)
+            finally:
+                for task in pending:
+                    task.cancel()
+        else:
+            async for url in iterate(urls):
+                fuzzed.append(url)
+                await fuzz_one(url)
+    finally:
+        writer.close()
+    await asyncio.get_running_loop().run_in_executor(None, export_hits_json, web_dir)
+
+    if batch_ids:
+        module.artifacts["batch"] = ",".join(sorted(batch_ids))
+    if calibrate:
+        write_json(web_dir / "calibration.json", {url: item.to_dict() for url, item in calibrations.items()})
+        module.artifacts["calibration_filtered"] = str(sum(1 for item in calibrations.values() if item.filters))
+        skipped = [f"{url}: {item.skip_reason}" for url, item in calibrations.items() if item.skip_reason]
+        if skipped:
+            module.artifacts["skipped_urls"] = "; ".join(skipped)
+    kept = sum(counts["kept"] for counts in writer.counts.values())
+    module.artifacts["hits"] = str(kept)
+    dropped = sum(counts["results"] for counts in writer.counts.values()) - kept
+    if dropped:
+        module.artifacts["hits_dropped"] = str(dropped)
+    (web_dir / "urls.txt").write_text("\n".join(fuzzed), encoding="utf-8")
     mark_finished(module, "OK", exit_code=0)
     state.save(state_path)
+
+
+def set_ffuf_batcher(batcher: Optional[FfufBatcher]) -> None:
+    global _FFUF_BATCHER
+    _FFUF_BATCHER = batcher
+
+
+def get_ffuf_batcher() -> Optional[FfufBatcher]:
+    return _FFUF_BATCHER
@@ -0,0 +1,188 @@
+import asyncio
+import ssl
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+USER_AGENT = "reconator"
+
+# Body bytes kept per response; longer bodies are read to the end but not stored.
+MAX_BODY_BYTES = 1 << 20
+
+# Failures of a single request: connection, TLS, timeout and protocol errors.
+REQUEST_ERRORS = (OSError, EOFError, asyncio.TimeoutError, ValueError)
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    size: int = 0
+
+    @property
+    def words(self) -> int:
+        """Word count as ffuf reports it (space separated)."""
+        return len(self.body.split(b" "))
+
+    @property
+    def lines(self) -> int:
+        return len(self.body.split(b"\n"))
+
+
+def _tls_context() -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class HttpConnection:
+    """Keep-alive HTTP/1.1 connection to one origin.
+
+    Requests are sent over the same connection, which is reopened when the
+    server closes it; :meth:`get_many` pipelines several at once.
+    Certificates are not verified. Each exchange, including connecting, must
+    finish within ``timeout_s``.
+    """
+
+    def __init__(self, base_url: str, timeout_s: float = 10.0) -> None:
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.timeout_s = timeout_s
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        default_port = 443 if self.scheme == "https" else 80
+        self.host_header = host if self.port == default_port else f"{host}:{self.port}"
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self.requests = 0
+        self.connects = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the connection was kept alive after the last response."""
+        return self._writer is not None
+
+    async def get(self, path: str) -> HttpResponse:
+        """GET ``path`` (absolute, starting with ``/``), retrying once on a stale keep-alive connection."""
+        while True:
+            reused = self._writer is not None
+            try:
+                return (await asyncio.wait_for(self._exchange([path]), self.timeout_s))[0]
+            except REQUEST_ERRORS:
+                await self.close()
+                if not reused:
+                    raise
+
+    async def get_many(self, paths: List[str]) -> List[HttpResponse]:
+        """Pipeline GETs for ``paths``: every request is written before any response is read.
+
+        Responses come back in request order. If the server closes the
+        connection part-way, the responses read so far are returned and the
+        caller resends the rest. The whole exchange must finish within
+        ``timeout_s``.
+        """
+        try:
+            return await asyncio.wait_for(self._exchange(paths), self.timeout_s)
+        except REQUEST_ERRORS:
+            await self.close()
+            raise
+
+    async def _exchange(self, paths: List[str]) -> List[HttpResponse]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port, ssl=_tls_context() if self.scheme == "https" else None
+            )
+            self.connects += 1
+        for path in paths:
+            request = (
+                f"GET {path} HTTP/1.1\r\nHost: {self.host_header}\r\nUser-Agent: {USER_AGENT}\r\n"
+                "Accept: */*\r\nConnection: keep-alive\r\n\r\n"
+            )
+            self._writer.write(request.encode("latin-1"))
+        await self._writer.drain()
+        self.requests += len(paths)
+        responses: List[HttpResponse] = []
+        for _ in paths:
+            try:
+                status, version, headers = await self._read_head()
+            except REQUEST_ERRORS:
+                if not responses:
+                    raise
+                # Closed after the last answered request; the rest were never served.
+                await self.close()
+                break
+            body, size, complete = await self._read_body(status, headers)
+            responses.append(HttpResponse(status=status, headers=headers, body=body, size=size))
+            keep_alive = complete and headers.get("connection", "").lower() != "close" and version != "HTTP/1.0"
+            if not keep_alive:
+                await self.close()
+                break
+        return responses
+
+    async def _read_head(self) -> Tuple[int, str, Dict[str, str]]:
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionResetError("Connection closed before response")
+        version, _, rest = line.decode("latin-1").strip().partition(" ")
+        if not version.startswith("HTTP/"):
+            raise ValueError(f"Malformed status line: {line!r}")
+        status = int(rest.split(" ", 1)[0])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return status, version, headers
+
+    async def _read_body(self, status: int, headers: Dict[str, str]) -> Tuple[bytes, int, bool]:
+        """Return ``(kept body, body size, connection reusable)``."""
+        if status < 200 or status in (204, 304):
+            return b"", 0, True
+        chunks = []
+        size = 0
+
+        def keep(data: bytes) -> None:
+            nonlocal size
+            if size < MAX_BODY_BYTES:
+                chunks.append(data[: MAX_BODY_BYTES - size])
+            size += len(data)
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                length = int((await self._reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+                if length == 0:
+                    # Trailers end with an empty line.
+                    while (await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return b"".join(chunks), size, True
+                keep(await self._reader.readexactly(length))
+                await self._reader.readline()
+        if "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining > 0:
+                data = await self._reader.readexactly(min(remaining, 65536))
+                keep(data)
+                remaining -= len(data)
+            return b"".join(chunks), size, True
+        while True:
+            data = await self._reader.read(65536)
+            if not data:
+                return b"".join(chunks), size, False
+            keep(data)
+
+    async def close(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is None:
+            return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except REQUEST_ERRORS:
+            pass
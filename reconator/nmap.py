@@ -1,52 +1,171 @@
+import asyncio
+import copy
+import hashlib
+import ipaddress
+import time
 import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from .state import HostState, init_module_state, mark_finished, mark_running
-from .utils import format_command, run_command, write_json
+from .baseline import Baseline, get_baseline, load_services
+from .cache import ScanCache, get_scan_cache
+from .nse import NseRun, get_nse_planner
+from .portscan import ConnectScanner, HostScan, get_port_scanner
+from .state import HostState, ModuleState, init_module_state, mark_finished, mark_running
+from .utils import CommandResult, format_command, run_command_async, write_json
 
 
-def parse_nmap_xml_ports(path: Path) -> Dict[int, Dict[str, str]]:
-    ports: Dict[int, Dict[str, str]] = {}
-    if not path.exists():
-        return ports
-    tree = ET.parse(path)
-    root = tree.getroot()
-    for host in root.findall("host"):
-        status = host.find("status")
-        if status is not None and status.get("state") == "down":
-            continue
-        ports_elem = host.find("ports")
-        if ports_elem is None:
-            continue
-        for port in ports_elem.findall("port"):
-            if port.get("protocol") != "tcp":
+@dataclass
+class NmapHostRecord:
+    address: str
+    status: str
+    ports: Dict[int, Dict[str, str]] = field(default_factory=dict)
+    scripts: Dict[int, Dict[str, str]] = field(default_factory=dict)
+    host_scripts: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_down(self) -> bool:
+        return self.status == "down"
+
+
+def _iter_host_elements(path: Path) -> Iterator[Tuple[Dict[str, str], ET.Element]]:
+    """Yield ``(nmaprun attributes, <host> element)`` pairs in one streaming pass.
+
+    Each element is cleared and detached once the caller resumes, so memory
+    stays bounded by the largest single host. A truncated file (for example
+    from a killed scan) ends the iteration at the last complete host.
+    """
+    root: Optional[ET.Element] = None
+    run_attrib: Dict[str, str] = {}
+    try:
+        for event, elem in ET.iterparse(str(path), events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                    run_attrib = dict(elem.attrib)
                 continue
-            state = port.find("state")
-            if state is None or state.get("state") != "open":
+            if elem.tag != "host":
                 continue
-            port_id = int(port.get("portid"))
-            service = port.find("service")
-            entry = {
-                "name": service.get("name") if service is not None else "",
-                "product": service.get("product") if service is not None else "",
-                "version": service.get("version") if service is not None else "",
-                "tunnel": service.get("tunnel") if service is not None else "",
-            }
-            ports[port_id] = entry
-    return ports
+            yield run_attrib, elem
+            elem.clear()
+            if root is not None and elem in root:
+                root.remove(elem)
+    except ET.ParseError:
+        return
 
 
-def host_is_down(path: Path) -> bool:
+def _port_entry(port: ET.Element) -> Optional[Tuple[int, Dict[str, str]]]:
+    """Return ``(port, service)`` for an open TCP ``<port>`` element, else ``None``."""
+    if port.get("protocol") != "tcp":
+        return None
+    state = port.find("state")
+    if state is None or state.get("state") != "open":
+        return None
+    service = port.find("service")
+    return int(port.get("portid")), {
+        "name": service.get("name") if service is not None else "",
+        "product": service.get("product") if service is not None else "",
+        "version": service.get("version") if service is not None else "",
+        "tunnel": service.get("tunnel") if service is not None else "",
+    }
+
+
+def _host_record(host_elem: ET.Element) -> NmapHostRecord:
+    status = host_elem.find("status")
+    record = NmapHostRecord(
+        address=_host_address(host_elem),
+        status=status.get("state", "") if status is not None else "",
+    )
+    for port in host_elem.iterfind("ports/port"):
+        entry = _port_entry(port)
+        if entry is None:
+            continue
+        port_id, meta = entry
+        record.ports[port_id] = meta
+        scripts = {script.get("id", ""): script.get("output", "") for script in port.iterfind("script")}
+        if scripts:
+            record.scripts[port_id] = scripts
+    for script in host_elem.iterfind("hostscript/script"):
+        record.host_scripts[script.get("id", "")] = script.get("output", "")
+    return record
+
+
+def iter_nmap_hosts(path: Path) -> Iterator[NmapHostRecord]:
+    """Stream per-host records (status, open TCP ports, services, scripts) from nmap XML."""
     if not path.exists():
-        return False
-    tree = ET.parse(path)
-    root = tree.getroot()
-    for host in root.findall("host"):
-        status = host.find("status")
-        if status is not None and status.get("state") == "down":
-            return True
-    return False
+        return
+    for _, host_elem in _iter_host_elements(path):
+        yield _host_record(host_elem)
+
+
+async def tail_nmap_ports(
+    path: Path, process: "asyncio.Future", poll_interval_s: float = 0.25
+) -> AsyncIterator[Tuple[str, int, Dict[str, str]]]:
+    """Yield ``(address, port, service)`` for each open TCP port as nmap writes it.
+
+    ``path`` is followed while ``process`` (the running scan) is pending and
+    read to the end once it finishes. Tailing is best effort: the complete
+    file is still parsed afterwards, so a malformed chunk only ends the stream.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root: Optional[ET.Element] = None
+    address = ""
+    handle = None
+    try:
+        while True:
+            finished = process.done()
+            if handle is None and path.exists():
+                handle = path.open("rb")
+            chunk = handle.read() if handle is not None else b""
+            if chunk:
+                try:
+                    parser.feed(chunk)
+                    events = list(parser.read_events())
+                except ET.ParseError:
+                    return
+                for event, elem in events:
+                    if event == "start":
+                        if root is None:
+                            root = elem
+                        continue
+                    if elem.tag == "address" and elem.get("addrtype") in ("ipv4", "ipv6"):
+                        address = elem.get("addr", "")
+                    elif elem.tag == "port":
+                        entry = _port_entry(elem)
+                        if entry is not None:
+                            yield (address, *entry)
+                    elif elem.tag == "host":
+                        elem.clear()
+                        if root is not None and elem in root:
+                            root.remove(elem)
+                        address = ""
+            if finished:
+                return
+            await asyncio.wait({process}, timeout=poll_interval_s)
+    finally:
+        if handle is not None:
+            handle.close()
+
+
+def summarize_nmap_xml(path: Path) -> Tuple[bool, Dict[int, Dict[str, str]]]:
+    """Return ``(any host down, open ports of up hosts)`` from a single pass."""
+    down = False
+    ports: Dict[int, Dict[str, str]] = {}
+    for record in iter_nmap_hosts(path):
+        if record.is_down:
+            down = True
+            continue
+        ports.update(record.ports)
+    return down, ports
+
+
+def parse_nmap_xml_ports(path: Path) -> Dict[int, Dict[str, str]]:
+    return summarize_nmap_xml(path)[1]
+
+
+def host_is_down(path: Path) -> bool:
+    return summarize_nmap_xml(path)[0]
 
 
 def derive_web_urls(host: str, ports: Dict[int, Dict[str, str]]) -> List[str]:
@@ -64,12 +183,279 @@ def derive_web_urls(host: str, ports: Dict[int, Dict[str, str]]) -> List[str]:
     return sorted(set(urls))
 
 
-def run_nmap(
+NMAP_ARTIFACTS = [
+    "nmap/triage.xml",
+    "nmap/triage.json",
+    "nmap/followup.xml",
+    "nmap/nse_plan.json",
+    "nmap/ports.txt",
+    "services.json",
+]
+
+
+def _triage_command(host_dir: Path, host: str, scanner: Optional[ConnectScanner]) -> List[str]:
+    if scanner is not None:
+        return [*scanner.describe(), host]
+    return ["nmap", "-sV", "-T3", "-oX", str(host_dir / "nmap" / "triage.xml"), host]
+
+
+def _nmap_cache_key(
+    cache: Optional[ScanCache], host_dir: Path, host: str, scanner: Optional[ConnectScanner] = None
+) -> Optional[str]:
+    # Batched and per-host scans of a host share the per-host triage command as key.
+    if cache is None:
+        return None
+    command = _triage_command(host_dir, host, scanner)
+    planner = get_nse_planner()
+    if planner is not None:
+        command = [*command, *planner.describe()]
+    return cache.key("nmap", command, host, host_dir)
+
+
+def _connect_triage_record(host_dir: Path, scan: HostScan) -> NmapHostRecord:
+    """Record a connect-scan triage in ``nmap/triage.json`` and return it as a host record."""
+    write_json(
+        host_dir / "nmap" / "triage.json",
+        {
+            "engine": "connect",
+            "open_ports": scan.open_ports,
+            "closed": scan.closed,
+            "filtered": scan.filtered,
+            "timeout_s": round(scan.timeout_s, 4),
+        },
+    )
+    return NmapHostRecord(
+        address=scan.host,
+        status="up" if scan.responded else "down",
+        ports={port: {} for port in scan.open_ports},
+    )
+
+
+async def _run_tailed(
+    command: List[str],
+    xml_path: Path,
+    stdout_path: Path,
+    stderr_path: Path,
+    timeout_s: int,
+    on_port: Callable[[int, Dict[str, str]], None],
+) -> CommandResult:
+    # A stale XML file from an earlier run must not be tailed.
+    if xml_path.exists():
+        xml_path.unlink()
+    process = asyncio.ensure_future(run_command_async(command, stdout_path, stderr_path, timeout_s))
+    try:
+        async for _, port, meta in tail_nmap_ports(xml_path, process):
+            on_port(port, meta)
+        return await process
+    finally:
+        if not process.done():
+            process.cancel()
+
+
+def merge_nmap_xml(parts: Sequence[Path], output: Path) -> None:
+    """Combine follow-up XML files that scanned different ports of the same hosts.
+
+    Each host keeps its element from the first file it appears in; ports and
+    host scripts from later files are appended to it. Missing or truncated
+    files contribute what they hold.
+    """
+    run_attrib: Optional[Dict[str, str]] = None
+    merged: Dict[str, ET.Element] = {}
+    for part in parts:
+        if not part.exists():
+            continue
+        for attrib, host_elem in _iter_host_elements(part):
+            if run_attrib is None:
+                run_attrib = attrib
+            address = _host_address(host_elem)
+            target = merged.get(address)
+            if target is None:
+                merged[address] = copy.deepcopy(host_elem)
+                continue
+            ports_elem = target.find("ports")
+            if ports_elem is None:
+                ports_elem = ET.SubElement(target, "ports")
+            for port in host_elem.iterfind("ports/port"):
+                ports_elem.append(copy.deepcopy(port))
+            for scripts in host_elem.iterfind("hostscript"):
+                target.append(copy.deepcopy(scripts))
+    run = ET.Element("nmaprun", run_attrib or {"scanner": "nmap"})
+    run.extend(merged.values())
+    output.write_bytes(b'<?xml version="1.0"?>\n' + ET.tostring(run))
+
+
+async def _run_followup(
+    targets: List[str],
+    ports: Dict[int, Dict[str, str]],
+    followup_xml: Path,
+    stdout_path: Path,
+    stderr_path: Path,
+    timeout_s: int,
+    family_flags: Sequence[str] = (),
+    on_port: Optional[Callable[[int, Dict[str, str]], None]] = None,
+    hosts: int = 1,
+) -> Tuple[CommandResult, List[Dict[str, object]]]:
+    """Run the script follow-up on ``ports`` of ``targets`` and write ``followup_xml``.
+
+    Without an NSE planner this is one ``nmap -sV -sC`` run. With one, each
+    group of ports the planner forms is scanned concurrently with its own
+    ``--script`` set, all within the one ``timeout_s`` (waiting for admission
+    included); the runs' XML is merged into ``followup_xml`` and their label,
+    ports, scripts and duration per category are returned and added to the
+    planner's stats (``hosts`` is the number of hosts in ``targets``). With
+    ``on_port``, ports are reported from the follow-up as it is written.
+    """
+    planner = get_nse_planner()
+    if planner is None:
+        command = [
+            "nmap",
+            *family_flags,
+            "-sV",
+            "-sC",
+            "-T3",
+            "-p",
+            ",".join(str(port) for port in sorted(ports)),
+            "-oX",
+            str(followup_xml),
+            *targets,
+        ]
+        if on_port is not None:
+            result = await _run_tailed(command, followup_xml, stdout_path, stderr_path, timeout_s, on_port)
+        else:
+            result = await run_command_async(command, stdout_path, stderr_path, timeout_s)
+        return result, []
+
+    runs = planner.plan(ports)
+
+    async def scan(run: NseRun) -> CommandResult:
+        xml_path = followup_xml.with_name(f"{followup_xml.stem}.{run.label}.xml")
+        command = [
+            "nmap",
+            *family_flags,
+            "-sV",
+            *run.script_args(planner.budget),
+            "-T3",
+            "-p",
+            ",".join(str(port) for port in run.ports),
+            "-oX",
+            str(xml_path),
+            *targets,
+        ]
+        part_stdout = stdout_path.with_name(f"{followup_xml.stem}.{run.label}.stdout.log")
+        part_stderr = stderr_path.with_name(f"{followup_xml.stem}.{run.label}.stderr.log")
+        if on_port is not None:
+            return await _run_tailed(command, xml_path, part_stdout, part_stderr, timeout_s, on_port)
+        if xml_path.exists():
+            xml_path.unlink()
+        return await run_command_async(command, part_stdout, part_stderr, timeout_s)
+
+    async def bounded(run: NseRun) -> CommandResult:
+        # Groups queued behind the scheduler must not extend the follow-up past timeout_s.
+        started = time.monotonic()
+        try:
+            return await asyncio.wait_for(scan(run), timeout_s)
+        except asyncio.TimeoutError:
+            elapsed = time.monotonic() - started
+            return CommandResult([], None, elapsed, stdout_path, stderr_path, timed_out=True)
+
+    results = await asyncio.gather(*(bounded(run) for run in runs))
+    parts = [followup_xml.with_name(f"{followup_xml.stem}.{run.label}.xml") for run in runs]
+    merge_nmap_xml(parts, followup_xml)
+    for part in parts:
+        if part.exists():
+            part.unlink()
+    records: List[Dict[str, object]] = []
+    for run, result in zip(runs, results):
+        shares = planner.record(run, result.duration_s, hosts=hosts)
+        records.append(
+            {
+                "label": run.label,
+                "ports": run.ports,
+                "scripts": run.scripts,
+                "categories": {
+                    category: {"scripts": run.categories.get(category, []), "duration_s": round(seconds, 3)}
+                    for category, seconds in shares.items()
+                },
+                "duration_s": round(result.duration_s, 3),
+                "returncode": result.returncode,
+                "timed_out": result.timed_out,
+            }
+        )
+    failed = [result for result in results if result.returncode]
+    combined = CommandResult(
+        command=next((result.command for result in results if result.command), []),
+        returncode=failed[0].returncode if failed else results[0].returncode,
+        duration_s=max(result.duration_s for result in results),
+        stdout_path=stdout_path,
+        stderr_path=stderr_path,
+        timed_out=any(result.timed_out for result in results),
+    )
+    return combined, records
+
+
+def _record_nse_runs(host_dir: Path, module: ModuleState, runs: List[Dict[str, object]]) -> None:
+    """Write ``nmap/nse_plan.json``, with runtime per script category, for a planned follow-up."""
+    planner = get_nse_planner()
+    if planner is None or not runs:
+        return
+    categories: Dict[str, Dict[str, float]] = {}
+    for run in runs:
+        for category, share in run["categories"].items():
+            entry = categories.setdefault(category, {"ports": 0, "duration_s": 0.0})
+            entry["ports"] += len(run["ports"])
+            entry["duration_s"] = round(entry["duration_s"] + share["duration_s"], 3)
+    write_json(
+        host_dir / "nmap" / "nse_plan.json",
+        {
+            "profile": planner.profile,
+            "max_scripts_per_port": planner.budget.max_scripts_per_port,
+            "script_timeout": planner.budget.script_timeout,
+            "runs": runs,
+            "categories": categories,
+        },
+    )
+    module.artifacts["nse_scripts"] = str(len({script for run in runs for script in run["scripts"]}))
+    module.artifacts["nse_plan"] = "nmap/nse_plan.json"
+
+
+def _restore_from_cache(
+    cache: Optional[ScanCache], cache_key: Optional[str], host_dir: Path, module: ModuleState
+) -> Optional[Dict[int, Dict[str, str]]]:
+    if cache_key is None:
+        return None
+    meta = cache.fetch("nmap", cache_key, host_dir)
+    if meta is None:
+        return None
+    module.artifacts.clear()
+    module.artifacts.update(meta.get("module_artifacts", {}))
+    module.artifacts["cache"] = "hit"
+    mark_finished(module, "OK", exit_code=0)
+    return parse_nmap_xml_ports(host_dir / "nmap" / "followup.xml")
+
+
+def _store_in_cache(
+    cache: Optional[ScanCache], cache_key: Optional[str], host: str, host_dir: Path, module: ModuleState
+) -> None:
+    if cache_key is not None:
+        cache.store("nmap", cache_key, host, host_dir, NMAP_ARTIFACTS, {"module_artifacts": dict(module.artifacts)})
+
+
+async def run_nmap(
     host_dir: Path,
     host: str,
     timeout_s: int,
     resume: bool,
+    on_port: Optional[Callable[[int, Dict[str, str]], None]] = None,
 ) -> Dict[int, Dict[str, str]]:
+    """Triage ``host`` and run the script follow-up on its open ports.
+
+    With ``on_port`` set, the triage XML is tailed while nmap runs and each
+    open port is reported as soon as it is written, so callers can start
+    per-port work before the scan (and the follow-up) has finished. Ports
+    from resumed or cached results are not reported; they are all returned.
+    When a port scanner is set, it replaces the nmap triage and ports are
+    reported from the follow-up instead.
+    """
     state_path = host_dir / "state.json"
     state = HostState.load(state_path, engagement_name=host, host=host)
     module = init_module_state(state, "nmap")
@@ -81,56 +467,405 @@ def run_nmap(
         mark_finished(module, "INTERRUPTED", exit_code=module.exit_code, error="Previous run interrupted")
         state.save(state_path)
 
-    if resume and module.status == "OK" and followup_xml.exists():
-        return parse_nmap_xml_ports(followup_xml)
+    if resume and module.status == "OK":
+        if "baseline" in module.artifacts:
+            # The follow-up only covered changed ports; services.json has them all.
+            return load_services(host_dir / "services.json") or {}
+        if followup_xml.exists():
+            return parse_nmap_xml_ports(followup_xml)
 
     nmap_dir.mkdir(parents=True, exist_ok=True)
     stdout_path = nmap_dir / "stdout.log"
     stderr_path = nmap_dir / "stderr.log"
 
-    command = ["nmap", "-sV", "-T3", "-oX", str(triage_xml), host]
+    baseline = get_baseline()
+    # Results merged with a baseline are not reusable on their own, so skip the cache.
+    cache = get_scan_cache() if baseline is None or baseline.services(host) is None else None
+    scanner = get_port_scanner()
+    cache_key = _nmap_cache_key(cache, host_dir, host, scanner)
+    cached = _restore_from_cache(cache, cache_key, host_dir, module)
+    if cached is not None:
+        state.save(state_path)
+        return cached
+
+    command = _triage_command(host_dir, host, scanner)
+    module.artifacts.clear()
     mark_running(module, format_command(command), stdout_path, stderr_path)
     state.save(state_path)
-    result = run_command(command, stdout_path, stderr_path, timeout_s)
-
-    if result.timed_out:
-        mark_finished(module, "TIMEOUT", result.returncode, "nmap triage timeout")
-        state.save(state_path)
-        return {}
+    if scanner is not None:
+        # Connect triage only finds open ports; services come from the follow-up.
+        record = _connect_triage_record(host_dir, await scanner.scan_host(host))
+        module.artifacts["triage_engine"] = scanner.engine
+        down, ports, returncode = record.is_down, record.ports, 0
+    else:
+        if on_port is None:
+            result = await run_command_async(command, stdout_path, stderr_path, timeout_s)
+        else:
+            result = await _run_tailed(command, triage_xml, stdout_path, stderr_path, timeout_s, on_port)
+        if result.timed_out:
+            mark_finished(module, "TIMEOUT", result.returncode, "nmap triage timeout")
+            state.save(state_path)
+            return {}
+        down, ports = summarize_nmap_xml(triage_xml)
+        returncode = result.returncode
 
-    ports = parse_nmap_xml_ports(triage_xml)
-    if host_is_down(triage_xml):
+    if down:
         module.artifacts["host_state"] = "down"
-        mark_finished(module, "OK", result.returncode)
+        module.artifacts["open_ports"] = "0"
         write_json(host_dir / "services.json", {})
+        mark_finished(module, "OK", returncode)
         state.save(state_path)
+        _store_in_cache(cache, cache_key, host, host_dir, module)
         return {}
     if not ports:
-        mark_finished(module, "OK", result.returncode)
+        module.artifacts["open_ports"] = "0"
+        mark_finished(module, "OK", returncode)
         state.save(state_path)
+        _store_in_cache(cache, cache_key, host, host_dir, module)
         return {}
 
-    ports_list = ",".join(str(port) for port in ports)
-    followup_cmd = [
+    carried, followup_ports = await _split_by_baseline(baseline, host, ports, module, nmap_dir, timeout_s)
+    timed_out = False
+    if followup_ports:
+        # Without service names from triage, ports are reported from the follow-up.
+        result, nse_runs = await _run_followup(
+            [host],
+            {port: ports[port] for port in followup_ports},
+            followup_xml,
+            stdout_path,
+            stderr_path,
+            timeout_s,
+            on_port=on_port if scanner is not None else None,
+        )
+        _record_nse_runs(host_dir, module, nse_runs)
+        timed_out, returncode = result.timed_out, result.returncode
+        carried.update(parse_nmap_xml_ports(followup_xml))
+    ports = dict(sorted(carried.items()))
+    (nmap_dir / "ports.txt").write_text("\n".join(str(p) for p in ports), encoding="utf-8")
+    write_json(host_dir / "services.json", ports)
+    module.artifacts["open_ports"] = str(len(ports))
+    if timed_out:
+        mark_finished(module, "TIMEOUT", returncode, "nmap followup timeout")
+    else:
+        mark_finished(module, "OK", returncode)
+        _store_in_cache(cache, cache_key, host, host_dir, module)
+    state.save(state_path)
+    return ports
+
+
+async def _split_by_baseline(
+    baseline: Optional[Baseline],
+    host: str,
+    ports: Dict[int, Dict[str, str]],
+    module: ModuleState,
+    nmap_dir: Path,
+    timeout_s: int,
+    family_flags: Sequence[str] = (),
+) -> Tuple[Dict[int, Dict[str, str]], List[int]]:
+    """Return the baseline services carried over unchanged and the ports still to follow up.
+
+    Ports triage found open without a fingerprint (connect triage) are first
+    service-detected with a ``-sV``-only nmap run into ``nmap/verify.xml``;
+    only those whose fingerprint still matches the baseline are carried over.
+    """
+    carried: Dict[int, Dict[str, str]] = {}
+    previous = baseline.services(host) if baseline is not None else None
+    if previous is not None:
+        unverified = baseline.unverified(host, ports)
+        if unverified:
+            verified = await _verify_fingerprints(host, unverified, nmap_dir, timeout_s, family_flags)
+            ports = {**ports, **{port: verified[port] for port in unverified if port in verified}}
+            module.artifacts["baseline_verified"] = str(len(unverified))
+        carried = {port: previous[port] for port, meta in ports.items() if baseline.is_unchanged(host, port, meta)}
+        module.artifacts["baseline"] = baseline.name
+        module.artifacts["baseline_unchanged"] = str(len(carried))
+    return carried, [port for port in ports if port not in carried]
+
+
+async def _verify_fingerprints(
+    host: str, ports: List[int], nmap_dir: Path, timeout_s: int, family_flags: Sequence[str] = ()
+) -> Dict[int, Dict[str, str]]:
+    """Service-detect ``ports`` of ``host``; nothing is returned for a run that did not finish cleanly."""
+    nmap_dir.mkdir(parents=True, exist_ok=True)
+    verify_xml = nmap_dir / "verify.xml"
+    command = [
         "nmap",
+        *family_flags,
         "-sV",
-        "-sC",
         "-T3",
         "-p",
-        ports_list,
+        ",".join(str(port) for port in sorted(ports)),
         "-oX",
-        str(followup_xml),
+        str(verify_xml),
         host,
     ]
-    followup_stdout = nmap_dir / "stdout.log"
-    followup_stderr = nmap_dir / "stderr.log"
-    result = run_command(followup_cmd, followup_stdout, followup_stderr, timeout_s)
-    if result.timed_out:
-        mark_finished(module, "TIMEOUT", result.returncode, "nmap followup timeout")
+    result = await run_command_async(
+        command, nmap_dir / "verify.stdout.log", nmap_dir / "verify.stderr.log", timeout_s
+    )
+    if result.timed_out or result.returncode != 0 or not _xml_complete(verify_xml):
+        return {}
+    return parse_nmap_xml_ports(verify_xml)
+
+
+def _batch_targets(hosts: List[str]) -> List[str]:
+    """Collapse contiguous addresses into CIDR blocks for the nmap target list."""
+    addresses = [ipaddress.ip_address(host) for host in hosts]
+    return [
+        str(network) if network.num_addresses > 1 else str(network.network_address)
+        for network in ipaddress.collapse_addresses(addresses)
+    ]
+
+
+def _host_address(host_elem: ET.Element) -> str:
+    for address in host_elem.findall("address"):
+        if address.get("addrtype") in {"ipv4", "ipv6"}:
+            return str(ipaddress.ip_address(address.get("addr")))
+    return ""
+
+
+def _xml_complete(path: Path) -> bool:
+    """Return whether nmap finished writing ``path`` (its closing ``</nmaprun>`` is there)."""
+    if not path.exists():
+        return False
+    with path.open("rb") as handle:
+        handle.seek(max(0, path.stat().st_size - 64))
+        return handle.read().rstrip().endswith(b"</nmaprun>")
+
+
+def split_nmap_xml(
+    path: Path, hosts: List[str], filename: str, output_dir: Path
+) -> Dict[str, NmapHostRecord]:
+    """Write each host's ``<host>`` element of a multi-host run to ``<host>/nmap/<filename>``.
+
+    Every per-host file keeps the original ``<nmaprun>`` attributes so it reads
+    exactly like the output of a single-host scan. The file is streamed once;
+    the parsed record of every host found is returned.
+    """
+    records: Dict[str, NmapHostRecord] = {}
+    if not path.exists():
+        return records
+    wanted = {str(ipaddress.ip_address(host)): host for host in hosts}
+    for run_attrib, host_elem in _iter_host_elements(path):
+        host = wanted.get(_host_address(host_elem))
+        if host is None:
+            continue
+        records[host] = _host_record(host_elem)
+        run = ET.Element("nmaprun", run_attrib)
+        run.append(host_elem)
+        host_path = output_dir / host / "nmap" / filename
+        host_path.parent.mkdir(parents=True, exist_ok=True)
+        host_path.write_bytes(b'<?xml version="1.0"?>\n' + ET.tostring(run))
+    return records
+
+
+async def run_nmap_batch(
+    output_dir: Path,
+    hosts: List[str],
+    timeout_s: int,
+    resume: bool,
+    engagement_name: Optional[str] = None,
+    batch_timeout_s: int = 0,
+) -> Dict[str, Dict[int, Dict[str, str]]]:
+    """Scan ``hosts`` with one nmap process per phase and split the results per host.
+
+    Each host ends up with the same ``nmap/`` artifacts, ``services.json`` and
+    ``state.json`` entries as :func:`run_nmap` would produce. Followup scans are
+    grouped by identical open-port sets so every host is probed exactly as a
+    single-host run would probe it; the groups run concurrently. Hosts must
+    share one address family.
+
+    Each nmap process gets ``batch_timeout_s``, or ``timeout_s`` per host it
+    scans when that is 0. Hosts a timed-out triage had finished are kept; only
+    the rest are marked TIMEOUT. A host missing from the XML is only taken as
+    down when nmap exited cleanly and finished its XML; after a failed run it
+    is marked FAILED and left uncached so it is retried.
+    """
+    results: Dict[str, Dict[int, Dict[str, str]]] = {}
+    states: Dict[str, HostState] = {}
+    cache = get_scan_cache()
+    scanner = get_port_scanner()
+    baseline = get_baseline()
+    cache_keys: Dict[str, Optional[str]] = {}
+    pending: List[str] = []
+    for host in hosts:
+        host_dir = output_dir / host
+        host_dir.mkdir(parents=True, exist_ok=True)
+        state_path = host_dir / "state.json"
+        state = HostState.load(state_path, engagement_name=engagement_name or host, host=host)
+        module = init_module_state(state, "nmap")
+        if module.status == "RUNNING":
+            mark_finished(module, "INTERRUPTED", exit_code=module.exit_code, error="Previous run interrupted")
+            state.save(state_path)
+        followup_xml = host_dir / "nmap" / "followup.xml"
+        if resume and module.status == "OK" and "baseline" in module.artifacts:
+            results[host] = load_services(host_dir / "services.json") or {}
+            continue
+        if resume and module.status == "OK" and followup_xml.exists():
+            results[host] = parse_nmap_xml_ports(followup_xml)
+            continue
+        host_cache = cache if baseline is None or baseline.services(host) is None else None
+        cache_keys[host] = _nmap_cache_key(host_cache, host_dir, host, scanner)
+        cached = _restore_from_cache(cache, cache_keys[host], host_dir, module)
+        if cached is not None:
+            state.save(state_path)
+            if cached:
+                results[host] = cached
+            continue
+        states[host] = state
+        pending.append(host)
+    if not pending:
+        return results
+
+    batch_id = hashlib.sha1("\n".join(pending).encode("utf-8")).hexdigest()[:12]
+    batch_dir = output_dir / "_meta" / "nmap_batches" / batch_id
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    family_flags = ["-6"] if ipaddress.ip_address(pending[0]).version == 6 else []
+    stdout_path = batch_dir / "stdout.log"
+    stderr_path = batch_dir / "stderr.log"
+
+    targets_path = batch_dir / "targets.txt"
+    targets_path.write_text("\n".join(_batch_targets(pending)), encoding="utf-8")
+    triage_xml = batch_dir / "triage.xml"
+    if scanner is not None:
+        command = [*scanner.describe(), "-iL", str(targets_path)]
     else:
-        mark_finished(module, "OK", result.returncode)
-    state.save(state_path)
-    ports = parse_nmap_xml_ports(followup_xml)
-    (nmap_dir / "ports.txt").write_text("\n".join(str(p) for p in ports), encoding="utf-8")
+        command = ["nmap", *family_flags, "-sV", "-T3", "-oX", str(triage_xml), "-iL", str(targets_path)]
+    for host in pending:
+        state = states[host]
+        state.modules["nmap"].artifacts.clear()
+        mark_running(state.modules["nmap"], format_command(command), stdout_path, stderr_path)
+        state.modules["nmap"].artifacts["batch"] = batch_id
+        state.save(output_dir / host / "state.json")
+
+    triage_records: Dict[str, NmapHostRecord] = {}
+    if scanner is not None:
+        # All hosts of the batch are connect-scanned at once.
+        async for scan in scanner.scan(pending):
+            triage_records[scan.host] = _connect_triage_record(output_dir / scan.host, scan)
+            states[scan.host].modules["nmap"].artifacts["triage_engine"] = scanner.engine
+        returncode: Optional[int] = 0
+    else:
+        result = await run_command_async(
+            command, stdout_path, stderr_path, batch_timeout_s or timeout_s * len(pending)
+        )
+        # Down hosts are omitted from multi-host XML, so absence means down, but
+        # only for a run that completed. A killed or failed scan leaves the
+        # hosts it finished; the others timed out or failed.
+        triage_records = split_nmap_xml(triage_xml, pending, "triage.xml", output_dir)
+        returncode = result.returncode
+        if result.timed_out or result.returncode != 0 or not _xml_complete(triage_xml):
+            status, reason = ("TIMEOUT", "timeout") if result.timed_out else ("FAILED", "failed")
+            for host in [host for host in pending if host not in triage_records]:
+                mark_finished(states[host].modules["nmap"], status, result.returncode, f"nmap triage {reason}")
+                states[host].save(output_dir / host / "state.json")
+            pending = [host for host in pending if host in triage_records]
+            for host in pending:
+                states[host].modules["nmap"].artifacts["salvaged"] = f"triage {reason}"
+
+    planner = get_nse_planner()
+    groups: Dict[Tuple[Tuple[int, ...], Tuple], List[str]] = {}
+    carried: Dict[str, Dict[int, Dict[str, str]]] = {}
+    followup_services: Dict[str, Dict[int, Dict[str, str]]] = {}
+    # Hosts with open ports are split against the baseline concurrently, as
+    # each may need its own fingerprinting run.
+    open_hosts = [
+        host
+        for host, record in ((host, triage_records.get(host)) for host in pending)
+        if record is not None and not record.is_down and record.ports
+    ]
+    splitting = [
+        _split_by_baseline(
+            baseline,
+            host,
+            triage_records[host].ports,
+            states[host].modules["nmap"],
+            output_dir / host / "nmap",
+            timeout_s,
+            family_flags,
+        )
+        for host in open_hosts
+    ]
+    splits = dict(zip(open_hosts, await asyncio.gather(*splitting)))
+    for host in pending:
+        host_dir = output_dir / host
+        module = states[host].modules["nmap"]
+        record = triage_records.get(host)
+        if record is None or record.is_down:
+            module.artifacts["host_state"] = "down"
+            module.artifacts["open_ports"] = "0"
+            write_json(host_dir / "services.json", {})
+            mark_finished(module, "OK", returncode)
+            states[host].save(host_dir / "state.json")
+            _store_in_cache(cache, cache_keys[host], host, host_dir, module)
+            continue
+        ports = record.ports
+        if not ports:
+            module.artifacts["open_ports"] = "0"
+            mark_finished(module, "OK", returncode)
+            states[host].save(host_dir / "state.json")
+            _store_in_cache(cache, cache_keys[host], host, host_dir, module)
+            continue
+        carried[host], followup_ports = splits[host]
+        if not followup_ports:
+            _finish_batch_host(output_dir / host, states[host], carried[host], returncode)
+            results[host] = carried[host]
+            continue
+        # With an NSE planner, hosts are only grouped with hosts given the same script runs.
+        followup = {port: ports[port] for port in followup_ports}
+        runs = planner.signature(followup) if planner is not None else ()
+        groups.setdefault((tuple(followup_ports), runs), []).append(host)
+        followup_services[host] = followup
+
+    async def follow_up(index: int, group: List[str]) -> None:
+        group_targets = batch_dir / f"followup_{index}.txt"
+        group_targets.write_text("\n".join(_batch_targets(group)), encoding="utf-8")
+        group_xml = batch_dir / f"followup_{index}.xml"
+        result, nse_runs = await _run_followup(
+            ["-iL", str(group_targets)],
+            followup_services[group[0]],
+            group_xml,
+            batch_dir / f"followup_{index}.stdout.log",
+            batch_dir / f"followup_{index}.stderr.log",
+            batch_timeout_s or timeout_s * len(group),
+            family_flags=family_flags,
+            hosts=len(group),
+        )
+        followup_records = split_nmap_xml(group_xml, group, "followup.xml", output_dir)
+        complete = not result.timed_out and result.returncode == 0 and _xml_complete(group_xml)
+        for host in group:
+            _record_nse_runs(output_dir / host, states[host].modules["nmap"], nse_runs)
+            record = followup_records.get(host)
+            ports = dict(carried[host])
+            if record is not None and not record.is_down:
+                ports.update(record.ports)
+            ports = dict(sorted(ports.items()))
+            status, error = "OK", None
+            if result.timed_out:
+                status, error = "TIMEOUT", "nmap followup timeout"
+            elif not complete and record is None:
+                status, error = "FAILED", "nmap followup failed"
+            _finish_batch_host(output_dir / host, states[host], ports, result.returncode, status, error)
+            if complete:
+                _store_in_cache(cache, cache_keys[host], host, output_dir / host, states[host].modules["nmap"])
+            if ports:
+                results[host] = ports
+
+    # Each group is a separate nmap process, admitted by the resource scheduler.
+    await asyncio.gather(*(follow_up(index, group) for index, (_, group) in enumerate(sorted(groups.items()))))
+    return results
+
+
+def _finish_batch_host(
+    host_dir: Path,
+    state: HostState,
+    ports: Dict[int, Dict[str, str]],
+    returncode: Optional[int],
+    status: str = "OK",
+    error: Optional[str] = None,
+) -> None:
+    module = state.modules["nmap"]
+    (host_dir / "nmap" / "ports.txt").write_text("\n".join(str(p) for p in ports), encoding="utf-8")
     write_json(host_dir / "services.json", ports)
-    return ports
+    module.artifacts["open_ports"] = str(len(ports))
+    mark_finished(module, status, returncode, error)
+    state.save(host_dir / "state.json")
@@ -0,0 +1,212 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+_NSE_PLANNER: Optional["NsePlanner"] = None
+
+# Bump when the rule table changes, so cached follow-up results are not reused.
+NSE_RULES_VERSION = 1
+
+# Service names nmap reports when it could not identify the service.
+UNKNOWN_SERVICES = frozenset(["", "unknown", "tcpwrapped"])
+
+
+@dataclass(frozen=True)
+class NseRule:
+    """Scripts of one category and the services they apply to.
+
+    A port matches on its service name (exactly, or as ``<name>-...`` such as
+    ``http-proxy``), a product keyword, an ``ssl`` tunnel, or, only when
+    nmap did not name the service, its port number.
+    """
+
+    category: str
+    scripts: Tuple[str, ...]
+    services: Tuple[str, ...] = ()
+    products: Tuple[str, ...] = ()
+    ports: Tuple[int, ...] = ()
+    ssl: bool = False
+
+    def matches(self, port: int, meta: Dict[str, str]) -> bool:
+        name = (meta.get("name") or "").lower()
+        if self.ssl and (meta.get("tunnel") or "").lower() == "ssl":
+            return True
+        if any(name == service or name.startswith(f"{service}-") for service in self.services):
+            return True
+        product = (meta.get("product") or "").lower()
+        if product and any(keyword in product for keyword in self.products):
+            return True
+        return name in UNKNOWN_SERVICES and port in self.ports
+
+
+# In priority order: a port's scripts are taken rule by rule until its budget is spent.
+NSE_RULES: Tuple[NseRule, ...] = (
+    NseRule(
+        "tls",
+        ("ssl-cert", "ssl-date", "tls-alpn"),
+        services=("https", "ssl", "imaps", "pop3s", "smtps", "ldaps"),
+        ports=(443, 465, 636, 993, 995, 8443),
+        ssl=True,
+    ),
+    NseRule(
+        "http",
+        (
+            "http-title",
+            "http-server-header",
+            "http-methods",
+            "http-robots.txt",
+            "http-generator",
+            "http-auth",
+            "http-ntlm-info",
+            "http-cookie-flags",
+            "http-webdav-scan",
+        ),
+        services=("http", "https"),
+        products=("httpd", "nginx", "iis", "tomcat", "jetty"),
+        ports=(80, 443, 8000, 8080, 8443, 8888),
+    ),
+    NseRule(
+        "ssh",
+        ("ssh-hostkey", "ssh2-enum-algos", "ssh-auth-methods"),
+        services=("ssh",),
+        products=("openssh",),
+        ports=(22,),
+    ),
+    NseRule("ftp", ("ftp-anon", "ftp-syst"), services=("ftp",), products=("ftpd",), ports=(21,)),
+    NseRule("smtp", ("smtp-commands", "smtp-ntlm-info"), services=("smtp", "submission"), ports=(25, 587)),
+    NseRule(
+        "smb",
+        ("smb-os-discovery", "smb-protocols", "smb2-security-mode", "smb2-time", "smb-security-mode"),
+        services=("microsoft-ds", "netbios-ssn"),
+        products=("samba",),
+        ports=(139, 445),
+    ),
+    NseRule("rpc", ("rpcinfo",), services=("rpcbind",), ports=(111,)),
+    NseRule("rdp", ("rdp-ntlm-info", "rdp-enum-encryption"), services=("ms-wbt-server",), ports=(3389,)),
+    NseRule("dns", ("dns-nsid", "dns-recursion"), services=("domain",), ports=(53,)),
+    NseRule("ldap", ("ldap-rootdse",), services=("ldap", "ldaps", "globalcatldap"), ports=(389, 636, 3268)),
+    NseRule("mail", ("imap-capabilities", "imap-ntlm-info"), services=("imap", "imaps"), ports=(143, 993)),
+    NseRule("mail", ("pop3-capabilities", "pop3-ntlm-info"), services=("pop3", "pop3s"), ports=(110, 995)),
+    NseRule("telnet", ("telnet-encryption", "telnet-ntlm-info"), services=("telnet",), ports=(23,)),
+    NseRule("mysql", ("mysql-info",), services=("mysql",), products=("mysql", "mariadb"), ports=(3306,)),
+    NseRule("mssql", ("ms-sql-info", "ms-sql-ntlm-info"), services=("ms-sql-s",), ports=(1433,)),
+    NseRule("vnc", ("vnc-info",), services=("vnc",), ports=(5900,)),
+    NseRule("redis", ("redis-info",), services=("redis",), ports=(6379,)),
+    NseRule("mongodb", ("mongodb-info",), services=("mongodb", "mongod"), ports=(27017,)),
+)
+
+
+@dataclass(frozen=True)
+class NseBudget:
+    max_scripts_per_port: int  # 0: no limit
+    script_timeout: str
+
+
+PROFILE_BUDGETS = {
+    "safe": NseBudget(max_scripts_per_port=6, script_timeout="30s"),
+    "standard": NseBudget(max_scripts_per_port=10, script_timeout="60s"),
+    "aggressive": NseBudget(max_scripts_per_port=0, script_timeout="120s"),
+}
+
+
+@dataclass
+class NseRun:
+    """One follow-up nmap run: ports sharing the same script categories."""
+
+    label: str
+    ports: List[int] = field(default_factory=list)
+    scripts: List[str] = field(default_factory=list)
+    categories: Dict[str, List[str]] = field(default_factory=dict)
+
+    def script_args(self, budget: NseBudget) -> List[str]:
+        if not self.scripts:
+            return []
+        return ["--script", ",".join(self.scripts), "--script-timeout", budget.script_timeout]
+
+    def category_seconds(self, seconds: float) -> Dict[str, float]:
+        """Split the run's ``seconds`` between its categories by their share of its scripts.
+
+        nmap does not time scripts, so a mixed run's time is attributed by
+        script count; a run without scripts (``-sV`` only) is ``none``.
+        """
+        if not self.scripts:
+            return {"none": seconds}
+        total = len(self.scripts)
+        return {category: seconds * len(scripts) / total for category, scripts in self.categories.items()}
+
+
+class NsePlanner:
+    """Chooses NSE scripts for the follow-up from the triage services.
+
+    Each port gets the scripts of the rules it matches, in rule order, up to
+    the profile's scripts-per-port budget. Ports are grouped by the
+    categories they got, and each group is scanned by its own nmap run so its
+    runtime can be attributed; ports matching no rule get ``-sV`` only.
+    ``stats`` accumulates runs, ports and seconds per script category (see
+    :meth:`NseRun.category_seconds`).
+    """
+
+    def __init__(self, profile: str, rules: Tuple[NseRule, ...] = NSE_RULES) -> None:
+        self.profile = profile
+        self.rules = rules
+        self.budget = PROFILE_BUDGETS.get(profile, PROFILE_BUDGETS["safe"])
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def describe(self) -> List[str]:
+        """Identify the script selection, for cache keys of follow-ups run under it."""
+        return ["--nse-rules", f"{NSE_RULES_VERSION}:{self.profile}"]
+
+    def plan_port(self, port: int, meta: Dict[str, str]) -> Dict[str, List[str]]:
+        """Return the scripts selected for one port, by category in rule order."""
+        limit = self.budget.max_scripts_per_port
+        categories: Dict[str, List[str]] = {}
+        scripts: List[str] = []
+        for rule in self.rules:
+            if limit and len(scripts) >= limit:
+                break
+            if not rule.matches(port, meta):
+                continue
+            added = [script for script in rule.scripts if script not in scripts]
+            if limit:
+                added = added[: limit - len(scripts)]
+            if added:
+                categories.setdefault(rule.category, []).extend(added)
+            scripts.extend(added)
+        return categories
+
+    def plan(self, ports: Dict[int, Dict[str, str]]) -> List[NseRun]:
+        runs: Dict[str, NseRun] = {}
+        for port in sorted(ports):
+            categories = self.plan_port(port, ports[port])
+            label = "+".join(categories) or "none"
+            run = runs.setdefault(label, NseRun(label=label))
+            run.ports.append(port)
+            for category, scripts in categories.items():
+                chosen = run.categories.setdefault(category, [])
+                for script in scripts:
+                    if script not in run.scripts:
+                        run.scripts.append(script)
+                        chosen.append(script)
+        return list(runs.values())
+
+    def signature(self, ports: Dict[int, Dict[str, str]]) -> Tuple[Tuple[object, ...], ...]:
+        """The planned runs of ``ports`` in hashable form, to group hosts that scan alike."""
+        return tuple((run.label, tuple(run.ports), tuple(run.scripts)) for run in self.plan(ports))
+
+    def record(self, run: NseRun, seconds: float, hosts: int = 1) -> Dict[str, float]:
+        """Add a finished run to ``stats`` and return its seconds per category."""
+        shares = run.category_seconds(seconds)
+        for category, share in shares.items():
+            entry = self.stats.setdefault(category, {"runs": 0, "ports": 0, "seconds": 0.0})
+            entry["runs"] += 1
+            entry["ports"] += len(run.ports) * hosts
+            entry["seconds"] = round(entry["seconds"] + share, 3)
+        return shares
+
+
+def set_nse_planner(planner: Optional[NsePlanner]) -> None:
+    global _NSE_PLANNER
+    _NSE_PLANNER = planner
+
+
+def get_nse_planner() -> Optional[NsePlanner]:
+    return _NSE_PLANNER
@@ -1,9 +1,25 @@
+import asyncio
+import hashlib
 import json
+import math
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypeVar, Union
+from urllib.parse import urlsplit
 
+from .cache import fetch_when_closed, get_scan_cache
+from .pipeline import Feed
 from .state import HostState, init_module_state, mark_finished, mark_running
-from .utils import format_command, run_command, write_json
+from .techmap import Selection, get_template_selector
+from .utils import format_command, run_command_async, write_json
+
+_NUCLEI_BATCHER: Optional["NucleiBatcher"] = None
+
+T = TypeVar("T")
+
+# Splits a group of URLs by the template selection (extra nuclei arguments) each gets.
+GroupBySelection = Callable[[List[str]], Awaitable[Dict[Tuple[str, ...], List[str]]]]
 
 PROFILE_FLAGS = {
     "safe": ["-severity", "critical,high,medium"],
@@ -12,27 +28,414 @@ PROFILE_FLAGS = {
 }
 
 
-def rollup_findings(results_path: Path) -> Dict[str, List[dict]]:
-    findings: Dict[str, List[dict]] = {"critical": [], "high": [], "medium": [], "low": [], "info": []}
-    if not results_path.exists():
-        return findings
-    for line in results_path.read_text(encoding="utf-8").splitlines():
+NUCLEI_ARTIFACTS = ["nuclei/results.jsonl", "nuclei/findings.json", "nuclei/selection.json"]
+
+# Requests per second of a per-host nuclei run.
+HOST_RATE_LIMIT = 10
+
+# Result fields that name the endpoint a finding belongs to, most specific first.
+ENDPOINT_FIELDS = ("matched-at", "host", "url")
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+SEVERITIES = ("critical", "high", "medium", "low", "info")
+
+
+def _finding_digest(data: dict) -> bytes:
+    """8-byte identity of a finding: the same template matching the same asset and extractor."""
+    key = "\0".join(str(data.get(name) or "") for name in ("template-id", "matched-at", "extractor-name"))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+
+
+class FindingsRollup:
+    """Deduplicating rollup of nuclei results into severity buckets.
+
+    A result is kept once per ``(template-id, matched-at, extractor-name)``;
+    only an 8-byte digest of each kept key is remembered, so memory grows
+    with unique findings rather than with results. With ``path`` set,
+    :meth:`maybe_flush` rewrites it once ``flush_every`` new findings have
+    been added or ``flush_interval_s`` has passed since the last write.
+    """
+
+    def __init__(
+        self, path: Optional[Path] = None, flush_every: int = 100, flush_interval_s: float = 5.0
+    ) -> None:
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval_s = flush_interval_s
+        self.findings: Dict[str, List[dict]] = {name: [] for name in SEVERITIES}
+        self.duplicates = 0
+        self._seen: Set[bytes] = set()
+        self._unflushed = 0
+        self._flushed_at = time.monotonic()
+
+    @property
+    def unique(self) -> int:
+        return len(self._seen)
+
+    def add_line(self, line: str) -> bool:
+        """Add one ``results.jsonl`` line; return whether it was a new finding."""
         try:
             data = json.loads(line)
         except json.JSONDecodeError:
-            continue
-        severity = data.get("severity", "info")
-        findings.setdefault(severity, []).append(
-            {
-                "template_id": data.get("template-id"),
-                "name": data.get("info", {}).get("name"),
-                "matched_at": data.get("matched-at"),
-            }
-        )
-    return findings
+            return False
+        if not isinstance(data, dict):
+            return False
+        digest = _finding_digest(data)
+        if digest in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(digest)
+        finding = {
+            "template_id": data.get("template-id"),
+            "name": data.get("info", {}).get("name"),
+            "matched_at": data.get("matched-at"),
+        }
+        if data.get("extractor-name"):
+            finding["extractor"] = data["extractor-name"]
+        self.findings.setdefault(data.get("severity", "info"), []).append(finding)
+        self._unflushed += 1
+        return True
+
+    def maybe_flush(self) -> None:
+        if not self._unflushed:
+            return
+        due = time.monotonic() - self._flushed_at >= self.flush_interval_s
+        if self._unflushed >= self.flush_every or due:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.path is not None:
+            write_json(self.path, self.findings)
+        self._unflushed = 0
+        self._flushed_at = time.monotonic()
+
+
+def rollup_findings(results_path: Path) -> Dict[str, List[dict]]:
+    rollup = FindingsRollup()
+    if results_path.exists():
+        with results_path.open(encoding="utf-8") as handle:
+            for line in handle:
+                rollup.add_line(line)
+    return rollup.findings
+
+
+async def follow_results(
+    path: Path, process: "asyncio.Future", rollup: FindingsRollup, poll_interval_s: float = 0.5
+) -> None:
+    """Add the lines nuclei appends to ``path`` to ``rollup`` while ``process`` is pending.
+
+    The file is read to the end once ``process`` finishes; a last line
+    without a newline is only taken then, when it can no longer grow.
+    """
+    handle = None
+    partial = ""
+    try:
+        while True:
+            finished = process.done()
+            if handle is None and path.exists():
+                handle = path.open(encoding="utf-8")
+            if handle is not None:
+                lines = (partial + handle.read()).split("\n")
+                partial = lines.pop()
+                for line in lines:
+                    rollup.add_line(line)
+            if finished:
+                if partial:
+                    rollup.add_line(partial)
+                return
+            rollup.maybe_flush()
+            await asyncio.wait({process}, timeout=poll_interval_s)
+    finally:
+        if handle is not None:
+            handle.close()
+
+
+async def _followed(work: Awaitable[T], path: Path, rollup: FindingsRollup) -> T:
+    """Await ``work`` while following ``path`` into ``rollup``."""
+    task = asyncio.ensure_future(work)
+    try:
+        await follow_results(path, task, rollup)
+        return await task
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def _nuclei_command(
+    urls_path: Path,
+    output_path: Path,
+    profile: str,
+    rate_limit: int = HOST_RATE_LIMIT,
+    selection: Tuple[str, ...] = (),
+) -> List[str]:
+    command = [
+        "nuclei",
+        "-l",
+        str(urls_path),
+        "-jsonl",
+        "-o",
+        str(output_path),
+        "-rate-limit",
+        str(rate_limit),
+    ]
+    command.extend(PROFILE_FLAGS.get(profile, PROFILE_FLAGS["safe"]))
+    command.extend(selection)
+    return command
+
+
+def _endpoint(value: str) -> Tuple[str, Optional[int]]:
+    """Return ``(hostname, port)`` of a URL or ``host:port`` value; the port may be unknown."""
+    try:
+        parts = urlsplit(value if "://" in value else f"//{value}")
+        port = parts.port
+    except ValueError:
+        return "", None
+    if port is None:
+        port = _DEFAULT_PORTS.get(parts.scheme)
+    return (parts.hostname or "").lower(), port
+
+
+@dataclass
+class ShardResult:
+    batch_id: str
+    returncode: Optional[int]
+    timed_out: bool
+
+
+class NucleiBatcher:
+    """Engagement-wide nuclei runner that scans the URLs of many hosts in shards.
+
+    URL groups submitted by any host are collected for up to ``linger_s``
+    seconds or until ``batch_size`` URLs are pending, then scanned by one
+    nuclei process, so templates are loaded once per shard rather than once
+    per host. At most ``shards`` processes run at a time and ``rate_limit``
+    requests per second are split evenly between them. Each result line is
+    appended to the results file of the host whose endpoint (host and port)
+    it matched. URLs are only batched with URLs given the same template
+    selection.
+
+    A shard gets ``batch_timeout_s``, or ``timeout_s`` for every
+    :data:`HOST_RATE_LIMIT` requests per second a per-host run would have
+    spent on its URLs when that is 0.
+    """
+
+    def __init__(
+        self,
+        work_dir: Path,
+        profile: str,
+        timeout_s: int,
+        batch_size: int = 256,
+        shards: int = 2,
+        rate_limit: int = 150,
+        linger_s: float = 2.0,
+        batch_timeout_s: int = 0,
+    ) -> None:
+        self.work_dir = work_dir
+        self.profile = profile
+        self.timeout_s = timeout_s
+        self.batch_timeout_s = batch_timeout_s
+        self.batch_size = batch_size
+        self.shards = max(1, shards)
+        self.rate_limit = rate_limit
+        self.linger_s = linger_s
+        self._pending: Dict[Tuple[str, ...], List[Tuple[List[str], Path, "asyncio.Future[ShardResult]"]]] = {}
+        self._pending_urls: Dict[Tuple[str, ...], int] = {}
+        self._timers: Dict[Tuple[str, ...], asyncio.TimerHandle] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._fan_out_lock: Optional[asyncio.Lock] = None
+        self._runs: set = set()
 
+    async def scan(self, urls: List[str], results_path: Path, selection: Tuple[str, ...] = ()) -> ShardResult:
+        """Scan ``urls`` in the next shard and return how that shard ran.
 
-def run_nuclei(host_dir: Path, host: str, urls: List[str], profile: str, timeout_s: int, resume: bool) -> None:
+        Results matching any of ``urls``' endpoints are appended to
+        ``results_path``. ``selection`` are extra nuclei arguments choosing
+        templates (such as ``-tags``).
+        """
+        future: "asyncio.Future[ShardResult]" = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(selection, []).append((list(urls), results_path, future))
+        self._pending_urls[selection] = self._pending_urls.get(selection, 0) + len(urls)
+        if self._pending_urls[selection] >= self.batch_size:
+            self._flush(selection)
+        elif selection not in self._timers:
+            self._timers[selection] = asyncio.get_running_loop().call_later(self.linger_s, self._flush, selection)
+        return await future
+
+    def _flush(self, selection: Tuple[str, ...]) -> None:
+        timer = self._timers.pop(selection, None)
+        if timer is not None:
+            timer.cancel()
+        self._pending_urls.pop(selection, None)
+        batch = self._pending.pop(selection, None)
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._run(batch, selection))
+        self._runs.add(task)
+        task.add_done_callback(self._runs.discard)
+
+    def shard_timeout(self, url_count: int) -> int:
+        if self.batch_timeout_s:
+            return self.batch_timeout_s
+        shard_rate = max(1, self.rate_limit // self.shards)
+        return self.timeout_s * max(1, math.ceil(url_count * HOST_RATE_LIMIT / shard_rate))
+
+    async def _run(
+        self, batch: List[Tuple[List[str], Path, "asyncio.Future[ShardResult]"]], selection: Tuple[str, ...]
+    ) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.shards)
+            self._fan_out_lock = asyncio.Lock()
+        urls = sorted({url for group, _, _ in batch for url in group})
+        batch_id = hashlib.sha1("\n".join([self.profile, *selection, *urls]).encode("utf-8")).hexdigest()[:12]
+        batch_dir = self.work_dir / batch_id
+        futures = [future for _, _, future in batch]
+        try:
+            batch_dir.mkdir(parents=True, exist_ok=True)
+            urls_path = batch_dir / "urls.txt"
+            urls_path.write_text("\n".join(urls) + "\n", encoding="utf-8")
+            output_path = batch_dir / "results.jsonl"
+            if output_path.exists():
+                output_path.unlink()
+            command = _nuclei_command(
+                urls_path,
+                output_path,
+                self.profile,
+                rate_limit=max(1, self.rate_limit // self.shards),
+                selection=selection,
+            )
+            async with self._slots:
+                result = await run_command_async(
+                    command, batch_dir / "stdout.log", batch_dir / "stderr.log", self.shard_timeout(len(urls))
+                )
+            # Routing a large shard's results would stall every other host's work on
+            # the loop; shards fan out one at a time so host files never interleave.
+            async with self._fan_out_lock:
+                await asyncio.get_running_loop().run_in_executor(None, _fan_out, batch, output_path)
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as exc:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        shard = ShardResult(batch_id, result.returncode, result.timed_out)
+        for future in futures:
+            if not future.done():
+                future.set_result(shard)
+
+
+def _fan_out(batch: List[Tuple[List[str], Path, "asyncio.Future[ShardResult]"]], output_path: Path) -> None:
+    """Append each result line in ``output_path`` to the results file of the host it matched."""
+    by_endpoint: Dict[Tuple[str, Optional[int]], Set[Path]] = {}
+    by_hostname: Dict[str, Set[Path]] = {}
+    for group, path, _ in batch:
+        for url in group:
+            hostname, port = _endpoint(url)
+            by_endpoint.setdefault((hostname, port), set()).add(path)
+            by_hostname.setdefault(hostname, set()).add(path)
+    handles = {}
+    try:
+        for _, path, _ in batch:
+            if path not in handles:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                handles[path] = path.open("a", encoding="utf-8")
+        if not output_path.exists():
+            return
+        with output_path.open(encoding="utf-8") as results:
+            for line in results:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                targets = _route(data, by_endpoint, by_hostname)
+                for path in targets:
+                    handles[path].write(line if line.endswith("\n") else line + "\n")
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+
+def _route(
+    data: dict,
+    by_endpoint: Dict[Tuple[str, Optional[int]], Set[Path]],
+    by_hostname: Dict[str, Set[Path]],
+) -> Set[Path]:
+    values = [str(data[name]) for name in ENDPOINT_FIELDS if data.get(name)]
+    for value in values:
+        targets = by_endpoint.get(_endpoint(value))
+        if targets:
+            return targets
+    # Findings on another port of a scanned host (network templates) go to that host.
+    for value in values:
+        targets = by_hostname.get(_endpoint(value)[0])
+        if targets:
+            return targets
+    return set()
+
+
+async def _select_all(batch: List[str]) -> Dict[Tuple[str, ...], List[str]]:
+    return {(): batch}
+
+
+async def _run_batched(
+    batcher: NucleiBatcher,
+    urls: Union[List[str], Feed[str]],
+    results_path: Path,
+    rollup: FindingsRollup,
+    select: GroupBySelection = _select_all,
+) -> Tuple[List[str], List[ShardResult]]:
+    """Submit each group of ``urls`` to ``batcher`` as it arrives; return all URLs and their shards."""
+    feed = urls if isinstance(urls, Feed) else Feed(urls, closed=True)
+    results_path.write_text("", encoding="utf-8")
+    done: List[str] = []
+
+    async def submit() -> List[str]:
+        pending: List[asyncio.Future] = []
+        try:
+            while True:
+                batch = await feed.next_batch(len(done))
+                if not batch:
+                    break
+                done.extend(batch)
+                for selection, group in (await select(batch)).items():
+                    pending.append(asyncio.ensure_future(batcher.scan(group, results_path, selection)))
+            return await asyncio.gather(*pending)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    shards = await _followed(submit(), results_path, rollup)
+    return done, shards
+
+
+async def run_nuclei(
+    host_dir: Path,
+    host: str,
+    urls: Union[List[str], Feed[str]],
+    profile: str,
+    timeout_s: int,
+    resume: bool,
+    services: Optional[Dict[int, Dict[str, str]]] = None,
+) -> None:
+    """Run nuclei against ``urls``.
+
+    With an open ``Feed`` of URLs, nuclei starts on the URLs known so far and
+    is re-run on each group of URLs that arrived meanwhile, appending to the
+    same results file, until the feed is closed. With a :class:`NucleiBatcher`
+    set, each group is handed to it instead and scanned in a shared shard.
+
+    With a :class:`~reconator.techmap.TemplateSelector` set, each URL's
+    templates are chosen from its port's entry in ``services`` and a probe of
+    the URL, URLs with the same selection are scanned together, and the
+    choices are written to ``selection.json``.
+
+    With a cache, a streamed (unbatched) run is looked up once the feed
+    closes and, on a hit, cut short and restored from it.
+    """
     state_path = host_dir / "state.json"
     state = HostState.load(state_path, engagement_name=host, host=host)
     module = init_module_state(state, "nuclei")
@@ -46,26 +449,195 @@ def run_nuclei(host_dir: Path, host: str, urls: List[str], profile: str, timeout
     if resume and module.status == "OK":
         return
 
-    urls_path = host_dir / "web" / "urls.txt"
-    urls_path.write_text("\n".join(urls), encoding="utf-8")
+    feed = urls if isinstance(urls, Feed) and not urls.closed else None
+    if isinstance(urls, Feed) and feed is None:
+        urls = urls.items
+    urls_path = nuclei_dir / "urls.txt"
+    results_path = nuclei_dir / "results.jsonl"
     stdout_path = nuclei_dir / "stdout.log"
     stderr_path = nuclei_dir / "stderr.log"
-    command = [
-        "nuclei",
-        "-l",
-        str(urls_path),
-        "-jsonl",
-        "-o",
-        str(nuclei_dir / "results.jsonl"),
-        "-rate-limit",
-        "10",
-    ]
-    command.extend(PROFILE_FLAGS.get(profile, PROFILE_FLAGS["safe"]))
-    mark_running(module, format_command(command), stdout_path, stderr_path)
+    command = _nuclei_command(urls_path, results_path, profile)
+    selector = get_template_selector()
+    # Selected runs are cached apart from full runs and per mapping version.
+    key_command = command if selector is None else [*command, *selector.describe()]
+
+    cache = get_scan_cache()
+    cache_key = None
+
+    def key_for(items: List[str]) -> str:
+        # The URL list is part of the target: the same host with new web ports is a new scan.
+        return cache.key("nuclei", key_command, "\n".join([host, *sorted(items)]), host_dir)
+
+    if feed is None:
+        urls_path.write_text("\n".join(urls), encoding="utf-8")
+        if cache is not None:
+            cache_key = key_for(urls)
+            if cache.fetch("nuclei", cache_key, host_dir) is not None:
+                module.artifacts["cache"] = "hit"
+                mark_finished(module, "OK", exit_code=0)
+                state.save(state_path)
+                return
+
+    batcher = get_nuclei_batcher()
+    for name in ("cache", "batch", "findings", "duplicates", "targeted_urls", "full_urls"):
+        module.artifacts.pop(name, None)
+    if batcher is not None:
+        shown = "nuclei (batched)"
+    else:
+        shown = format_command(command) if selector is None else "nuclei (targeted)"
+    mark_running(module, shown, stdout_path, stderr_path)
     state.save(state_path)
+    selection_path = nuclei_dir / "selection.json"
+    if selection_path.exists():
+        selection_path.unlink()
 
-    run_command(command, stdout_path, stderr_path, timeout_s)
-    findings = rollup_findings(nuclei_dir / "results.jsonl")
-    write_json(nuclei_dir / "findings.json", findings)
+    selections: List[Selection] = []
+
+    async def select(batch: List[str]) -> Dict[Tuple[str, ...], List[str]]:
+        if selector is None:
+            return {(): batch}
+        chosen, groups = await selector.group(batch, services)
+        selections.extend(chosen)
+        return groups
+
+    rollup = FindingsRollup(nuclei_dir / "findings.json")
+    restored = None
+    timed_out = False
+    returncode: Optional[int] = 0
+    try:
+        if batcher is not None:
+            source = urls if feed is None else feed
+            urls, shards = await _run_batched(batcher, source, results_path, rollup, select)
+            if shards:
+                module.artifacts["batch"] = ",".join(sorted({shard.batch_id for shard in shards}))
+            killed = [shard for shard in shards if shard.timed_out]
+            if killed:
+                timed_out, returncode = True, killed[0].returncode
+        elif feed is None and selector is None:
+            # A results file left by an earlier run must not be followed.
+            if results_path.exists():
+                results_path.unlink()
+            run = run_command_async(command, stdout_path, stderr_path, timeout_s)
+            result = await _followed(run, results_path, rollup)
+            timed_out, returncode = result.timed_out, result.returncode
+        else:
+            rounds = asyncio.ensure_future(
+                _run_rounds(
+                    feed if feed is not None else Feed(urls, closed=True),
+                    nuclei_dir,
+                    results_path,
+                    profile,
+                    stdout_path,
+                    stderr_path,
+                    timeout_s,
+                    rollup,
+                    select,
+                )
+            )
+            try:
+                if feed is not None and cache is not None:
+                    restored = await fetch_when_closed(cache, "nuclei", feed, key_for, host_dir, rounds)
+                if restored is None:
+                    urls, timed_out = await rounds
+            finally:
+                if not rounds.done():
+                    rounds.cancel()
+    finally:
+        # Findings so far survive a timeout or cancellation.
+        if restored is None:
+            rollup.flush()
+    if restored is not None:
+        module.artifacts["cache"] = "hit"
+        mark_finished(module, "OK", exit_code=0)
+        state.save(state_path)
+        return
+    if selector is not None:
+        write_json(
+            selection_path,
+            {
+                "map_version": selector.tech_map.version,
+                "urls": {item.url: item.to_dict() for item in selections},
+            },
+        )
+        targeted = sum(1 for item in selections if not item.full)
+        module.artifacts["targeted_urls"] = str(targeted)
+        module.artifacts["full_urls"] = str(len(selections) - targeted)
+    if feed is not None:
+        urls_path.write_text("\n".join(urls), encoding="utf-8")
+        if cache is not None:
+            cache_key = key_for(urls)
+    module.artifacts["findings"] = str(rollup.unique)
+    module.artifacts["duplicates"] = str(rollup.duplicates)
+    if timed_out:
+        # A killed scan keeps its findings so far but is neither final nor cacheable.
+        mark_finished(module, "TIMEOUT", returncode, "nuclei timeout")
+        state.save(state_path)
+        return
     mark_finished(module, "OK", exit_code=0)
     state.save(state_path)
+    if cache_key is not None:
+        cache.store("nuclei", cache_key, host, host_dir, NUCLEI_ARTIFACTS, {})
+
+
+async def _run_rounds(
+    feed: Feed[str],
+    nuclei_dir: Path,
+    results_path: Path,
+    profile: str,
+    stdout_path: Path,
+    stderr_path: Path,
+    timeout_s: int,
+    rollup: FindingsRollup,
+    select: GroupBySelection = _select_all,
+) -> Tuple[List[str], bool]:
+    """Run nuclei on each batch of ``feed`` as it arrives; return the URLs scanned and whether time ran out.
+
+    The rounds share one ``timeout_s`` budget of nuclei run time (waiting for
+    the feed is not counted), so a host never takes longer than a single
+    run would. Each round's output is appended to the same logs.
+    """
+    round_urls = nuclei_dir / "urls.round.txt"
+    round_results = nuclei_dir / "results.round.jsonl"
+    results_path.write_text("", encoding="utf-8")
+    for path in (stdout_path, stderr_path):
+        path.write_text("", encoding="utf-8")
+    done: List[str] = []
+    remaining = float(timeout_s)
+    try:
+        while True:
+            batch = await feed.next_batch(len(done))
+            if not batch:
+                break
+            if remaining <= 0:
+                return done, True
+            done.extend(batch)
+            for selection, group in (await select(batch)).items():
+                round_urls.write_text("\n".join(group), encoding="utf-8")
+                if round_results.exists():
+                    round_results.unlink()
+                command = _nuclei_command(round_urls, round_results, profile, selection=selection)
+                run = run_command_async(command, stdout_path, stderr_path, remaining, append=True)
+                result = await _followed(run, round_results, rollup)
+                remaining -= result.duration_s
+                if round_results.exists():
+                    with round_results.open(encoding="utf-8") as source, results_path.open(
+                        "a", encoding="utf-8"
+                    ) as handle:
+                        for line in source:
+                            handle.write(line if line.endswith("\n") else line + "\n")
+                if result.timed_out:
+                    return done, True
+    finally:
+        for path in (round_urls, round_results):
+            if path.exists():
+                path.unlink()
+    return done, False
+
+
+def set_nuclei_batcher(batcher: Optional[NucleiBatcher]) -> None:
+    global _NUCLEI_BATCHER
+    _NUCLEI_BATCHER = batcher
+
+
+def get_nuclei_batcher() -> Optional[NucleiBatcher]:
+    return _NUCLEI_BATCHER
@@ -1,25 +1,46 @@
+import asyncio
+import ipaddress
 import json
 import shutil
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from threading import BoundedSemaphore
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Awaitable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+from .baseline import Baseline, set_baseline
+from .cache import ScanCache, set_scan_cache
+from .discovery import HostSweeper, record_down_host
 from .domain_recon import run_domain_recon
-from .ffuf import run_ffuf
-from .nmap import derive_web_urls, run_nmap
-from .nuclei import run_nuclei
-from .parsing import filter_targets_by_scope, parse_targets_file
-from .reporting import build_summary
+from .ffuf import FfufBatcher, discover_wordlist, run_ffuf, set_ffuf_batcher
+from .nmap import derive_web_urls, run_nmap, run_nmap_batch
+from .nse import NsePlanner, set_nse_planner
+from .nuclei import NucleiBatcher, run_nuclei, set_nuclei_batcher
+from .parsing import filter_targets_by_scope, iter_targets_file
+from .pipeline import Feed, Stage, run_pipeline
+from .portscan import ConnectScanner, parse_port_spec, set_port_scanner
+from .reporting import build_delta_report, build_summary
+from .scheduler import ResourceScheduler, ToolPolicy
 from .sslscan import run_sslscan
-from .state import HostState, init_module_state, mark_finished
+from .state import (
+    HostState,
+    StateStore,
+    export_state,
+    init_module_state,
+    mark_finished,
+    set_state_store,
+)
+from .targets import AddressSet, TargetSet
+from .techmap import TemplateSelector, load_tech_map, set_template_selector
+from .tlsprobe import TLSProber, set_tls_prober
 from .utils import (
     ReconatorError,
     ensure_writable_dir,
     normalize_engagement_name,
-    set_subprocess_semaphore,
+    set_resource_scheduler,
     write_json,
 )
+from .webfuzz import ContentDiscovery, set_content_discovery
+
+
+HOST_MODULES = ("nmap", "sslscan", "ffuf", "nuclei")
 
 
 def detect_tools() -> Dict[str, Optional[str]]:
@@ -31,11 +52,129 @@ def detect_tools() -> Dict[str, Optional[str]]:
     return versions
 
 
+def build_scheduler(args) -> ResourceScheduler:
+    """Build the process scheduler; with no tuning flags it behaves like --max-procs slots."""
+    tool_weights = args.tool_weights or {}
+    tool_memory = args.tool_memory_mb or {}
+    tool_limits = args.tool_limits or {}
+    policies = {}
+    for tool in set(tool_weights) | set(tool_memory) | set(tool_limits):
+        policies[tool] = ToolPolicy(
+            weight=tool_weights.get(tool, 1),
+            memory_mb=tool_memory.get(tool, 0),
+            max_concurrent=tool_limits.get(tool),
+        )
+    return ResourceScheduler(
+        cpu_budget=args.cpu_budget or args.max_procs,
+        memory_budget_mb=args.mem_budget_mb,
+        policies=policies,
+        max_load=args.max_load,
+    )
+
+
+def build_port_scanner(args) -> Optional[ConnectScanner]:
+    """Return the connect-scan triage engine, or ``None`` to triage with nmap."""
+    if args.triage_engine != "connect":
+        return None
+    return ConnectScanner(
+        parse_port_spec(args.connect_ports),
+        concurrency=args.connect_concurrency,
+        rate_per_host=args.connect_rate,
+        timeout_s=args.connect_timeout_ms / 1000,
+        max_timeout_s=args.connect_max_timeout_ms / 1000 or None,
+    )
+
+
+def build_sweeper(args, work_dir: Path, tools: Dict[str, Optional[str]]) -> Optional[HostSweeper]:
+    """Return the liveness sweep for ``--discovery``, or ``None`` when it is off."""
+    method = args.discovery
+    if method == "none":
+        return None
+    if not tools.get("nmap") and method in ("ping", "both"):
+        method = "connect"
+    scanner = None
+    if method in ("connect", "both"):
+        scanner = ConnectScanner(
+            parse_port_spec(args.discovery_ports),
+            concurrency=args.connect_concurrency,
+            rate_per_host=args.connect_rate,
+            timeout_s=args.connect_timeout_ms / 1000,
+            max_timeout_s=args.connect_max_timeout_ms / 1000 or None,
+        )
+    return HostSweeper(method, work_dir, args.timeout_nmap, scanner=scanner)
+
+
+def build_content_discovery(args) -> Optional[ContentDiscovery]:
+    """Return the built-in content discovery engine, or ``None`` to fuzz with ffuf."""
+    if args.fuzz_engine != "native":
+        return None
+    return ContentDiscovery(
+        connections_per_url=args.fuzz_connections,
+        concurrency=args.fuzz_concurrency,
+        rate_per_host=args.fuzz_rate_per_host,
+        rate=args.fuzz_rate,
+        pipeline_depth=args.fuzz_pipeline,
+        timeout_s=args.fuzz_timeout,
+    )
+
+
+def build_ffuf_batcher(args, work_dir: Path) -> Optional[FfufBatcher]:
+    """Return the engagement-wide ffuf batcher for ``--ffuf-batch-size``, or ``None``."""
+    if args.ffuf_batch_size <= 1 or args.fuzz_engine != "ffuf":
+        return None
+    try:
+        wordlist = discover_wordlist()
+    except FileNotFoundError:
+        # run_ffuf records the missing wordlist per host.
+        return None
+    return FfufBatcher(
+        work_dir,
+        wordlist,
+        args.timeout_ffuf,
+        batch_size=args.ffuf_batch_size,
+        max_threads=args.ffuf_threads,
+    )
+
+
+def build_nuclei_batcher(args, work_dir: Path) -> Optional[NucleiBatcher]:
+    """Return the engagement-wide nuclei batcher for ``--nuclei-batch-size``, or ``None``."""
+    if args.nuclei_batch_size <= 1:
+        return None
+    return NucleiBatcher(
+        work_dir,
+        args.profile,
+        args.timeout_nuclei,
+        batch_size=args.nuclei_batch_size,
+        shards=args.nuclei_shards,
+        rate_limit=args.nuclei_rate_limit,
+        batch_timeout_s=args.nuclei_batch_timeout,
+    )
+
+
+def build_template_selector(args) -> Optional[TemplateSelector]:
+    """Return the nuclei template selector for ``--nuclei-templates targeted``, or ``None``."""
+    if args.nuclei_templates != "targeted":
+        return None
+    tech_map_path = Path(args.nuclei_tech_map).expanduser().resolve() if args.nuclei_tech_map else None
+    try:
+        tech_map = load_tech_map(tech_map_path)
+    except (OSError, ValueError) as exc:
+        raise ReconatorError(f"Cannot load nuclei tech map {tech_map_path}: {exc}") from exc
+    return TemplateSelector(tech_map)
+
+
 def orchestrate(args) -> None:
     engagement_name = normalize_engagement_name(args.engagement_name)
     output_dir = Path(args.output).expanduser().resolve() / engagement_name
     ensure_writable_dir(output_dir)
 
+    baseline = None
+    if args.baseline:
+        baseline_dir = output_dir.parent / normalize_engagement_name(args.baseline)
+        if baseline_dir == output_dir or not baseline_dir.is_dir():
+            raise ReconatorError(f"Baseline engagement not found: {baseline_dir}")
+        baseline = Baseline(baseline_dir, modules=_downstream_modules(args))
+
     errors: List[dict] = []
     meta_dir = output_dir / "_meta"
     meta_dir.mkdir(parents=True, exist_ok=True)
@@ -49,19 +188,17 @@ def orchestrate(args) -> None:
     if args.input is None and args.fqdn is None:
         raise ReconatorError("--input or --fqdn must be provided")
 
-    targets: List[str] = []
+    input_skipped: List[str] = []
+    seen = AddressSet()
+    input_targets: Iterable[str] = ()
     if args.input:
-        parse_result = parse_targets_file(Path(args.input), args.allow_cidr_expand, args.cidr_cap)
-        targets = parse_result.targets
-        (meta_dir / "targets_resolved.txt").write_text("\n".join(targets), encoding="utf-8")
-        if parse_result.skipped:
-            errors.append(
-                {
-                    "module": "input",
-                    "message": "Skipped invalid targets",
-                    "items": parse_result.skipped,
-                }
-            )
+        input_targets = iter_targets_file(
+            Path(args.input),
+            args.allow_cidr_expand,
+            args.cidr_cap,
+            skipped=input_skipped,
+            seen=seen,
+        )
 
     derived_targets: List[str] = []
     if args.fqdn:
@@ -80,30 +217,40 @@ def orchestrate(args) -> None:
             )
             derived_targets = domain_result.derived_ips
 
-    final_targets = list(targets)
+    scoped: List[str] = []
     if args.scan_derived and derived_targets:
-        scoped = filter_targets_by_scope(derived_targets, args.scope_allow_cidrs)
-        if args.scope_allow_regex:
-            import re
-
-            allow_re = re.compile(args.scope_allow_regex)
-            scoped = [target for target in scoped if allow_re.search(target)]
-        if args.scope_deny_regex:
-            import re
-
-            deny_re = re.compile(args.scope_deny_regex)
-            scoped = [target for target in scoped if not deny_re.search(target)]
-        final_targets.extend(scoped)
-        out_of_scope = sorted(set(derived_targets) - set(scoped))
+        scoped = filter_targets_by_scope(
+            derived_targets,
+            args.scope_allow_cidrs,
+            allow_regex=args.scope_allow_regex,
+            deny_regex=args.scope_deny_regex,
+        )
+        out_of_scope = TargetSet(derived_targets).difference(TargetSet(scoped))
         if out_of_scope:
             errors.append(
                 {
                     "module": "domain_recon",
                     "message": "Derived targets out of scope",
-                    "items": out_of_scope,
+                    "items": list(out_of_scope),
                 }
             )
-    (meta_dir / "final_targets.txt").write_text("\n".join(sorted(set(final_targets))), encoding="utf-8")
+
+    final_targets = TargetSet()
+
+    def stream_final_targets() -> Iterator[str]:
+        # Input targets are yielded as they are parsed so scanning starts before
+        # a large input file has been read in full.
+        resolved = TargetSet()
+        for target in input_targets:
+            resolved.add(target)
+            final_targets.add(target)
+            yield target
+        resolved.write(meta_dir / "targets_resolved.txt")
+        for target in scoped:
+            if seen.add(target):
+                final_targets.add(target)
+                yield target
+        final_targets.write(meta_dir / "final_targets.txt")
 
     run_meta = {
         "engagement_name": engagement_name,
@@ -114,103 +261,304 @@ def orchestrate(args) -> None:
     write_json(meta_dir / "run.json", run_meta)
 
     if args.dry_run:
+        for _ in stream_final_targets():
+            pass
+        _record_skipped_inputs(errors, input_skipped)
         return
 
-    semaphore = BoundedSemaphore(args.max_procs)
-    set_subprocess_semaphore(semaphore)
-
-    def process_host(host: str) -> None:
+    async def process_host(host: str, services: Optional[Dict[int, Dict[str, str]]] = None) -> None:
         host_dir = output_dir / host
         host_dir.mkdir(parents=True, exist_ok=True)
         state_path = host_dir / "state.json"
         state = HostState.load(state_path, engagement_name=engagement_name, host=host)
         state.save(state_path)
 
-        if args.only and args.only != "nmap":
+        if args.only and args.only not in HOST_MODULES:
             return
-        if args.skip_nmap or not tools.get("nmap"):
+        if services is None and (args.skip_nmap or not tools.get("nmap")):
             module = init_module_state(state, "nmap")
             status = "SKIPPED_MISSING_TOOL" if not tools.get("nmap") else "SKIPPED"
             mark_finished(module, status, exit_code=None, error="nmap unavailable")
             state.save(state_path)
             errors.append({"module": "nmap", "host": host, "message": status})
             return
-        services = run_nmap(host_dir, host, args.timeout_nmap, args.resume)
-        if not services:
-            return
 
-        if args.only and args.only != "sslscan":
-            return
-        if not args.skip_ssl and tools.get("sslscan"):
-            run_sslscan(host_dir, host, services, args.timeout_sslscan, args.resume)
-        elif args.skip_ssl:
-            module = init_module_state(state, "sslscan")
-            mark_finished(module, "SKIPPED", exit_code=None, error="sslscan skipped")
-            state.save(state_path)
-            errors.append({"module": "sslscan", "host": host, "message": "SKIPPED"})
-        elif not tools.get("sslscan"):
-            module = init_module_state(state, "sslscan")
-            mark_finished(
-                module, "SKIPPED_MISSING_TOOL", exit_code=None, error="sslscan missing"
-            )
-            state.save(state_path)
-            errors.append(
-                {"module": "sslscan", "host": host, "message": "SKIPPED_MISSING_TOOL"}
-            )
+        def record_skip(name: str, status: str, error: str) -> None:
+            skipped_state = HostState.load(state_path, engagement_name=engagement_name, host=host)
+            module = init_module_state(skipped_state, name)
+            mark_finished(module, status, exit_code=None, error=error)
+            skipped_state.save(state_path)
+            errors.append({"module": name, "host": host, "message": status})
 
-        urls = derive_web_urls(host, services)
+        def module_stage(name: str, requires: Tuple[str, ...], skip: bool, run) -> Stage:
+            async def runner(inputs: Dict[str, object]) -> Optional[Dict[str, object]]:
+                if skip:
+                    record_skip(name, "SKIPPED", f"{name} skipped")
+                elif not tools.get(name) and not builtin_engines.get(name):
+                    record_skip(name, "SKIPPED_MISSING_TOOL", f"{name} missing")
+                else:
+                    await run(inputs)
+                return {}
 
-        if args.only and args.only != "ffuf":
-            return
-        if not args.skip_ffuf and tools.get("ffuf"):
-            run_ffuf(host_dir, host, urls, args.timeout_ffuf, args.resume)
-        elif args.skip_ffuf:
-            module = init_module_state(state, "ffuf")
-            mark_finished(module, "SKIPPED", exit_code=None, error="ffuf skipped")
-            state.save(state_path)
-            errors.append({"module": "ffuf", "host": host, "message": "SKIPPED"})
-        elif not tools.get("ffuf"):
-            module = init_module_state(state, "ffuf")
-            mark_finished(
-                module, "SKIPPED_MISSING_TOOL", exit_code=None, error="ffuf missing"
+            return Stage(name, requires, runner)
+
+        # nmap reports open ports while it runs: each one goes into the
+        # services feed and, for web ports, its URL into the urls feed. The
+        # downstream stages start on the first reported port and follow the
+        # feeds, so TLS and web work begins before the nmap follow-up ends.
+        services_feed: Feed[Tuple[int, Dict[str, str]]] = Feed()
+        urls_feed: Feed[str] = Feed()
+        reported: Dict[int, Dict[str, str]] = {}
+
+        def report_port(port: int, meta: Dict[str, str]) -> None:
+            if port in reported:
+                return
+            if baseline is not None and baseline.is_unchanged(host, port, meta):
+                # Carried over from the baseline after the pipeline instead.
+                return
+            reported[port] = meta
+            services_feed.put((port, meta))
+            for url in derive_web_urls(host, {port: meta}):
+                urls_feed.put(url)
+
+        def close_feeds(found: Dict[int, Dict[str, str]]) -> None:
+            for port, meta in found.items():
+                report_port(port, meta)
+            services_feed.close()
+            urls_feed.close()
+
+        async def nmap_stage(_: Dict[str, object]) -> Optional[Dict[str, object]]:
+            found: Dict[int, Dict[str, str]] = {}
+            try:
+                found = await run_nmap(host_dir, host, args.timeout_nmap, args.resume, on_port=report_port)
+            finally:
+                close_feeds(found)
+            return {"services": found} if found else None
+
+        async def dispatch_stage(_: Dict[str, object]) -> Optional[Dict[str, object]]:
+            if not await services_feed.next_batch(0):
+                return None
+            return {"services_feed": services_feed, "urls_feed": urls_feed}
+
+        stages = [
+            Stage("nmap", (), nmap_stage, provides=("services",)),
+            Stage("dispatch", (), dispatch_stage, provides=("services_feed", "urls_feed")),
+        ]
+        if not args.only or args.only == "sslscan":
+            stages.append(
+                module_stage(
+                    "sslscan",
+                    ("services_feed",),
+                    args.skip_ssl,
+                    lambda inputs: run_sslscan(
+                        host_dir, host, inputs["services_feed"], args.timeout_sslscan, args.resume
+                    ),
+                )
             )
-            state.save(state_path)
-            errors.append(
-                {"module": "ffuf", "host": host, "message": "SKIPPED_MISSING_TOOL"}
+        if not args.only or args.only == "ffuf":
+            stages.append(
+                module_stage(
+                    "ffuf",
+                    ("urls_feed",),
+                    args.skip_ffuf,
+                    lambda inputs: run_ffuf(
+                        host_dir,
+                        host,
+                        inputs["urls_feed"],
+                        args.timeout_ffuf,
+                        args.resume,
+                        calibrate=args.ffuf_calibrate,
+                        max_hits=args.ffuf_max_hits,
+                        hit_sample=args.ffuf_hit_sample,
+                    ),
+                )
             )
+        if not args.only or args.only == "nuclei":
+            stages.append(
+                module_stage(
+                    "nuclei",
+                    ("urls_feed",),
+                    args.skip_nuclei,
+                    lambda inputs: run_nuclei(
+                        host_dir,
+                        host,
+                        inputs["urls_feed"],
+                        args.profile,
+                        args.timeout_nuclei,
+                        args.resume,
+                        services=reported,
+                    ),
+                )
+            )
+        if args.only == "nmap":
+            stages = stages[:1]
+        if services is not None:
+            # nmap already ran for this host as part of a batch.
+            stages = stages[1:]
+            close_feeds(services)
+
+        result = await run_pipeline(stages)
+        for name, exc in result.errors.items():
+            errors.append({"module": name, "host": host, "message": str(exc)})
+        found = result.outputs.get("services", services)
+        if baseline is not None and found and args.only != "nmap":
+            baseline.carry_over(host, host_dir, engagement_name, found, downstream_modules)
+        export_state(state_path)
 
-        if args.only and args.only != "nuclei":
+    async def process_batch(hosts: List[str]) -> None:
+        batch_services = await run_nmap_batch(
+            output_dir,
+            hosts,
+            args.timeout_nmap,
+            args.resume,
+            engagement_name=engagement_name,
+            batch_timeout_s=args.nmap_batch_timeout,
+        )
+        if args.only == "nmap":
             return
-        if not args.skip_nuclei and tools.get("nuclei"):
-            run_nuclei(host_dir, host, urls, args.profile, args.timeout_nuclei, args.resume)
-        elif args.skip_nuclei:
-            module = init_module_state(state, "nuclei")
-            mark_finished(module, "SKIPPED", exit_code=None, error="nuclei skipped")
-            state.save(state_path)
-            errors.append({"module": "nuclei", "host": host, "message": "SKIPPED"})
-        elif not tools.get("nuclei"):
-            module = init_module_state(state, "nuclei")
-            mark_finished(
-                module, "SKIPPED_MISSING_TOOL", exit_code=None, error="nuclei missing"
-            )
-            state.save(state_path)
-            errors.append(
-                {"module": "nuclei", "host": host, "message": "SKIPPED_MISSING_TOOL"}
-            )
+        await asyncio.gather(
+            *(guarded(process_host(host, services), [host]) for host, services in batch_services.items())
+        )
 
-    with ThreadPoolExecutor(max_workers=args.max_hosts) as executor:
-        futures = {executor.submit(process_host, host): host for host in final_targets}
-        for future in as_completed(futures):
+    async def guarded(work: Awaitable[None], hosts: List[str]) -> None:
+        try:
+            await work
+        except Exception as exc:
+            for host in hosts:
+                errors.append({"module": "host", "host": host, "message": str(exc)})
+
+    batch_nmap = (
+        args.nmap_batch_size > 1
+        and not args.skip_nmap
+        and bool(tools.get("nmap"))
+        and (not args.only or args.only in HOST_MODULES)
+    )
+
+    async def run_hosts() -> None:
+        set_resource_scheduler(build_scheduler(args))
+        set_port_scanner(port_scanner)
+        set_nse_planner(nse_planner)
+        set_baseline(baseline)
+        set_tls_prober(tls_prober)
+        set_ffuf_batcher(ffuf_batcher)
+        set_nuclei_batcher(nuclei_batcher)
+        set_template_selector(template_selector)
+        set_content_discovery(content_discovery)
+        # --max-hosts bounds the hosts (or nmap batches) in flight; the target
+        # stream is only consumed as slots free up.
+        slots = asyncio.Semaphore(args.max_hosts)
+        tasks: Set[asyncio.Task] = set()
+
+        async def run_slot(work: Awaitable[None], hosts: List[str]) -> None:
             try:
-                future.result()
-            except Exception as exc:
-                errors.append(
-                    {
-                        "module": "host",
-                        "host": futures[future],
-                        "message": str(exc),
-                    }
-                )
+                await guarded(work, hosts)
+            finally:
+                slots.release()
+
+        hosts = (host for host in stream_final_targets() if host not in completed)
+
+        async def work_items() -> AsyncIterator[Tuple[Awaitable[None], List[str]]]:
+            # With discovery on, targets are swept a chunk at a time and only
+            # live hosts get a worker; dead ones are recorded as down.
+            chunks = [hosts] if sweeper is None else _batched(hosts, args.discovery_chunk_size)
+            for chunk in chunks:
+                if sweeper is not None:
+                    alive = await sweeper.sweep(chunk)
+                    for host in chunk:
+                        if host not in alive:
+                            record_down_host(output_dir / host, host, engagement_name, sweeper.method)
+                    chunk = [host for host in chunk if host in alive]
+                if batch_nmap:
+                    for batch in _batched(chunk, args.nmap_batch_size):
+                        yield process_batch(batch), batch
+                else:
+                    for host in chunk:
+                        yield process_host(host), [host]
+
+        work = work_items()
+        try:
+            while True:
+                await slots.acquire()
+                try:
+                    item = await work.__anext__()
+                except StopAsyncIteration:
+                    slots.release()
+                    break
+                except ReconatorError:
+                    # An oversized CIDR stops dispatch; hosts already started still finish.
+                    if tasks:
+                        await asyncio.gather(*tasks)
+                    raise
+                task = asyncio.ensure_future(run_slot(*item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            set_resource_scheduler(None)
+            set_port_scanner(None)
+            set_nse_planner(None)
+            set_baseline(None)
+            set_tls_prober(None)
+            set_ffuf_batcher(None)
+            set_nuclei_batcher(None)
+            set_template_selector(None)
+            set_content_discovery(None)
+
+    downstream_modules = _downstream_modules(args)
+    port_scanner = build_port_scanner(args)
+    nse_planner = NsePlanner(args.profile) if args.nse_selection == "targeted" else None
+    tls_prober = None
+    if args.tls_engine == "native":
+        tls_prober = TLSProber(
+            concurrency=args.tls_concurrency,
+            timeout_s=args.tls_timeout,
+            endpoint_concurrency=args.tls_endpoint_concurrency,
+        )
+    ffuf_batcher = build_ffuf_batcher(args, meta_dir / "ffuf_batches")
+    nuclei_batcher = build_nuclei_batcher(args, meta_dir / "nuclei_batches")
+    template_selector = build_template_selector(args)
+    content_discovery = build_content_discovery(args)
+    # Modules that can run without their external tool.
+    builtin_engines = {"sslscan": tls_prober is not None, "ffuf": content_discovery is not None}
+    sweeper = None
+    if not args.only or args.only in HOST_MODULES:
+        sweeper = build_sweeper(args, meta_dir / "discovery", tools)
+    store = StateStore(output_dir)
+    completed: Set[str] = set()
+    if args.resume and (not args.only or args.only in HOST_MODULES):
+        # One pass over the manifest decides which hosts need any work at all.
+        completed = store.completed_hosts(downstream_modules, verify=args.resume_verify)
+    set_state_store(store)
+    cache = None
+    if args.cache_dir:
+        cache = ScanCache(
+            Path(args.cache_dir),
+            ttl_s=int(args.cache_ttl_hours * 3600),
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+        )
+        set_scan_cache(cache)
+    try:
+        asyncio.run(run_hosts())
+    finally:
+        set_state_store(None)
+        store.export_pending()
+        store.close()
+        if sweeper is not None:
+            sweeper.write_stats(meta_dir / "discovery.json")
+        if tls_prober is not None:
+            write_json(meta_dir / "tls_probe_stats.json", tls_prober.stats)
+        if content_discovery is not None:
+            write_json(meta_dir / "fuzz_stats.json", content_discovery.stats)
+        if template_selector is not None:
+            write_json(meta_dir / "template_selection.json", template_selector.stats)
+        if nse_planner is not None:
+            write_json(meta_dir / "nse_stats.json", nse_planner.stats)
+        if cache is not None:
+            set_scan_cache(None)
+            cache.write_stats(meta_dir / "cache_stats.json")
+            cache.close()
+    _record_skipped_inputs(errors, input_skipped)
 
     build_summary(
         output_dir,
@@ -222,3 +570,43 @@ def orchestrate(args) -> None:
         final_targets,
         errors,
     )
+    if baseline is not None:
+        build_delta_report(output_dir, baseline.root, final_targets)
+
+
+def _downstream_modules(args) -> List[str]:
+    """Modules after nmap that this run is expected to complete for hosts with open ports."""
+    return [
+        name
+        for name, skipped in (
+            ("sslscan", args.skip_ssl),
+            ("ffuf", args.skip_ffuf),
+            ("nuclei", args.skip_nuclei),
+        )
+        if not skipped and args.only in (None, name)
+    ]
+
+
+def _record_skipped_inputs(errors: List[dict], skipped: List[str]) -> None:
+    if skipped:
+        errors.append(
+            {
+                "module": "input",
+                "message": "Skipped invalid targets",
+                "items": skipped,
+            }
+        )
+
+
+def _batched(targets: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Group targets into batches of ``size``, keeping address families apart."""
+    pending: Dict[int, List[str]] = {4: [], 6: []}
+    for target in targets:
+        batch = pending[ipaddress.ip_address(target).version]
+        batch.append(target)
+        if len(batch) >= size:
+            yield list(batch)
+            batch.clear()
+    for batch in pending.values():
+        if batch:
+            yield batch
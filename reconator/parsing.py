@@ -1,8 +1,10 @@
 import ipaddress
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Iterable, Iterator, List, Optional
 
+from .scope import ScopeIndex
+from .targets import AddressSet, host_count
 from .utils import ReconatorError, dedupe_sorted
 
 
@@ -12,50 +14,80 @@ class TargetParseResult:
     skipped: List[str]
 
 
-def parse_targets_file(
+def iter_targets_file(
     path: Path,
     allow_cidr_expand: bool,
     cidr_cap: int,
-) -> TargetParseResult:
+    skipped: Optional[List[str]] = None,
+    seen: Optional[AddressSet] = None,
+) -> Iterator[str]:
+    """Stream unique targets from ``path`` without materialising the file or CIDRs.
+
+    Lines are read one at a time and CIDRs are expanded lazily. Duplicates are
+    dropped via ``seen``, so overlapping ranges cost no extra memory. Invalid
+    or unexpanded lines are appended to ``skipped``. A CIDR above
+    ``cidr_cap`` raises when the stream reaches it, before it is expanded.
+    """
     if not path.exists():
         raise ReconatorError(f"Targets file does not exist: {path}")
-    targets: List[str] = []
-    skipped: List[str] = []
-    for raw in path.read_text(encoding="utf-8").splitlines():
-        line = raw.strip()
-        if not line or line.startswith("#"):
-            continue
-        try:
+    if skipped is None:
+        skipped = []
+    if seen is None:
+        seen = AddressSet()
+    return _iter_targets(path, allow_cidr_expand, cidr_cap, skipped, seen)
+
+
+def _iter_targets(
+    path: Path,
+    allow_cidr_expand: bool,
+    cidr_cap: int,
+    skipped: List[str],
+    seen: AddressSet,
+) -> Iterator[str]:
+    with path.open(encoding="utf-8") as handle:
+        for raw in handle:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
             if "/" in line:
                 if not allow_cidr_expand:
                     skipped.append(line)
                     continue
-                network = ipaddress.ip_network(line, strict=False)
-                hosts = list(network.hosts())
-                if len(hosts) > cidr_cap:
-                    raise ReconatorError(
-                        f"CIDR {line} exceeds cap of {cidr_cap} hosts"
-                    )
-                targets.extend(str(ip) for ip in hosts)
+                try:
+                    network = ipaddress.ip_network(line, strict=False)
+                except ValueError:
+                    skipped.append(line)
+                    continue
+                if host_count(network) > cidr_cap:
+                    raise ReconatorError(f"CIDR {line} exceeds cap of {cidr_cap} hosts")
+                yield from seen.add_network(network)
             else:
-                ipaddress.ip_address(line)
-                targets.append(line)
-        except ValueError:
-            skipped.append(line)
+                try:
+                    is_new = seen.add(line)
+                except ValueError:
+                    skipped.append(line)
+                    continue
+                if is_new:
+                    yield line
+
+
+def parse_targets_file(
+    path: Path,
+    allow_cidr_expand: bool,
+    cidr_cap: int,
+) -> TargetParseResult:
+    skipped: List[str] = []
+    targets = iter_targets_file(path, allow_cidr_expand, cidr_cap, skipped=skipped)
     return TargetParseResult(targets=dedupe_sorted(targets), skipped=skipped)
 
 
 def filter_targets_by_scope(
     targets: Iterable[str],
     allow_cidrs: Optional[List[str]],
+    allow_regex: Optional[str] = None,
+    deny_regex: Optional[str] = None,
 ) -> List[str]:
     if not allow_cidrs:
         return []
-    networks = [ipaddress.ip_network(item, strict=False) for item in allow_cidrs]
-    filtered = []
-    for target in targets:
-        ip = ipaddress.ip_address(target)
-        if any(ip in network for network in networks):
-            filtered.append(target)
-    return dedupe_sorted(filtered)
-
+    index = ScopeIndex(allow_cidrs, allow_regex=allow_regex, deny_regex=deny_regex)
+    return dedupe_sorted(index.filter(targets))
@@ -0,0 +1,165 @@
+import asyncio
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+
+
+@dataclass
+class Stage:
+    """A unit of per-host work and the named inputs it waits for.
+
+    ``run`` receives the inputs published so far and returns (awaitably) a
+    mapping of the outputs it provides, or ``None`` when it produced nothing for
+    downstream stages (for example a host with no open ports).
+    """
+
+    name: str
+    requires: Tuple[str, ...]
+    run: Callable[[Dict[str, object]], Awaitable[Optional[Dict[str, object]]]]
+    provides: Tuple[str, ...] = ()
+
+
+@dataclass
+class PipelineResult:
+    outputs: Dict[str, object]
+    completed: List[str]
+    not_run: List[str]
+    errors: Dict[str, BaseException]
+
+
+class Feed(Generic[T]):
+    """Append-only stream of items that any number of consumers can follow.
+
+    A producer ``put``s items while it is still running and ``close``s the
+    feed when it is done; each consumer iterating the feed sees every item
+    (including those put before it started) and stops once the feed is closed.
+    """
+
+    def __init__(self, items: Iterable[T] = (), closed: bool = False) -> None:
+        self._items: List[T] = list(items)
+        self._closed = closed
+        self._changed: Optional[asyncio.Event] = None
+
+    @property
+    def items(self) -> List[T]:
+        return list(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, item: T) -> None:
+        if self._closed:
+            raise ValueError("Feed is closed")
+        self._items.append(item)
+        self._notify()
+
+    def close(self) -> None:
+        self._closed = True
+        self._notify()
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    async def next_batch(self, start: int) -> List[T]:
+        """Wait for items past index ``start``; empty only once the feed is closed."""
+        while len(self._items) <= start and not self._closed:
+            if self._changed is None:
+                self._changed = asyncio.Event()
+            await self._changed.wait()
+        return self._items[start:]
+
+    async def wait_closed(self) -> List[T]:
+        """Wait until the feed is closed and return all of its items."""
+        while not self._closed:
+            await self.next_batch(len(self._items))
+        return list(self._items)
+
+    async def __aiter__(self) -> AsyncIterator[T]:
+        seen = 0
+        while True:
+            batch = await self.next_batch(seen)
+            if not batch:
+                return
+            seen += len(batch)
+            for item in batch:
+                yield item
+
+
+async def iterate(source: Union[Iterable[T], Feed[T]]) -> AsyncIterator[T]:
+    """Iterate a plain iterable or a ``Feed`` with the same ``async for`` loop."""
+    if isinstance(source, Feed):
+        async for item in source:
+            yield item
+    else:
+        for item in source:
+            yield item
+
+
+async def run_pipeline(
+    stages: Sequence[Stage],
+    inputs: Optional[Dict[str, object]] = None,
+) -> PipelineResult:
+    """Run ``stages`` as soon as their inputs exist, concurrently where possible.
+
+    Stages whose inputs are never published (because an upstream stage failed
+    or returned nothing) are reported in ``not_run``.
+    """
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Stage names must be unique")
+    outputs: Dict[str, object] = dict(inputs or {})
+    pending = list(stages)
+    completed: List[str] = []
+    errors: Dict[str, BaseException] = {}
+    running: Dict[asyncio.Task, Stage] = {}
+
+    try:
+        while True:
+            for stage in [s for s in pending if all(key in outputs for key in s.requires)]:
+                pending.remove(stage)
+                view = {key: outputs[key] for key in stage.requires}
+                running[asyncio.ensure_future(stage.run(view))] = stage
+            if not running:
+                break
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stage = running.pop(task)
+                exc = task.exception()
+                if exc is not None:
+                    errors[stage.name] = exc
+                    continue
+                completed.append(stage.name)
+                produced = task.result()
+                for key in stage.provides:
+                    if produced and key in produced:
+                        outputs[key] = produced[key]
+    finally:
+        for task in running:
+            task.cancel()
+        # Let cancelled stages finish their own cleanup (killing subprocesses,
+        # saving state) before the caller moves on or the loop closes.
+        await asyncio.gather(*running, return_exceptions=True)
+
+    return PipelineResult(
+        outputs=outputs,
+        completed=completed,
+        not_run=[stage.name for stage in pending],
+        errors=errors,
+    )
@@ -0,0 +1,253 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .utils import ReconatorError
+
+_PORT_SCANNER: Optional["ConnectScanner"] = None
+
+# nmap's 100 most frequently open TCP ports.
+TOP_100_PORTS: Tuple[int, ...] = (
+    7, 9, 13, 21, 22, 23, 25, 26, 37, 53, 79, 80, 81, 88, 106, 110, 111, 113, 119, 135,
+    139, 143, 144, 179, 199, 389, 427, 443, 444, 445, 465, 513, 514, 515, 543, 544, 548,
+    554, 587, 631, 646, 873, 990, 993, 995, 1025, 1026, 1027, 1028, 1029, 1110, 1433,
+    1720, 1723, 1755, 1900, 2000, 2001, 2049, 2121, 2717, 3000, 3128, 3306, 3389, 3986,
+    4899, 5000, 5009, 5051, 5060, 5101, 5190, 5357, 5432, 5631, 5666, 5800, 5900, 6000,
+    6001, 6646, 7070, 8000, 8008, 8009, 8080, 8081, 8443, 8888, 9100, 9999, 10000, 32768,
+    49152, 49153, 49154, 49155, 49156, 49157,
+)
+
+
+def parse_port_spec(spec: str) -> List[int]:
+    """Parse ``top100``, ``all``, single ports and ``a-b`` ranges, comma separated."""
+    ports = set()
+    for item in spec.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        if item == "top100":
+            ports.update(TOP_100_PORTS)
+            continue
+        if item == "all":
+            ports.update(range(1, 65536))
+            continue
+        try:
+            if "-" in item:
+                low, high = (int(part) for part in item.split("-", 1))
+            else:
+                low = high = int(item)
+        except ValueError as exc:
+            raise ReconatorError(f"Invalid port spec item: {item}") from exc
+        if not 1 <= low <= high <= 65535:
+            raise ReconatorError(f"Invalid port range: {item}")
+        ports.update(range(low, high + 1))
+    if not ports:
+        raise ReconatorError(f"Empty port spec: {spec}")
+    return sorted(ports)
+
+
+@dataclass
+class HostScan:
+    host: str
+    open_ports: List[int] = field(default_factory=list)
+    closed: int = 0
+    filtered: int = 0
+    timeout_s: float = 0.0
+
+    @property
+    def responded(self) -> bool:
+        """A refused or accepted connection proves the host is up."""
+        return bool(self.open_ports) or self.closed > 0
+
+
+class _HostTiming:
+    """Per-host round-trip estimate (RFC 6298 style) and connect pacing."""
+
+    def __init__(self, initial_timeout_s: float) -> None:
+        self.timeout_s = initial_timeout_s
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.next_start = 0.0
+
+    def observe(self, rtt: float, min_timeout_s: float, max_timeout_s: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.timeout_s = min(max(self.srtt + 4 * self.rttvar, min_timeout_s), max_timeout_s)
+
+
+class ConnectScanner:
+    """Asyncio TCP connect scanner used for open-port triage.
+
+    ``concurrency`` bounds connection attempts in flight across all hosts and
+    ``rate_per_host`` spaces out attempts to one host (0 disables pacing).
+    Each host's connect timeout starts at ``timeout_s`` and then follows the
+    round-trip times of its answered probes, between ``min_timeout_s`` and
+    ``max_timeout_s`` (four times ``timeout_s`` by default).
+
+    Probes are issued by a fixed pool of ``concurrency`` workers taking
+    ``(host, port)`` pairs round-robin from a window of at most
+    ``host_window`` hosts, so memory stays bounded however many hosts and
+    ports are scanned.
+    """
+
+    engine = "connect"
+
+    def __init__(
+        self,
+        ports: Iterable[int],
+        concurrency: int = 500,
+        rate_per_host: float = 0.0,
+        timeout_s: float = 1.0,
+        min_timeout_s: float = 0.1,
+        max_timeout_s: Optional[float] = None,
+        host_window: int = 256,
+    ) -> None:
+        self.ports = sorted(set(ports))
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.timeout_s = timeout_s
+        self.min_timeout_s = min(min_timeout_s, timeout_s)
+        self.max_timeout_s = max(max_timeout_s or 4 * timeout_s, timeout_s)
+        self.host_window = max(1, host_window)
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def describe(self) -> List[str]:
+        """Return a command-like description, used in state and cache keys."""
+        return ["connect-scan", "-p", _compress_ports(self.ports)]
+
+    async def scan_host(self, host: str, ports: Optional[Iterable[int]] = None) -> HostScan:
+        async for result in self._scan([host], self.ports if ports is None else sorted(set(ports))):
+            return result
+        return HostScan(host=host, timeout_s=self.timeout_s)
+
+    async def scan(self, hosts: Iterable[str]) -> AsyncIterator[HostScan]:
+        """Scan ``hosts`` concurrently, yielding each host's result as it completes."""
+        async for result in self._scan(hosts, self.ports):
+            yield result
+
+    async def _scan(self, hosts: Iterable[str], ports: Sequence[int]) -> AsyncIterator[HostScan]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        if not ports:
+            for host in hosts:
+                yield HostScan(host=host, timeout_s=self.timeout_s)
+            return
+        scans: Dict[str, Tuple[HostScan, _HostTiming, List[int]]] = {}
+        finished: "asyncio.Queue[Optional[HostScan]]" = asyncio.Queue()
+
+        def pairs() -> Iterator[Tuple[str, int]]:
+            host_iter = iter(hosts)
+            window: Deque[Tuple[str, Iterator[int]]] = deque()
+            exhausted = False
+            while True:
+                while not exhausted and len(window) < self.host_window:
+                    host = next(host_iter, None)
+                    if host is None:
+                        exhausted = True
+                    elif host not in scans:
+                        scans[host] = (HostScan(host=host), _HostTiming(self.timeout_s), [len(ports)])
+                        window.append((host, iter(ports)))
+                if not window:
+                    return
+                host, remaining = window.popleft()
+                port = next(remaining, None)
+                if port is None:
+                    continue
+                window.append((host, remaining))
+                yield host, port
+
+        source = pairs()
+
+        async def worker() -> None:
+            # The generator never awaits, so workers can share it.
+            for host, port in source:
+                result, timing, left = scans[host]
+                outcome = await self._probe(host, port, timing)
+                if outcome == "open":
+                    result.open_ports.append(port)
+                elif outcome == "closed":
+                    result.closed += 1
+                else:
+                    result.filtered += 1
+                left[0] -= 1
+                if not left[0]:
+                    del scans[host]
+                    result.open_ports.sort()
+                    result.timeout_s = timing.timeout_s
+                    finished.put_nowait(result)
+
+        async def run_workers() -> None:
+            try:
+                await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            finally:
+                finished.put_nowait(None)
+
+        runner = asyncio.ensure_future(run_workers())
+        try:
+            while True:
+                result = await finished.get()
+                if result is None:
+                    break
+                yield result
+            await runner
+        finally:
+            if not runner.done():
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+
+    async def _probe(self, host: str, port: int, timing: _HostTiming) -> str:
+        if self.rate_per_host > 0:
+            # Pace before taking a slot so waiting on one host never idles a slot.
+            now = time.monotonic()
+            start = max(now, timing.next_start)
+            timing.next_start = start + 1 / self.rate_per_host
+            if start > now:
+                await asyncio.sleep(start - now)
+        async with self._slots:
+            started = time.monotonic()
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timing.timeout_s)
+            except asyncio.TimeoutError:
+                return "filtered"
+            except ConnectionRefusedError:
+                timing.observe(time.monotonic() - started, self.min_timeout_s, self.max_timeout_s)
+                return "closed"
+            except OSError:
+                return "filtered"
+            timing.observe(time.monotonic() - started, self.min_timeout_s, self.max_timeout_s)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return "open"
+
+
+def _compress_ports(ports: List[int]) -> str:
+    ranges: List[str] = []
+    start = previous = None
+    for port in ports:
+        if previous is not None and port == previous + 1:
+            previous = port
+            continue
+        if start is not None:
+            ranges.append(str(start) if start == previous else f"{start}-{previous}")
+        start = previous = port
+    if start is not None:
+        ranges.append(str(start) if start == previous else f"{start}-{previous}")
+    return ",".join(ranges)
+
+
+def set_port_scanner(scanner: Optional[ConnectScanner]) -> None:
+    global _PORT_SCANNER
+    _PORT_SCANNER = scanner
+
+
+def get_port_scanner() -> Optional[ConnectScanner]:
+    return _PORT_SCANNER
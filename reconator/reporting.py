@@ -1,9 +1,40 @@
 import csv
 import json
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Set, Tuple
 
-from .utils import now_iso, write_json
+from .baseline import diff_services, load_services
+from .sslscan import PROTOCOL_ORDER
+from .utils import now_iso, read_json, write_json
+
+LEGACY_PROTOCOLS = ("SSLv2", "SSLv3", "TLSv1", "TLSv1.1")
+
+
+def tls_posture(tls_summary: dict) -> Dict[str, object]:
+    """Aggregate a host's ``tls_summary.json`` endpoints into one posture record."""
+    protocols: Set[str] = set()
+    weak: Set[str] = set()
+    not_after: List[str] = []
+    key_bits: List[int] = []
+    expired = False
+    for endpoint in tls_summary.get("endpoints", {}).values():
+        protocols.update(endpoint.get("protocols", []))
+        weak.update(endpoint.get("weak_ciphers", []))
+        certificate = endpoint.get("certificate") or {}
+        if certificate.get("not_after"):
+            not_after.append(certificate["not_after"])
+        if certificate.get("key_bits"):
+            key_bits.append(certificate["key_bits"])
+        expired = expired or bool(certificate.get("expired"))
+    ordered = [name for name in PROTOCOL_ORDER if name in protocols]
+    return {
+        "protocols": ordered,
+        "legacy_protocols": [name for name in ordered if name in LEGACY_PROTOCOLS],
+        "weak_ciphers": sorted(weak),
+        "cert_not_after": min(not_after) if not_after else None,
+        "cert_expired": expired,
+        "min_key_bits": min(key_bits) if key_bits else None,
+    }
 
 
 def build_summary(
@@ -13,7 +44,7 @@ def build_summary(
     inputs: Dict[str, str],
     scan_derived: bool,
     scope_allow_cidrs: List[str],
-    hosts: List[str],
+    hosts: Iterable[str],
     errors: List[dict],
 ) -> None:
     summary_dir = output_dir / "summary"
@@ -47,11 +78,13 @@ def build_summary(
             findings = json.loads(nuclei_path.read_text(encoding="utf-8"))
 
         ports = sorted(int(p) for p in services.keys())
+        posture = tls_posture(tls_summary)
         summary["hosts"].append(
             {
                 "host": host,
                 "open_ports": ports,
                 "tls_ports": tls_summary.get("ports", []),
+                "tls": posture,
                 "nuclei_findings": {k: len(v) for k, v in findings.items()},
             }
         )
@@ -60,6 +93,10 @@ def build_summary(
                 "host": host,
                 "open_ports": ";".join(str(p) for p in ports),
                 "tls_ports": ";".join(str(p) for p in tls_summary.get("ports", [])),
+                "tls_legacy_protocols": ";".join(posture["legacy_protocols"]),
+                "tls_weak_ciphers": len(posture["weak_ciphers"]),
+                "tls_cert_not_after": posture["cert_not_after"] or "",
+                "tls_min_key_bits": posture["min_key_bits"] or "",
                 "nuclei_critical": len(findings.get("critical", [])),
                 "nuclei_high": len(findings.get("high", [])),
                 "nuclei_medium": len(findings.get("medium", [])),
@@ -78,6 +115,10 @@ def build_summary(
                 "host",
                 "open_ports",
                 "tls_ports",
+                "tls_legacy_protocols",
+                "tls_weak_ciphers",
+                "tls_cert_not_after",
+                "tls_min_key_bits",
                 "nuclei_critical",
                 "nuclei_high",
                 "nuclei_medium",
@@ -102,9 +143,108 @@ def build_summary(
         md_lines.append(
             f"- {entry['host']} | Open Ports: {entry['open_ports']} | TLS Ports: {entry['tls_ports']}"
         )
+    tls_hosts = [entry for entry in summary["hosts"] if entry["tls"]["protocols"]]
+    if tls_hosts:
+        md_lines.append("\n## TLS Posture")
+        for entry in tls_hosts:
+            posture = entry["tls"]
+            expiry = posture["cert_not_after"] or "unknown"
+            if posture["cert_expired"]:
+                expiry += " (expired)"
+            md_lines.append(
+                f"- {entry['host']} | Protocols: {', '.join(posture['protocols'])} | "
+                f"Legacy: {', '.join(posture['legacy_protocols']) or 'none'} | "
+                f"Weak ciphers: {len(posture['weak_ciphers'])} | Cert expires: {expiry} | "
+                f"Min key bits: {posture['min_key_bits'] or 'unknown'}"
+            )
     if errors:
         md_lines.append("\n## Errors/Skips")
         for err in errors:
             md_lines.append(f"- {err.get('module')}: {err.get('message')}")
     (summary_dir / "summary.md").write_text("\n".join(md_lines), encoding="utf-8")
 
+
+def _finding_keys(path: Path) -> Set[Tuple[str, str, str]]:
+    findings = read_json(path) or {}
+    return {
+        (severity, item.get("template_id") or "", item.get("matched_at") or "")
+        for severity, items in findings.items()
+        for item in items
+    }
+
+
+def build_delta_report(output_dir: Path, baseline_dir: Path, hosts: Iterable[str]) -> None:
+    """Write ``summary/delta.json`` and ``summary/delta.md`` against a baseline engagement."""
+    summary_dir = output_dir / "summary"
+    summary_dir.mkdir(parents=True, exist_ok=True)
+    entries = []
+    current_hosts = set()
+    for host in hosts:
+        current_hosts.add(host)
+        before = load_services(baseline_dir / host / "services.json")
+        after = load_services(output_dir / host / "services.json") or {}
+        delta = diff_services(before or {}, after)
+        old_findings = _finding_keys(baseline_dir / host / "nuclei" / "findings.json")
+        new_findings = _finding_keys(output_dir / host / "nuclei" / "findings.json")
+        if before is None and after:
+            status = "new"
+        elif delta.is_unchanged and old_findings == new_findings:
+            status = "unchanged"
+        else:
+            status = "changed"
+        entries.append(
+            {
+                "host": host,
+                "status": status,
+                "added_ports": delta.added,
+                "removed_ports": delta.removed,
+                "changed_ports": {
+                    str(port): {"before": before[port], "after": after[port]} for port in delta.changed
+                },
+                "new_findings": [
+                    {"severity": severity, "template_id": template, "matched_at": matched}
+                    for severity, template, matched in sorted(new_findings - old_findings)
+                ],
+                "resolved_findings": [
+                    {"severity": severity, "template_id": template, "matched_at": matched}
+                    for severity, template, matched in sorted(old_findings - new_findings)
+                ],
+            }
+        )
+
+    dropped: List[str] = []
+    baseline_targets = baseline_dir / "_meta" / "final_targets.txt"
+    if baseline_targets.exists():
+        with baseline_targets.open(encoding="utf-8") as handle:
+            dropped = [line.strip() for line in handle if line.strip() and line.strip() not in current_hosts]
+
+    delta_report = {
+        "baseline": baseline_dir.name,
+        "engagement_name": output_dir.name,
+        "generated_at": now_iso(),
+        "hosts": entries,
+        "dropped_hosts": dropped,
+    }
+    write_json(summary_dir / "delta.json", delta_report)
+
+    counts = {status: sum(1 for entry in entries if entry["status"] == status) for status in ("new", "changed", "unchanged")}
+    md_lines = [
+        f"# Reconator Delta: {output_dir.name} vs {baseline_dir.name}",
+        "",
+        f"Generated: {delta_report['generated_at']}",
+        f"New hosts: {counts['new']} | Changed: {counts['changed']} | Unchanged: {counts['unchanged']} | Dropped: {len(dropped)}",
+        "",
+        "## Changes",
+    ]
+    for entry in entries:
+        if entry["status"] == "unchanged":
+            continue
+        md_lines.append(
+            f"- {entry['host']} ({entry['status']}) | Added: {entry['added_ports']} | "
+            f"Removed: {entry['removed_ports']} | Changed: {sorted(int(p) for p in entry['changed_ports'])} | "
+            f"New findings: {len(entry['new_findings'])} | Resolved: {len(entry['resolved_findings'])}"
+        )
+    if dropped:
+        md_lines.append("\n## Dropped Hosts")
+        md_lines.extend(f"- {host}" for host in dropped)
+    (summary_dir / "delta.md").write_text("\n".join(md_lines), encoding="utf-8")
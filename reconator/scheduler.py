@@ -0,0 +1,145 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class ToolPolicy:
+    """Admission cost of one process of a tool."""
+
+    weight: int = 1
+    memory_mb: int = 0
+    max_concurrent: Optional[int] = None
+
+
+def read_loadavg() -> Optional[float]:
+    """Return the 1-minute load average, or ``None`` when it is unavailable."""
+    path = Path("/proc/loadavg")
+    try:
+        if path.exists():
+            return float(path.read_text(encoding="utf-8").split()[0])
+        return os.getloadavg()[0]
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ResourceScheduler:
+    """Weighted admission control for tool processes.
+
+    Each tool has a CPU weight, an estimated memory cost and an optional pool
+    size. A process is admitted when its pool has room and the global CPU and
+    memory budgets can absorb its cost. With ``max_load`` set, admission also
+    pauses while the system load average is above it. A process is always
+    admitted when nothing else is running, so one oversized tool cannot stall
+    the run.
+
+    Waiters queue in arrival order and are woken only when admitted. The
+    oldest waiter held back by the shared budgets keeps its cost reserved:
+    later waiters are only admitted if they fit alongside it, so a stream of
+    light tools cannot starve a heavy one. A waiter held back only by its own
+    pool reserves nothing.
+    """
+
+    def __init__(
+        self,
+        cpu_budget: int,
+        memory_budget_mb: Optional[int] = None,
+        policies: Optional[Dict[str, ToolPolicy]] = None,
+        max_load: Optional[float] = None,
+        load_reader: Callable[[], Optional[float]] = read_loadavg,
+        poll_interval_s: float = 1.0,
+    ) -> None:
+        self.cpu_budget = cpu_budget
+        self.memory_budget_mb = memory_budget_mb
+        self.policies = dict(policies or {})
+        self.max_load = max_load
+        self._load_reader = load_reader
+        self._poll_interval_s = poll_interval_s
+        self._cpu_in_use = 0
+        self._memory_in_use = 0
+        self._running: Dict[str, int] = {}
+        self._waiters: List[Tuple[str, "asyncio.Future[None]"]] = []
+
+    def policy(self, tool: str) -> ToolPolicy:
+        return self.policies.get(tool, ToolPolicy())
+
+    @property
+    def running(self) -> Dict[str, int]:
+        return {tool: count for tool, count in self._running.items() if count}
+
+    def _pool_full(self, tool: str) -> bool:
+        policy = self.policy(tool)
+        return policy.max_concurrent is not None and self._running.get(tool, 0) >= policy.max_concurrent
+
+    def _admissible(self, tool: str, reserved: Optional[ToolPolicy] = None) -> bool:
+        if not any(self._running.values()):
+            return True
+        if self._pool_full(tool):
+            return False
+        policy = self.policy(tool)
+        reserved = reserved or ToolPolicy(weight=0)
+        if self._cpu_in_use + reserved.weight + policy.weight > self.cpu_budget:
+            return False
+        if (
+            self.memory_budget_mb is not None
+            and self._memory_in_use + reserved.memory_mb + policy.memory_mb > self.memory_budget_mb
+        ):
+            return False
+        if self.max_load is not None:
+            load = self._load_reader()
+            if load is not None and load > self.max_load:
+                return False
+        return True
+
+    def _acquire(self, tool: str) -> None:
+        policy = self.policy(tool)
+        self._cpu_in_use += policy.weight
+        self._memory_in_use += policy.memory_mb
+        self._running[tool] = self._running.get(tool, 0) + 1
+
+    def _release(self, tool: str) -> None:
+        policy = self.policy(tool)
+        self._cpu_in_use -= policy.weight
+        self._memory_in_use -= policy.memory_mb
+        self._running[tool] -= 1
+
+    def _dispatch(self) -> None:
+        """Admit queued waiters in arrival order while they fit."""
+        reserved: Optional[ToolPolicy] = None
+        for waiter in list(self._waiters):
+            tool, admitted = waiter
+            if self._admissible(tool, reserved):
+                self._waiters.remove(waiter)
+                self._acquire(tool)
+                admitted.set_result(None)
+            elif reserved is None and not self._pool_full(tool):
+                reserved = self.policy(tool)
+
+    @asynccontextmanager
+    async def slot(self, tool: str) -> AsyncIterator[None]:
+        waiter = (tool, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._dispatch()
+        admitted = waiter[1]
+        try:
+            while not admitted.done():
+                # Load backpressure has no release event to wait for, so poll.
+                try:
+                    await asyncio.wait_for(asyncio.shield(admitted), self._poll_interval_s)
+                except asyncio.TimeoutError:
+                    self._dispatch()
+        except BaseException:
+            if admitted.done():
+                self._release(tool)
+            else:
+                self._waiters.remove(waiter)
+            self._dispatch()
+            raise
+        try:
+            yield
+        finally:
+            self._release(tool)
+            self._dispatch()
@@ -0,0 +1,57 @@
+import ipaddress
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .targets import IntervalSet
+
+
+class ScopeIndex:
+    """Compiled scope check for derived targets.
+
+    Allowed CIDRs are merged into sorted integer ranges per address family, so a
+    lookup is one bisect regardless of how many CIDRs the scope file holds. The
+    allow/deny regexes are folded into a single compiled matcher.
+    """
+
+    def __init__(
+        self,
+        allow_cidrs: Iterable[str],
+        allow_regex: Optional[str] = None,
+        deny_regex: Optional[str] = None,
+    ) -> None:
+        self._ranges = {4: IntervalSet(), 6: IntervalSet()}
+        ranges: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        for item in allow_cidrs:
+            network = ipaddress.ip_network(item, strict=False)
+            ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+        for version, items in ranges.items():
+            self._ranges[version].update(items)
+        self._matches = _compile_matcher(allow_regex, deny_regex)
+
+    def __contains__(self, target: str) -> bool:
+        ip = ipaddress.ip_address(target)
+        if int(ip) not in self._ranges[ip.version]:
+            return False
+        return self._matches(target)
+
+    def filter(self, targets: Iterable[str]) -> List[str]:
+        return [target for target in targets if target in self]
+
+
+def _compile_matcher(allow_regex: Optional[str], deny_regex: Optional[str]) -> Callable[[str], bool]:
+    # Equivalent to `allow.search(t) and not deny.search(t)`, expressed as
+    # lookaheads anchored at the start so both run in one match call.
+    if not allow_regex and not deny_regex:
+        return lambda target: True
+    allow = f"(?=[\\s\\S]*?(?:{allow_regex}))" if allow_regex else ""
+    deny = f"(?![\\s\\S]*?(?:{deny_regex}))" if deny_regex else ""
+    try:
+        combined = re.compile(deny + allow)
+    except re.error:
+        # Patterns with inline global flags cannot be embedded; search separately.
+        allow_re = re.compile(allow_regex) if allow_regex else None
+        deny_re = re.compile(deny_regex) if deny_regex else None
+        return lambda target: (allow_re is None or bool(allow_re.search(target))) and (
+            deny_re is None or not deny_re.search(target)
+        )
+    return lambda target: combined.match(target) is not None
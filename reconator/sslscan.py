@@ -1,11 +1,24 @@
+import asyncio
+import ssl
+import time
+import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Union
 
+from .cache import ScanCache, fetch_when_closed, get_scan_cache
+from .pipeline import Feed
 from .state import HostState, init_module_state, mark_finished, mark_running
-from .utils import format_command, run_command, write_json
+from .tlsprobe import PROTOCOLS, TLSProber, get_tls_prober, is_weak_cipher
+from .utils import format_command, run_command_async, write_json
 
 TLS_PORTS = {443, 8443, 993, 995, 465, 587, 636, 990, 993, 995, 464, 8443}
 
+# Protocol names as the native prober reports them, oldest first.
+PROTOCOL_ORDER = ("SSLv2", "SSLv3", *(name for name, _ in PROTOCOLS))
+
+# sslscan 2.x classifies every accepted cipher; these classes count as weak.
+_WEAK_STRENGTHS = {"null", "anonymous", "weak"}
+
 
 def tls_ports_from_services(services: Dict[int, Dict[str, str]]) -> List[int]:
     ports = set()
@@ -19,7 +32,23 @@ def tls_ports_from_services(services: Dict[int, Dict[str, str]]) -> List[int]:
     return sorted(ports)
 
 
-def run_sslscan(host_dir: Path, host: str, services: Dict[int, Dict[str, str]], timeout_s: int, resume: bool) -> List[int]:
+async def run_sslscan(
+    host_dir: Path,
+    host: str,
+    services: Union[Dict[int, Dict[str, str]], Feed[Tuple[int, Dict[str, str]]]],
+    timeout_s: int,
+    resume: bool,
+) -> List[int]:
+    """Run sslscan on the TLS ports of ``services``.
+
+    ``services`` may be an open ``Feed`` of ``(port, service)`` pairs, in which
+    case each TLS port is scanned as soon as nmap reports it. Ports are scanned
+    concurrently, one sslscan process each under the resource scheduler, and
+    each port's ``--xml`` report is parsed into ``endpoints`` in
+    ``tls_summary.json``. When a native TLS prober is set it replaces sslscan
+    and fills ``endpoints`` itself. With a cache, a streamed run is looked up
+    once the feed closes and, on a hit, cut short and restored from it.
+    """
     state_path = host_dir / "state.json"
     state = HostState.load(state_path, engagement_name=host, host=host)
     module = init_module_state(state, "sslscan")
@@ -30,21 +59,228 @@ def run_sslscan(host_dir: Path, host: str, services: Dict[int, Dict[str, str]],
         mark_finished(module, "INTERRUPTED", exit_code=module.exit_code, error="Previous run interrupted")
         state.save(state_path)
 
-    ports = tls_ports_from_services(services)
+    feed = services if isinstance(services, Feed) and not services.closed else None
+    if isinstance(services, Feed) and feed is None:
+        services = dict(services.items)
     if resume and module.status == "OK":
-        return ports
+        if feed is not None:
+            services = dict([item async for item in feed])
+        return tls_ports_from_services(services)
+
+    cache = get_scan_cache()
+    prober = get_tls_prober()
+    cache_key = None
+    if feed is None:
+        ports = tls_ports_from_services(services)
+        cache_key = _cache_key(cache, host, host_dir, ports, prober)
+        if cache_key is not None and cache.fetch("sslscan", cache_key, host_dir) is not None:
+            module.artifacts["cache"] = "hit"
+            mark_finished(module, "OK", exit_code=0)
+            state.save(state_path)
+            return ports
 
     stdout_path = tls_dir / "stdout.log"
     stderr_path = tls_dir / "stderr.log"
-    command = ["sslscan", "--no-colour", host]
+    command = ["tls-probe", host] if prober is not None else ["sslscan", "--no-colour", "--xml", host]
+    module.artifacts.pop("cache", None)
     mark_running(module, format_command(command), stdout_path, stderr_path)
     state.save(state_path)
 
-    for port in ports:
-        command = ["sslscan", "--no-colour", f"{host}:{port}"]
-        run_command(command, tls_dir / f"sslscan_{port}.txt", tls_dir / f"sslscan_{port}_err.txt", timeout_s)
+    endpoints: Dict[str, Dict[str, object]] = {}
+    scans: List[asyncio.Task] = []
+
+    async def scan_one(port: int) -> None:
+        if prober is not None:
+            endpoints[str(port)] = await prober.probe(host, port)
+        else:
+            endpoints[str(port)] = await _scan_port(tls_dir, host, port, timeout_s)
+
+    def scan(port: int) -> None:
+        # Admission is left to the prober's pool or the resource scheduler, so
+        # a host takes about as long as its slowest port.
+        scans.append(asyncio.ensure_future(scan_one(port)))
 
-    write_json(tls_dir / "tls_summary.json", {"ports": ports})
+    async def stream() -> None:
+        async for port, meta in feed:
+            if tls_ports_from_services({port: meta}):
+                ports.append(port)
+                scan(port)
+        await asyncio.gather(*scans)
+
+    restored = None
+    work: Optional[asyncio.Future] = None
+    try:
+        if feed is None:
+            for port in ports:
+                scan(port)
+            await asyncio.gather(*scans)
+        else:
+            ports = []
+            work = asyncio.ensure_future(stream())
+            if cache is None:
+                await work
+            else:
+                restored = await fetch_when_closed(
+                    cache,
+                    "sslscan",
+                    feed,
+                    lambda items: _cache_key(cache, host, host_dir, tls_ports_from_services(dict(items)), prober),
+                    host_dir,
+                    work,
+                )
+            ports.sort()
+            # The port list is only known now; store under the same key a later
+            # non-streaming run of this host would look up.
+            cache_key = _cache_key(cache, host, host_dir, ports, prober)
+    finally:
+        for task in scans:
+            task.cancel()
+        if work is not None:
+            work.cancel()
+
+    if restored is not None:
+        ports = tls_ports_from_services(dict(feed.items))
+        module.artifacts["cache"] = "hit"
+        mark_finished(module, "OK", exit_code=0)
+        state.save(state_path)
+        return ports
+
+    summary: Dict[str, object] = {
+        "ports": ports,
+        "endpoints": dict(sorted(endpoints.items(), key=lambda item: int(item[0]))),
+    }
+    write_json(tls_dir / "tls_summary.json", summary)
+    timed_out = [port for port in ports if endpoints.get(str(port), {}).get("timed_out")]
+    if timed_out:
+        # Partial reports are kept but never cached, like a timed-out nmap run.
+        mark_finished(module, "TIMEOUT", None, f"sslscan timeout on ports {','.join(map(str, timed_out))}")
+        state.save(state_path)
+        return ports
     mark_finished(module, "OK", exit_code=0)
     state.save(state_path)
+    if cache_key is not None:
+        artifacts = ["tls/tls_summary.json"]
+        if prober is None:
+            for port in ports:
+                artifacts += [f"tls/sslscan_{port}.txt", f"tls/sslscan_{port}.xml"]
+        cache.store("sslscan", cache_key, host, host_dir, artifacts, {})
     return ports
+
+
+def _cache_key(
+    cache: Optional[ScanCache], host: str, host_dir: Path, ports: List[int], prober: Optional[TLSProber] = None
+) -> Optional[str]:
+    if cache is None:
+        return None
+    targets = [f"{host}:{port}" for port in ports]
+    if prober is not None:
+        # What the native prober can detect depends on the local OpenSSL build.
+        cache_command = ["tls-probe", ssl.OPENSSL_VERSION, *targets]
+    else:
+        cache_command = ["sslscan", "--no-colour", "--xml", *targets]
+    return cache.key("sslscan", cache_command, host, host_dir)
+
+
+async def _scan_port(tls_dir: Path, host: str, port: int, timeout_s: int) -> Dict[str, object]:
+    xml_path = tls_dir / f"sslscan_{port}.xml"
+    if xml_path.exists():
+        xml_path.unlink()
+    command = ["sslscan", "--no-colour", f"--xml={xml_path}", f"{host}:{port}"]
+    result = await run_command_async(
+        command, tls_dir / f"sslscan_{port}.txt", tls_dir / f"sslscan_{port}_err.txt", timeout_s
+    )
+    endpoint = parse_sslscan_xml(xml_path)
+    if result.timed_out:
+        endpoint["timed_out"] = True
+    return endpoint
+
+
+def _protocol_name(value: str) -> str:
+    """Map sslscan's ``TLSv1.0`` spelling onto the names in :data:`PROTOCOL_ORDER`."""
+    return "TLSv1" if value == "TLSv1.0" else value
+
+
+def _cert_time(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return ssl.cert_time_to_seconds(value.strip())
+    except ValueError:
+        return None
+
+
+def _certificate(elem: ET.Element) -> Dict[str, object]:
+    pk = elem.find("pk")
+    not_after = _cert_time(elem.findtext("not-valid-after"))
+    expired = elem.findtext("expired")
+    if expired is None and not_after is not None:
+        expired = str(not_after < time.time()).lower()
+    bits = pk.get("bits") if pk is not None else None
+    return {
+        "subject": (elem.findtext("subject") or "").strip() or None,
+        "issuer": (elem.findtext("issuer") or "").strip() or None,
+        "signature_algorithm": (elem.findtext("signature-algorithm") or "").strip() or None,
+        "key_type": pk.get("type") if pk is not None else None,
+        "key_bits": int(bits) if bits and bits.isdigit() else None,
+        "not_after": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(not_after)) if not_after else None,
+        "expired": expired == "true" if expired is not None else None,
+        "self_signed": (elem.findtext("self-signed") or "").strip() == "true",
+    }
+
+
+def parse_sslscan_xml(path: Path) -> Dict[str, object]:
+    """Parse one sslscan ``--xml`` report into a compact endpoint summary.
+
+    The report is read in a single streaming pass. The result has the keys of
+    a native prober endpoint (``protocols``, ``ciphers``, ``weak_ciphers``,
+    ``negotiated``) plus the leaf ``certificate`` details. Both sslscan 1.x
+    (no ``<protocol>`` elements) and 2.x reports are understood; a truncated
+    report from a killed scan yields what was written before the kill.
+    """
+    protocols = set()
+    ciphers: Dict[str, List[str]] = {}
+    weak = set()
+    preferred: Dict[str, Dict[str, object]] = {}
+    certificate: Optional[Dict[str, object]] = None
+    try:
+        for _, elem in ET.iterparse(str(path), events=("end",)):
+            if elem.tag == "protocol":
+                if elem.get("enabled") == "1":
+                    prefix = "SSLv" if elem.get("type") == "ssl" else "TLSv"
+                    protocols.add(_protocol_name(f"{prefix}{elem.get('version')}"))
+            elif elem.tag == "cipher":
+                version = _protocol_name(elem.get("sslversion") or "")
+                name = elem.get("cipher") or ""
+                bits = elem.get("bits")
+                bits_value = int(bits) if bits and bits.isdigit() else None
+                if not version or not name:
+                    elem.clear()
+                    continue
+                protocols.add(version)
+                ciphers.setdefault(version, []).append(name)
+                if is_weak_cipher(name, bits_value) or elem.get("strength") in _WEAK_STRENGTHS:
+                    weak.add(name)
+                if elem.get("status") == "preferred":
+                    preferred[version] = {"protocol": version, "cipher": name, "bits": bits_value}
+            elif elem.tag == "certificate":
+                if certificate is None and elem.get("type") != "full":
+                    certificate = _certificate(elem)
+            else:
+                continue
+            elem.clear()
+    except (ET.ParseError, OSError):
+        pass
+    ordered = [name for name in PROTOCOL_ORDER if name in protocols]
+    negotiated = next((preferred[name] for name in reversed(ordered) if name in preferred), None)
+    endpoint: Dict[str, object] = {
+        "engine": "sslscan",
+        "reachable": bool(ordered),
+        "protocols": ordered,
+        "ciphers": {name: ciphers[name] for name in ordered if name in ciphers},
+        "weak_ciphers": sorted(weak),
+    }
+    if negotiated is not None:
+        endpoint["negotiated"] = negotiated
+    if certificate is not None:
+        endpoint["certificate"] = certificate
+    return endpoint
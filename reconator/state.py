@@ -1,9 +1,265 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
 from .utils import now_iso, read_json, write_json
 
+_STATE_STORE: Optional["StateStore"] = None
+
+# Artifacts fingerprinted in the resume manifest when a module finishes OK.
+MODULE_ARTIFACTS: Dict[str, Tuple[str, ...]] = {
+    "nmap": ("nmap/triage.xml", "nmap/triage.json", "nmap/followup.xml", "services.json"),
+    "sslscan": ("tls/tls_summary.json",),
+    "ffuf": ("web/ffuf_hits.jsonl", "web/ffuf_hits.json"),
+    "nuclei": ("nuclei/results.jsonl", "nuclei/findings.json"),
+}
+
+
+_SAVE_LOCKS: Dict[str, threading.Lock] = {}
+_SAVE_LOCKS_GUARD = threading.Lock()
+
+
+def _save_lock(path: Path) -> threading.Lock:
+    key = str(path)
+    with _SAVE_LOCKS_GUARD:
+        lock = _SAVE_LOCKS.get(key)
+        if lock is None:
+            lock = _SAVE_LOCKS[key] = threading.Lock()
+        return lock
+
+
+class StateStore:
+    """Engagement-wide module state in SQLite with write-behind.
+
+    Every host's state lives in one WAL-mode database under ``_meta/state.db``
+    and is served from memory. Module transitions are buffered and committed
+    in one transaction once ``flush_threshold`` rows are dirty or
+    ``flush_interval_s`` has passed, so a host costs a handful of page writes
+    instead of a full ``state.json`` rewrite per transition. ``export`` writes
+    the familiar per-host ``state.json`` for backward compatibility.
+
+    The store also keeps the resume manifest: whenever a module leaves the
+    RUNNING state, its status and the size/mtime of its artifacts are recorded
+    so :meth:`completed_hosts` can rule hosts out at startup without touching
+    their directories beyond a few ``stat`` calls. Every later save of an OK
+    module records them again, so artifacts rewritten after completion (a
+    baseline merge) are not mistaken for tampering.
+
+    Hosts are keyed by their directory relative to ``root``.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        db_path: Optional[Path] = None,
+        flush_interval_s: float = 2.0,
+        flush_threshold: int = 500,
+    ) -> None:
+        self.root = root.resolve()
+        self.path = db_path or self.root / "_meta" / "state.db"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval_s = flush_interval_s
+        self.flush_threshold = flush_threshold
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS modules ("
+            " key TEXT NOT NULL, engagement_name TEXT, host TEXT, name TEXT NOT NULL,"
+            " data TEXT NOT NULL, PRIMARY KEY (key, name))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS manifest ("
+            " key TEXT NOT NULL, name TEXT NOT NULL, status TEXT NOT NULL,"
+            " artifacts TEXT NOT NULL, PRIMARY KEY (key, name))"
+        )
+        self._hosts: Dict[str, dict] = {}
+        for key, engagement_name, host, name, data in self._conn.execute(
+            "SELECT key, engagement_name, host, name, data FROM modules"
+        ):
+            entry = self._entry(key, engagement_name, host)
+            entry["modules"][name] = json.loads(data)
+        self._manifest: Dict[Tuple[str, str], Tuple[str, Dict[str, List[int]]]] = {}
+        for key, name, status, artifacts in self._conn.execute(
+            "SELECT key, name, status, artifacts FROM manifest"
+        ):
+            self._manifest[(key, name)] = (status, json.loads(artifacts))
+        self._dirty: Set[Tuple[str, str]] = set()
+        self._unexported: Set[str] = set()
+        self._last_flush = time.monotonic()
+
+    def _entry(self, key: str, engagement_name: str, host: str) -> dict:
+        entry = self._hosts.get(key)
+        if entry is None:
+            entry = {"engagement_name": engagement_name, "host": host, "modules": {}}
+            self._hosts[key] = entry
+        return entry
+
+    def key_for(self, path: Path) -> Optional[str]:
+        try:
+            relative = Path(os.path.abspath(path)).parent.relative_to(self.root)
+        except ValueError:
+            return None
+        return relative.as_posix()
+
+    def keys(self) -> Set[str]:
+        with self._lock:
+            return set(self._hosts)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._hosts.get(key)
+            return copy.deepcopy(entry) if entry is not None else None
+
+    def put(self, key: str, engagement_name: str, host: str, modules: Dict[str, dict]) -> None:
+        with self._lock:
+            entry = self._entry(key, engagement_name, host)
+            entry["engagement_name"] = engagement_name
+            entry["host"] = host
+            for name, values in modules.items():
+                previous = entry["modules"].get(name, {}).get("status")
+                entry["modules"][name] = copy.deepcopy(values)
+                self._dirty.add((key, name))
+                status = values.get("status")
+                if status == "OK" or (status != previous and status not in {"PENDING", "RUNNING"}):
+                    self._record_manifest(key, name, status)
+            self._unexported.add(key)
+            if (
+                len(self._dirty) >= self.flush_threshold
+                or time.monotonic() - self._last_flush >= self.flush_interval_s
+            ):
+                self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._dirty:
+                return
+            rows = []
+            manifest_rows = []
+            for key, name in self._dirty:
+                entry = self._hosts[key]
+                rows.append(
+                    (key, entry["engagement_name"], entry["host"], name, json.dumps(entry["modules"][name]))
+                )
+                if (key, name) in self._manifest:
+                    status, artifacts = self._manifest[(key, name)]
+                    manifest_rows.append((key, name, status, json.dumps(artifacts)))
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO modules (key, engagement_name, host, name, data)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO manifest (key, name, status, artifacts)"
+                    " VALUES (?, ?, ?, ?)",
+                    manifest_rows,
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._dirty.clear()
+
+    def _record_manifest(self, key: str, name: str, status: str) -> None:
+        artifacts: Dict[str, List[int]] = {}
+        if status == "OK":
+            for relative in MODULE_ARTIFACTS.get(name, ()):
+                fingerprint = _fingerprint(self.root / key / relative)
+                if fingerprint is not None:
+                    artifacts[relative] = fingerprint
+        self._manifest[(key, name)] = (status, artifacts)
+
+    def _verified(self, key: str, name: str) -> bool:
+        recorded = self._manifest.get((key, name))
+        if recorded is None or recorded[0] != "OK":
+            return False
+        return all(
+            _fingerprint(self.root / key / relative) == fingerprint
+            for relative, fingerprint in recorded[1].items()
+        )
+
+    def completed_hosts(self, downstream: Sequence[str], verify: bool = True) -> Set[str]:
+        """Return host keys whose nmap and required ``downstream`` modules are done.
+
+        Downstream modules are only required when nmap found open ports. With
+        ``verify``, recorded artifacts must still match their size and mtime;
+        modules that fail the check are reset to PENDING so they run again.
+        """
+        completed: Set[str] = set()
+        with self._lock:
+            for key, entry in self._hosts.items():
+                modules = entry["modules"]
+                nmap = modules.get("nmap")
+                if not nmap or nmap.get("status") != "OK":
+                    continue
+                artifacts = nmap.get("artifacts") or {}
+                needed = ["nmap"]
+                if artifacts.get("host_state") != "down" and artifacts.get("open_ports") != "0":
+                    needed.extend(downstream)
+                if any(modules.get(name, {}).get("status") != "OK" for name in needed):
+                    continue
+                if verify:
+                    stale = [name for name in needed if not self._verified(key, name)]
+                    if stale:
+                        for name in stale:
+                            modules[name]["status"] = "PENDING"
+                            modules[name]["error"] = "Artifacts changed since completion"
+                            self._dirty.add((key, name))
+                        self._unexported.add(key)
+                        continue
+                completed.add(key)
+        return completed
+
+    def export(self, key: str) -> None:
+        """Write ``<root>/<key>/state.json`` from the stored state."""
+        with self._lock:
+            entry = self.get(key)
+            self._unexported.discard(key)
+        if entry is not None:
+            write_json(self.root / key / "state.json", entry)
+
+    def export_pending(self) -> None:
+        with self._lock:
+            pending = sorted(self._unexported)
+        for key in pending:
+            self.export(key)
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+def _fingerprint(path: Path) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def set_state_store(store: Optional[StateStore]) -> None:
+    global _STATE_STORE
+    _STATE_STORE = store
+
+
+def export_state(path: Path) -> None:
+    """Write the stored state for ``path`` back to ``state.json`` when a store is active."""
+    store = _STATE_STORE
+    key = store.key_for(path) if store is not None else None
+    if key is not None:
+        store.export(key)
+
 
 @dataclass
 class ModuleState:
@@ -23,6 +279,7 @@ class HostState:
     engagement_name: str
     host: str
     modules: Dict[str, ModuleState] = field(default_factory=dict)
+    touched: Set[str] = field(default_factory=set, repr=False, compare=False)
 
     def to_dict(self) -> dict:
         return {
@@ -34,11 +291,41 @@ class HostState:
         }
 
     def save(self, path: Path) -> None:
-        write_json(path, self.to_dict())
+        # Modules of one host may run concurrently, each holding its own copy of
+        # the state. Only the modules this copy touched overwrite the stored ones.
+        store = _STATE_STORE
+        key = store.key_for(path) if store is not None else None
+        if key is not None:
+            stored = store.get(key)
+            existing = stored["modules"] if stored else {}
+            store.put(
+                key,
+                self.engagement_name,
+                self.host,
+                {
+                    name: module.__dict__
+                    for name, module in self.modules.items()
+                    if name in self.touched or name not in existing
+                },
+            )
+            return
+        with _save_lock(path):
+            on_disk = read_json(path) or {}
+            data = self.to_dict()
+            modules = dict(on_disk.get("modules", {}))
+            for name, values in data["modules"].items():
+                if name in self.touched or name not in modules:
+                    modules[name] = values
+            data["modules"] = modules
+            write_json(path, data)
 
     @classmethod
     def load(cls, path: Path, engagement_name: str, host: str) -> "HostState":
-        data = read_json(path)
+        store = _STATE_STORE
+        key = store.key_for(path) if store is not None else None
+        data = store.get(key) if key is not None else None
+        if data is None:
+            data = read_json(path)
         if not data:
             return cls(engagement_name=engagement_name, host=host)
         modules = {
@@ -52,6 +339,7 @@ def init_module_state(state: HostState, name: str) -> ModuleState:
     if not module:
         module = ModuleState()
         state.modules[name] = module
+    state.touched.add(name)
     return module
 
 
@@ -68,4 +356,3 @@ def mark_finished(module: ModuleState, status: str, exit_code: Optional[int], er
     module.exit_code = exit_code
     module.finished_at = now_iso()
     module.error = error
-
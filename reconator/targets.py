@@ -0,0 +1,255 @@
+import ipaddress
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def host_range(network: IPNetwork) -> Tuple[int, int]:
+    """Return the inclusive integer bounds of ``network.hosts()``."""
+    first = int(network.network_address)
+    last = int(network.broadcast_address)
+    if network.num_addresses <= 2:
+        return first, last
+    if network.version == 4:
+        return first + 1, last - 1
+    return first + 1, last
+
+
+def host_count(network: IPNetwork) -> int:
+    first, last = host_range(network)
+    return last - first + 1
+
+
+class IntervalSet:
+    """Sorted set of merged, inclusive integer intervals.
+
+    :meth:`add` shifts the arrays when an interval lands between existing
+    ones, so many scattered additions should go through :meth:`update`,
+    which sorts and merges them in one pass.
+    """
+
+    def __init__(self) -> None:
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+
+    def __contains__(self, value: int) -> bool:
+        index = bisect_right(self._starts, value) - 1
+        return index >= 0 and self._ends[index] >= value
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(zip(self._starts, self._ends))
+
+    def count(self) -> int:
+        return sum(end - start + 1 for start, end in self)
+
+    def update(self, ranges: Iterable[Tuple[int, int]]) -> None:
+        """Add many inclusive ``(start, end)`` ranges at once."""
+        starts: List[int] = []
+        ends: List[int] = []
+        for start, end in sorted([*self, *ranges]):
+            if starts and start <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self._starts, self._ends = starts, ends
+
+    def add(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """Add ``[start, end]`` and return the sub-ranges that were not yet covered."""
+        starts, ends = self._starts, self._ends
+        lo = bisect_right(starts, start) - 1
+        if lo < 0 or ends[lo] < start - 1:
+            lo += 1
+        hi = bisect_right(starts, end + 1)
+
+        gaps: List[Tuple[int, int]] = []
+        cursor = start
+        for index in range(lo, hi):
+            if cursor > end:
+                break
+            if starts[index] > cursor:
+                gaps.append((cursor, min(starts[index] - 1, end)))
+            cursor = max(cursor, ends[index] + 1)
+        if cursor <= end:
+            gaps.append((cursor, end))
+
+        if lo < hi:
+            merged_start = min(start, starts[lo])
+            merged_end = max(end, ends[hi - 1])
+        else:
+            merged_start, merged_end = start, end
+        starts[lo:hi] = [merged_start]
+        ends[lo:hi] = [merged_end]
+        return gaps
+
+
+class AddressSet:
+    """Deduplicating IPv4/IPv6 address set.
+
+    Networks are stored as merged integer intervals, so overlapping ranges
+    cost no extra memory. Single addresses go to a hash set instead, so a
+    long list of scattered addresses is added in constant time each.
+    """
+
+    def __init__(self) -> None:
+        self._families: Dict[int, IntervalSet] = {4: IntervalSet(), 6: IntervalSet()}
+        self._singles: Dict[int, Set[int]] = {4: set(), 6: set()}
+
+    def __contains__(self, address: str) -> bool:
+        ip = ipaddress.ip_address(address)
+        value = int(ip)
+        return value in self._singles[ip.version] or value in self._families[ip.version]
+
+    def add(self, address: str) -> bool:
+        """Add one address, returning ``True`` if it was not already present."""
+        ip = ipaddress.ip_address(address)
+        value = int(ip)
+        singles = self._singles[ip.version]
+        if value in singles or value in self._families[ip.version]:
+            return False
+        singles.add(value)
+        return True
+
+    def add_network(self, network: IPNetwork) -> Iterator[str]:
+        """Add the hosts of ``network`` and lazily yield those not already present."""
+        first, last = host_range(network)
+        factory = ipaddress.IPv4Address if network.version == 4 else ipaddress.IPv6Address
+        gaps = self._families[network.version].add(first, last)
+        return _expand(gaps, factory, self._singles[network.version])
+
+
+def _expand(ranges: List[Tuple[int, int]], factory, skip: Set[int]) -> Iterator[str]:
+    for start, end in ranges:
+        for value in range(start, end + 1):
+            if value not in skip:
+                yield str(factory(value))
+
+
+class TargetSet:
+    """Compact set of IP targets stored as packed integers.
+
+    IPv4 addresses live in an ``array('I')`` and IPv6 addresses as 64-bit
+    high/low pairs in an ``array('Q')``. Additions are appended and the arrays
+    are sorted and deduplicated lazily, so iteration is always in numeric order
+    and strings are only created on the way out.
+    """
+
+    def __init__(self, targets: Iterable[str] = ()) -> None:
+        self._v4 = array("I")
+        self._v6 = array("Q")
+        self._is_compact = True
+        self.update(targets)
+
+    def add(self, address: str) -> None:
+        ip = ipaddress.ip_address(address)
+        if ip.version == 4:
+            self._v4.append(int(ip))
+        else:
+            value = int(ip)
+            self._v6.append(value >> 64)
+            self._v6.append(value & _LOW_MASK)
+        self._is_compact = False
+
+    def update(self, targets: Iterable[str]) -> None:
+        for target in targets:
+            self.add(target)
+
+    def __len__(self) -> int:
+        self._compact()
+        return len(self._v4) + len(self._v6) // 2
+
+    def __bool__(self) -> bool:
+        return bool(self._v4) or bool(self._v6)
+
+    def __contains__(self, address: str) -> bool:
+        self._compact()
+        ip = ipaddress.ip_address(address)
+        if ip.version == 4:
+            index = bisect_left(self._v4, int(ip))
+            return index < len(self._v4) and self._v4[index] == int(ip)
+        index = _bisect_pairs(self._v6, int(ip))
+        return index < len(self._v6) // 2 and _pair(self._v6, index) == int(ip)
+
+    def __iter__(self) -> Iterator[str]:
+        self._compact()
+        for value in self._v4:
+            yield str(ipaddress.IPv4Address(value))
+        for index in range(len(self._v6) // 2):
+            yield str(ipaddress.IPv6Address(_pair(self._v6, index)))
+
+    def difference(self, other: "TargetSet") -> "TargetSet":
+        """Return the targets in this set that are not in ``other``."""
+        self._compact()
+        other._compact()
+        result = TargetSet()
+        result._v4 = array("I", _merge_difference(self._v4, other._v4))
+        v6_values = _merge_difference(_pairs(self._v6), _pairs(other._v6))
+        for value in v6_values:
+            result._v6.append(value >> 64)
+            result._v6.append(value & _LOW_MASK)
+        return result
+
+    def write(self, path: Path) -> None:
+        """Stream the sorted targets to ``path``, one per line."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as handle:
+            for target in self:
+                handle.write(target + "\n")
+
+    def _compact(self) -> None:
+        if self._is_compact:
+            return
+        self._v4 = array("I", _unique(sorted(self._v4)))
+        v6 = array("Q")
+        for value in _unique(sorted(_pairs(self._v6))):
+            v6.append(value >> 64)
+            v6.append(value & _LOW_MASK)
+        self._v6 = v6
+        self._is_compact = True
+
+
+_LOW_MASK = (1 << 64) - 1
+
+
+def _pair(values: array, index: int) -> int:
+    return (values[2 * index] << 64) | values[2 * index + 1]
+
+
+def _pairs(values: array) -> Iterator[int]:
+    for index in range(len(values) // 2):
+        yield _pair(values, index)
+
+
+def _bisect_pairs(values: array, target: int) -> int:
+    lo, hi = 0, len(values) // 2
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _pair(values, mid) < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _unique(values: Iterable[int]) -> Iterator[int]:
+    previous = None
+    for value in values:
+        if value != previous:
+            yield value
+            previous = value
+
+
+def _merge_difference(left: Iterable[int], right: Iterable[int]) -> Iterator[int]:
+    right_iter = iter(right)
+    current = next(right_iter, None)
+    for value in left:
+        while current is not None and current < value:
+            current = next(right_iter, None)
+        if current != value:
+            yield value
@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+from urllib.parse import urlsplit
+
+from .httpclient import REQUEST_ERRORS, HttpConnection
+
+_TEMPLATE_SELECTOR: Optional["TemplateSelector"] = None
+
+# Bump when the built-in mapping changes, so cached nuclei results are not reused.
+TECH_MAP_VERSION = 1
+
+# Technology keywords (matched as words in service and HTTP fingerprints) to
+# nuclei template tags and ids. ``base`` is run on every targeted URL.
+DEFAULT_TECH_MAP: Dict[str, object] = {
+    "version": TECH_MAP_VERSION,
+    "base": {"tags": ["tech", "misconfig", "exposure"]},
+    "technologies": {
+        "apache": {"tags": ["apache"]},
+        "nginx": {"tags": ["nginx"]},
+        "iis": {"tags": ["iis", "microsoft"]},
+        "asp.net": {"tags": ["iis", "microsoft"]},
+        "tomcat": {"tags": ["tomcat", "apache"]},
+        "jetty": {"tags": ["jetty"]},
+        "jboss": {"tags": ["jboss"]},
+        "weblogic": {"tags": ["weblogic", "oracle"]},
+        "websphere": {"tags": ["websphere", "ibm"]},
+        "jsessionid": {"tags": ["java"]},
+        "php": {"tags": ["php"]},
+        "phpsessid": {"tags": ["php"]},
+        "phpmyadmin": {"tags": ["phpmyadmin"]},
+        "wordpress": {"tags": ["wordpress"]},
+        "drupal": {"tags": ["drupal"]},
+        "joomla": {"tags": ["joomla"]},
+        "magento": {"tags": ["magento"]},
+        "laravel": {"tags": ["laravel"]},
+        "django": {"tags": ["django"]},
+        "express": {"tags": ["nodejs"]},
+        "spring": {"tags": ["springboot", "spring"]},
+        "jenkins": {"tags": ["jenkins"]},
+        "gitlab": {"tags": ["gitlab"]},
+        "grafana": {"tags": ["grafana"]},
+        "kibana": {"tags": ["kibana"]},
+        "elasticsearch": {"tags": ["elasticsearch"]},
+        "sonarqube": {"tags": ["sonarqube"]},
+        "confluence": {"tags": ["confluence", "atlassian"]},
+        "jira": {"tags": ["jira", "atlassian"]},
+        "coldfusion": {"tags": ["coldfusion", "adobe"]},
+        "outlook": {"tags": ["exchange", "microsoft"]},
+        "exchange": {"tags": ["exchange", "microsoft"]},
+        "sharepoint": {"tags": ["sharepoint", "microsoft"]},
+        "citrix": {"tags": ["citrix"]},
+        "fortinet": {"tags": ["fortinet"]},
+        "fortigate": {"tags": ["fortinet"]},
+        "big-ip": {"tags": ["f5", "bigip"]},
+        "vmware": {"tags": ["vmware"]},
+        "zimbra": {"tags": ["zimbra"]},
+    },
+}
+
+# Response headers that name the server software.
+FINGERPRINT_HEADERS = ("server", "x-powered-by", "x-aspnet-version", "x-generator")
+
+# Body bytes searched for the page title and generator tag.
+_PROBE_BODY_BYTES = 65536
+
+_TITLE = re.compile(rb"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_GENERATOR = re.compile(rb"<meta[^>]+name=[\"']generator[\"'][^>]+content=[\"']([^\"']*)", re.IGNORECASE)
+
+
+class TechMap:
+    """Compiled technology-to-template mapping.
+
+    ``version`` combines the mapping's declared version with a digest of its
+    content, so any edit to a custom map changes it.
+    """
+
+    def __init__(self, data: Dict[str, object]) -> None:
+        canonical = json.dumps(data, sort_keys=True)
+        self.version = f"{data.get('version', 0)}-{hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:8]}"
+        base = data.get("base") or {}
+        self.base_tags: List[str] = list(base.get("tags", []))
+        self.base_ids: List[str] = list(base.get("ids", []))
+        self._entries: List[Tuple[str, Pattern[str], List[str], List[str]]] = [
+            (
+                keyword,
+                re.compile(rf"(?<![a-z0-9]){re.escape(keyword.lower())}(?![a-z0-9])"),
+                list(entry.get("tags", [])),
+                list(entry.get("ids", [])),
+            )
+            for keyword, entry in sorted((data.get("technologies") or {}).items())
+        ]
+
+    def match(self, fingerprints: Iterable[str]) -> List[str]:
+        """Return the technology keywords found in ``fingerprints``."""
+        text = "\n".join(fingerprints).lower()
+        return [keyword for keyword, pattern, _, _ in self._entries if pattern.search(text)]
+
+    def templates(self, technologies: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Return the ``(tags, ids)`` selected by ``technologies``, base entries included."""
+        wanted = set(technologies)
+        tags = set(self.base_tags)
+        ids = set(self.base_ids)
+        for keyword, _, entry_tags, entry_ids in self._entries:
+            if keyword in wanted:
+                tags.update(entry_tags)
+                ids.update(entry_ids)
+        return sorted(tags), sorted(ids)
+
+
+@lru_cache(maxsize=None)
+def load_tech_map(path: Optional[Path] = None) -> TechMap:
+    """Load and compile the mapping in ``path`` (JSON), or the built-in one, once per process."""
+    if path is None:
+        return TechMap(DEFAULT_TECH_MAP)
+    return TechMap(json.loads(path.read_text(encoding="utf-8")))
+
+
+@dataclass
+class Selection:
+    url: str
+    technologies: List[str] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
+    ids: List[str] = field(default_factory=list)
+
+    @property
+    def full(self) -> bool:
+        """No technology was recognised: the URL gets the full template set."""
+        return not self.technologies
+
+    def args(self) -> Tuple[str, ...]:
+        """Extra nuclei arguments for this selection (none for a full run)."""
+        if self.full:
+            return ()
+        args: Tuple[str, ...] = ()
+        if self.tags:
+            args += ("-tags", ",".join(self.tags))
+        if self.ids:
+            args += ("-id", ",".join(self.ids))
+        return args
+
+    def to_dict(self) -> Dict[str, object]:
+        return {**asdict(self), "mode": "full" if self.full else "targeted"}
+
+
+def service_fingerprints(meta: Optional[Dict[str, str]]) -> List[str]:
+    return [value for value in (meta or {}).values() if value]
+
+
+async def probe_fingerprints(url: str, timeout_s: float = 5.0) -> List[str]:
+    """GET ``url`` once and return its server headers, cookie names, title and generator."""
+    try:
+        connection = HttpConnection(url, timeout_s=timeout_s)
+    except ValueError:
+        return []
+    try:
+        response = await connection.get(urlsplit(url).path or "/")
+    except REQUEST_ERRORS:
+        return []
+    finally:
+        await connection.close()
+    found = [response.headers[name] for name in FINGERPRINT_HEADERS if response.headers.get(name)]
+    cookie = response.headers.get("set-cookie", "")
+    if cookie:
+        found.append(cookie.split("=", 1)[0])
+    body = response.body[:_PROBE_BODY_BYTES]
+    for pattern in (_TITLE, _GENERATOR):
+        match = pattern.search(body)
+        if match:
+            found.append(match.group(1).decode("utf-8", errors="replace").strip())
+    return found
+
+
+class TemplateSelector:
+    """Chooses nuclei templates per URL from what is known about its service.
+
+    The port's nmap fingerprint (product, version) and one GET of the URL
+    (server headers, session cookie name, title, generator tag) are matched
+    against ``tech_map``. A URL with a recognised technology gets the base
+    and technology tags and ids; one without keeps the full template set.
+    Selections are cached per URL for the run.
+    """
+
+    def __init__(self, tech_map: TechMap, probe: bool = True, timeout_s: float = 5.0) -> None:
+        self.tech_map = tech_map
+        self.probe = probe
+        self.timeout_s = timeout_s
+        self._selections: Dict[str, "asyncio.Future[Selection]"] = {}
+        self.stats: Dict[str, object] = {
+            "map_version": tech_map.version,
+            "urls": 0,
+            "probes": 0,
+            "targeted": 0,
+            "full": 0,
+        }
+
+    def describe(self) -> List[str]:
+        """Identify the selection policy, for cache keys of selected runs."""
+        return ["-tech-map", self.tech_map.version]
+
+    async def select(self, url: str, meta: Optional[Dict[str, str]] = None) -> Selection:
+        future = self._selections.get(url)
+        if future is None:
+            future = self._selections[url] = asyncio.ensure_future(self._select(url, meta))
+        return await asyncio.shield(future)
+
+    async def _select(self, url: str, meta: Optional[Dict[str, str]]) -> Selection:
+        self.stats["urls"] += 1
+        fingerprints = service_fingerprints(meta)
+        if self.probe:
+            self.stats["probes"] += 1
+            fingerprints.extend(await probe_fingerprints(url, self.timeout_s))
+        technologies = self.tech_map.match(fingerprints)
+        selection = Selection(url=url, technologies=technologies)
+        if technologies:
+            selection.tags, selection.ids = self.tech_map.templates(technologies)
+            self.stats["targeted"] += 1
+        else:
+            self.stats["full"] += 1
+        return selection
+
+    async def group(
+        self, urls: List[str], services: Optional[Dict[int, Dict[str, str]]] = None
+    ) -> Tuple[List[Selection], Dict[Tuple[str, ...], List[str]]]:
+        """Select templates for ``urls`` and group them by the nuclei arguments selected."""
+        selections = await asyncio.gather(
+            *(self.select(url, (services or {}).get(urlsplit(url).port or 0)) for url in urls)
+        )
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+        for selection in selections:
+            groups.setdefault(selection.args(), []).append(selection.url)
+        return list(selections), groups
+
+
+def set_template_selector(selector: Optional[TemplateSelector]) -> None:
+    global _TEMPLATE_SELECTOR
+    _TEMPLATE_SELECTOR = selector
+
+
+def get_template_selector() -> Optional[TemplateSelector]:
+    return _TEMPLATE_SELECTOR
@@ -0,0 +1,193 @@
+import asyncio
+import hashlib
+import ssl
+import warnings
+from typing import Dict, List, Optional, Tuple
+
+_TLS_PROBER: Optional["TLSProber"] = None
+
+PROTOCOLS: Tuple[Tuple[str, ssl.TLSVersion], ...] = (
+    ("TLSv1", ssl.TLSVersion.TLSv1),
+    ("TLSv1.1", ssl.TLSVersion.TLSv1_1),
+    ("TLSv1.2", ssl.TLSVersion.TLSv1_2),
+    ("TLSv1.3", ssl.TLSVersion.TLSv1_3),
+)
+
+# Negotiated protocol, cipher and peer chain of a completed handshake; None if it failed.
+Handshake = Optional[Tuple[str, Tuple[str, str, int], List[bytes]]]
+
+_WEAK_MARKERS = ("NULL", "EXP", "RC4", "DES", "MD5", "ADH", "AECDH", "anon", "PSK", "SEED", "IDEA")
+
+
+def is_weak_cipher(name: str, bits: Optional[int] = None) -> bool:
+    """Flag export, null, anonymous, RC4/DES-family and sub-128-bit ciphers."""
+    if bits is not None and bits < 128:
+        return True
+    return any(marker in name for marker in _WEAK_MARKERS)
+
+
+def _context(version: Optional[ssl.TLSVersion] = None, cipher: Optional[str] = None) -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    # Probing has to see what the server offers, including what we would refuse.
+    context.set_ciphers(f"{cipher or 'ALL:COMPLEMENTOFALL'}:@SECLEVEL=0")
+    if version is not None:
+        with warnings.catch_warnings():
+            # Pinning TLS 1.0/1.1 is deprecated, but detecting them is the point.
+            warnings.simplefilter("ignore", DeprecationWarning)
+            context.minimum_version = version
+            context.maximum_version = version
+    return context
+
+
+def _candidate_ciphers(protocol: str) -> List[str]:
+    """Client cipher suites that can be negotiated at ``protocol`` (TLS 1.2 and older)."""
+    legacy = protocol in ("TLSv1", "TLSv1.1")
+    return [
+        item["name"]
+        for item in _context().get_ciphers()
+        if item["protocol"] != "TLSv1.3" and (not legacy or item["protocol"] in ("TLSv1", "SSLv3"))
+    ]
+
+
+class TLSProber:
+    """Concurrent TLS endpoint prober on the stdlib ``ssl`` module.
+
+    One default handshake per endpoint records the negotiated protocol and
+    cipher and the certificate chain fingerprint. Supported protocol versions
+    and (for TLS 1.2 and older) accepted cipher suites are then enumerated
+    with one handshake each. Endpoints presenting the same chain with the same
+    negotiated parameters, typically pool members behind one load balancer,
+    reuse the first endpoint's enumeration instead of repeating it.
+
+    ``concurrency`` bounds handshakes in flight across all endpoints and
+    ``endpoint_concurrency`` those against any one endpoint, so enumerating
+    a few dozen suites does not look like a connection flood. What can
+    be detected is limited by the local OpenSSL build: versions or suites it
+    cannot offer are reported as unsupported.
+    """
+
+    def __init__(self, concurrency: int = 100, timeout_s: float = 5.0, endpoint_concurrency: int = 8) -> None:
+        self.concurrency = concurrency
+        self.endpoint_concurrency = max(1, endpoint_concurrency)
+        self.timeout_s = timeout_s
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._profiles: Dict[Tuple[str, str, str], "asyncio.Future[Dict[str, object]]"] = {}
+        self.stats: Dict[str, int] = {"endpoints": 0, "deduplicated": 0, "handshakes": 0}
+
+    async def _handshake(self, host: str, port: int, context: ssl.SSLContext) -> Handshake:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        async with self._slots:
+            self.stats["handshakes"] += 1
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port, ssl=context), self.timeout_s
+                )
+            except (OSError, asyncio.TimeoutError, ssl.SSLError):
+                return None
+            try:
+                ssl_object = writer.get_extra_info("ssl_object")
+                return ssl_object.version(), ssl_object.cipher(), _peer_chain(ssl_object)
+            finally:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except (OSError, ssl.SSLError):
+                    pass
+
+    async def probe(self, host: str, port: int) -> Dict[str, object]:
+        self.stats["endpoints"] += 1
+        first = await self._handshake(host, port, _context())
+        if first is None:
+            return {"engine": "native", "reachable": False}
+        version, (cipher, _, bits), chain = first
+        result: Dict[str, object] = {
+            "engine": "native",
+            "reachable": True,
+            "negotiated": {"protocol": version, "cipher": cipher, "bits": bits},
+            "certificate_sha256": hashlib.sha256(chain[0]).hexdigest() if chain else None,
+            "chain_sha256": hashlib.sha256(b"".join(chain)).hexdigest() if chain else None,
+            "chain_length": len(chain),
+        }
+        # Without a certificate there is nothing tying endpoints together.
+        key = (str(result["chain_sha256"] or f"{host}:{port}"), version, cipher)
+        profile = self._profiles.get(key)
+        if profile is not None:
+            self.stats["deduplicated"] += 1
+            shared = await asyncio.shield(profile)
+            result.update({**shared, "deduplicated_from": shared["endpoint"]})
+        else:
+            profile = self._profiles[key] = asyncio.get_running_loop().create_future()
+            try:
+                shared = await self._enumerate(host, port)
+            except BaseException as exc:
+                del self._profiles[key]
+                profile.set_exception(exc)
+                # Waiters re-raise it; mark it retrieved so the loop does not warn.
+                profile.exception()
+                raise
+            profile.set_result(shared)
+            result.update(shared)
+        del result["endpoint"]
+        return result
+
+    async def _enumerate(self, host: str, port: int) -> Dict[str, object]:
+        endpoint = asyncio.Semaphore(self.endpoint_concurrency)
+
+        async def handshake(context: ssl.SSLContext) -> Handshake:
+            async with endpoint:
+                return await self._handshake(host, port, context)
+
+        protocols = []
+        checks = await asyncio.gather(*(handshake(_context(version)) for _, version in PROTOCOLS))
+        for (name, _), outcome in zip(PROTOCOLS, checks):
+            if outcome is not None:
+                protocols.append(name)
+        ciphers: Dict[str, List[str]] = {}
+        for name, version in PROTOCOLS:
+            if name not in protocols:
+                continue
+            if name == "TLSv1.3":
+                # The stdlib cannot restrict TLS 1.3 suites; record the negotiated one.
+                outcome = checks[[item[0] for item in PROTOCOLS].index(name)]
+                ciphers[name] = [outcome[1][0]]
+                continue
+            candidates = _candidate_ciphers(name)
+            accepted = await asyncio.gather(*(handshake(_context(version, cipher)) for cipher in candidates))
+            ciphers[name] = [cipher for cipher, outcome in zip(candidates, accepted) if outcome is not None]
+        weak = sorted({cipher for names in ciphers.values() for cipher in names if is_weak_cipher(cipher)})
+        return {
+            "endpoint": f"{host}:{port}",
+            "protocols": protocols,
+            "ciphers": ciphers,
+            "weak_ciphers": weak,
+        }
+
+
+def _peer_chain(ssl_object: ssl.SSLObject) -> List[bytes]:
+    """Return the DER certificates the peer sent, leaf first."""
+    getter = getattr(ssl_object, "get_unverified_chain", None)
+    if getter is None:
+        getter = getattr(getattr(ssl_object, "_sslobj", None), "get_unverified_chain", None)
+    if getter is not None:
+        try:
+            chain = getter() or []
+            return [
+                cert if isinstance(cert, bytes) else cert.public_bytes(ssl._ssl.ENCODING_DER)
+                for cert in chain
+            ]
+        except (AttributeError, ValueError, ssl.SSLError):
+            pass
+    leaf = ssl_object.getpeercert(binary_form=True)
+    return [leaf] if leaf else []
+
+
+def set_tls_prober(prober: Optional[TLSProber]) -> None:
+    global _TLS_PROBER
+    _TLS_PROBER = prober
+
+
+def get_tls_prober() -> Optional[TLSProber]:
+    return _TLS_PROBER
@@ -1,10 +1,13 @@
+import asyncio
 import json
 import os
 import random
 import re
 import shlex
+import signal
 import string
 import subprocess
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
@@ -28,12 +31,12 @@ class ReconatorError(Exception):
     pass
 
 
-_SUBPROCESS_SEMAPHORE = None
+_RESOURCE_SCHEDULER = None
 
 
-def set_subprocess_semaphore(semaphore) -> None:
-    global _SUBPROCESS_SEMAPHORE
-    _SUBPROCESS_SEMAPHORE = semaphore
+def set_resource_scheduler(scheduler) -> None:
+    global _RESOURCE_SCHEDULER
+    _RESOURCE_SCHEDULER = scheduler
 
 
 def normalize_engagement_name(name: str) -> str:
@@ -57,7 +60,10 @@ def ensure_writable_dir(path: Path) -> None:
 
 def write_json(path: Path, data: object) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    # Write-then-rename so concurrent readers never see a partial file.
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, path)
 
 
 def read_json(path: Path) -> Optional[dict]:
@@ -82,43 +88,107 @@ def run_command(
     timeout_s: Optional[int],
     env: Optional[dict] = None,
 ) -> CommandResult:
+    """Run ``command`` to completion in the calling thread.
+
+    Only domain recon uses this, one command at a time and before any host
+    work starts, so it needs no admission control. Everything that runs
+    concurrently goes through :func:`run_command_async` and the resource
+    scheduler.
+    """
     stdout_path.parent.mkdir(parents=True, exist_ok=True)
     stderr_path.parent.mkdir(parents=True, exist_ok=True)
     start = time.time()
     timed_out = False
     returncode: Optional[int] = None
-    semaphore = _SUBPROCESS_SEMAPHORE
-    if semaphore is None:
-        semaphore_cm = _nullcontext()
+    with stdout_path.open("w", encoding="utf-8") as stdout, stderr_path.open("w", encoding="utf-8") as stderr:
+        try:
+            proc = subprocess.run(
+                safe_command(command),
+                stdout=stdout,
+                stderr=stderr,
+                timeout=timeout_s,
+                env=env,
+                check=False,
+            )
+            returncode = proc.returncode
+        except subprocess.TimeoutExpired:
+            timed_out = True
+    duration = time.time() - start
+    return CommandResult(
+        command=list(command),
+        returncode=returncode,
+        duration_s=duration,
+        stdout_path=stdout_path,
+        stderr_path=stderr_path,
+        timed_out=timed_out,
+    )
+
+
+async def run_command_async(
+    command: Sequence[str],
+    stdout_path: Path,
+    stderr_path: Path,
+    timeout_s: Optional[float],
+    env: Optional[dict] = None,
+    append: bool = False,
+) -> CommandResult:
+    """Asyncio counterpart of :func:`run_command`.
+
+    The child runs in its own session so a timeout or task cancellation kills
+    the whole process group, including anything the tool spawned. When a
+    resource scheduler is set, the process waits for admission under the
+    policy of its tool (the executable's basename). With ``append`` the logs
+    are appended to rather than overwritten.
+    """
+    stdout_path.parent.mkdir(parents=True, exist_ok=True)
+    stderr_path.parent.mkdir(parents=True, exist_ok=True)
+    scheduler = _RESOURCE_SCHEDULER
+    if scheduler is None:
+        slot = _async_nullcontext()
     else:
-        semaphore_cm = semaphore
-    with semaphore_cm:
-        with stdout_path.open("w", encoding="utf-8") as stdout, stderr_path.open(
-            "w", encoding="utf-8"
+        slot = scheduler.slot(Path(str(command[0])).name)
+    async with slot:
+        start = time.time()
+        timed_out = False
+        returncode: Optional[int] = None
+        mode = "a" if append else "w"
+        with stdout_path.open(mode, encoding="utf-8") as stdout, stderr_path.open(
+            mode, encoding="utf-8"
         ) as stderr:
+            proc = await asyncio.create_subprocess_exec(
+                *safe_command(command),
+                stdout=stdout,
+                stderr=stderr,
+                env=env,
+                start_new_session=True,
+            )
             try:
-                proc = subprocess.run(
-                    safe_command(command),
-                    stdout=stdout,
-                    stderr=stderr,
-                    timeout=timeout_s,
-                    env=env,
-                    check=False,
-                )
-                returncode = proc.returncode
-            except subprocess.TimeoutExpired:
+                returncode = await asyncio.wait_for(proc.wait(), timeout_s)
+            except asyncio.TimeoutError:
                 timed_out = True
-    duration = time.time() - start
+                _kill_process_group(proc.pid)
+                await proc.wait()
+            except asyncio.CancelledError:
+                _kill_process_group(proc.pid)
+                await asyncio.shield(proc.wait())
+                raise
     return CommandResult(
         command=list(command),
         returncode=returncode,
-        duration_s=duration,
+        duration_s=time.time() - start,
         stdout_path=stdout_path,
         stderr_path=stderr_path,
         timed_out=timed_out,
     )
 
 
+def _kill_process_group(pid: int) -> None:
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
 def format_command(command: Sequence[str]) -> str:
     return " ".join(shlex.quote(str(item)) for item in command)
 
@@ -131,9 +201,9 @@ def now_iso() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
-class _nullcontext:
-    def __enter__(self):
+class _async_nullcontext:
+    async def __aenter__(self):
         return None
 
-    def __exit__(self, exc_type, exc, exc_tb):
+    async def __aexit__(self, exc_type, exc, exc_tb):
         return False
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+from urllib.parse import quote, urlsplit
+
+from .calibration import FFUF_MATCH_CODES
+from .httpclient import REQUEST_ERRORS, HttpConnection, HttpResponse
+
+_CONTENT_DISCOVERY: Optional["ContentDiscovery"] = None
+
+# A connection gives up on its URL after this many failed exchanges in a row.
+MAX_CONSECUTIVE_ERRORS = 5
+
+# Characters sent unescaped in a fuzzed path; everything else is percent-encoded.
+_SAFE_PATH_CHARS = "/:@!$&'()*+,;=-._~%?"
+
+
+class _Pacer:
+    """Spaces out requests to at most ``rate`` per second (0 disables pacing)."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.next_start = 0.0
+
+    async def wait(self, count: int = 1) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        start = max(now, self.next_start)
+        self.next_start = start + count * self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def _load_words(path: Path) -> List[str]:
+    words = []
+    with path.open(encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            word = line.strip()
+            if word and not word.startswith("#"):
+                words.append(word)
+    return words
+
+
+class ContentDiscovery:
+    """Asyncio content discovery engine, a built-in alternative to ffuf.
+
+    Each URL is fuzzed by ``connections_per_url`` keep-alive connections
+    taking words from a shared queue. Once a connection has shown that the
+    server keeps it open, up to ``pipeline_depth`` GETs are pipelined on it;
+    if a pipelined exchange fails, the URL falls back to one request at a
+    time. ``concurrency`` bounds exchanges in flight across all
+    URLs, ``rate_per_host`` and ``rate`` cap requests per second per host and
+    overall.
+
+    Matches use ffuf's default status codes and calibration filters, and are
+    streamed to a JSONL file as ffuf-style result items.
+    """
+
+    engine = "native"
+
+    def __init__(
+        self,
+        connections_per_url: int = 5,
+        concurrency: int = 200,
+        rate_per_host: float = 0.0,
+        rate: float = 0.0,
+        pipeline_depth: int = 4,
+        timeout_s: float = 10.0,
+    ) -> None:
+        self.connections_per_url = connections_per_url
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.pipeline_depth = max(1, pipeline_depth)
+        self.timeout_s = timeout_s
+        self._global_pacer = _Pacer(rate)
+        self._host_pacers: Dict[str, _Pacer] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._wordlists: Dict[Path, List[str]] = {}
+        self.stats: Dict[str, int] = {
+            "urls": 0,
+            "requests": 0,
+            "connections": 0,
+            "pipelined_exchanges": 0,
+            "pipeline_fallbacks": 0,
+            "errors": 0,
+            "matches": 0,
+        }
+
+    def _words(self, wordlist: Path) -> List[str]:
+        words = self._wordlists.get(wordlist)
+        if words is None:
+            words = self._wordlists[wordlist] = _load_words(wordlist)
+        return words
+
+    async def fuzz(
+        self,
+        url: str,
+        wordlist: Path,
+        output_path: Path,
+        filters: Optional[Dict[str, int]] = None,
+    ) -> int:
+        """Fuzz ``url`` (ending in ``/``) with ``wordlist`` and return the number of matches.
+
+        Matches are written to ``output_path`` as they are found, so a caller
+        that cancels the run (for example on a timeout) keeps what was found.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        self.stats["urls"] += 1
+        queue: Deque[str] = deque(self._words(wordlist))
+        prefix = urlsplit(url).path or "/"
+        host_pacer = self._host_pacers.setdefault(urlsplit(url).hostname or url, _Pacer(self.rate_per_host))
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        matches = 0
+        with output_path.open("w", encoding="utf-8", buffering=1) as handle:
+
+            def record(word: str, response: HttpResponse) -> None:
+                nonlocal matches
+                if response.status not in FFUF_MATCH_CODES:
+                    return
+                item = {
+                    "input": {"FUZZ": word},
+                    "url": f"{url}{word}",
+                    "status": response.status,
+                    "length": response.size,
+                    "words": response.words,
+                    "lines": response.lines,
+                    "redirectlocation": response.headers.get("location", ""),
+                }
+                if any(item.get(name) == value for name, value in (filters or {}).items()):
+                    return
+                matches += 1
+                self.stats["matches"] += 1
+                handle.write(json.dumps(item, sort_keys=True) + "\n")
+
+            pipelining = True
+
+            async def worker() -> None:
+                nonlocal pipelining
+                connection = HttpConnection(url, timeout_s=self.timeout_s)
+                errors = 0
+                try:
+                    while queue and errors < MAX_CONSECUTIVE_ERRORS:
+                        # Pipeline only on a connection the server has already kept open.
+                        depth = self.pipeline_depth if pipelining and connection.is_open else 1
+                        batch = [queue.popleft() for _ in range(min(depth, len(queue)))]
+                        await host_pacer.wait(len(batch))
+                        await self._global_pacer.wait(len(batch))
+                        reused = connection.is_open
+                        async with self._slots:
+                            connects = connection.connects
+                            try:
+                                responses = await connection.get_many(
+                                    [prefix + quote(word, safe=_SAFE_PATH_CHARS) for word in batch]
+                                )
+                            except REQUEST_ERRORS:
+                                responses = None
+                            self.stats["connections"] += connection.connects - connects
+                        if responses is None:
+                            self.stats["errors"] += 1
+                            errors += 1
+                            if len(batch) > 1:
+                                # Not safe to pipeline on this server; resend one at a time.
+                                self.stats["pipeline_fallbacks"] += 1
+                                pipelining = False
+                                queue.extendleft(reversed(batch))
+                            elif reused:
+                                # The server may have dropped an idle keep-alive connection.
+                                queue.appendleft(batch[0])
+                            continue
+                        errors = 0
+                        self.stats["requests"] += len(responses)
+                        if len(batch) > 1:
+                            self.stats["pipelined_exchanges"] += 1
+                        for word, response in zip(batch, responses):
+                            record(word, response)
+                        # Words sent after the server closed the connection go back in the queue.
+                        queue.extendleft(reversed(batch[len(responses):]))
+                finally:
+                    await connection.close()
+
+            await asyncio.gather(*(worker() for _ in range(self.connections_per_url)))
+        return matches
+
+
+def set_content_discovery(engine: Optional[ContentDiscovery]) -> None:
+    global _CONTENT_DISCOVERY
+    _CONTENT_DISCOVERY = engine
+
+
+def get_content_discovery() -> Optional[ContentDiscovery]:
+    return _CONTENT_DISCOVERY
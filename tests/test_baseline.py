@@ -0,0 +1,100 @@
+import json
+from pathlib import Path
+
+from reconator.baseline import Baseline, diff_services
+from reconator.state import HostState, StateStore, init_module_state, mark_finished, set_state_store
+from reconator.utils import write_json
+
+
+def _baseline_host(root: Path, host: str) -> None:
+    host_dir = root / host
+    write_json(
+        host_dir / "services.json",
+        {"80": {"name": "http", "product": "nginx", "version": "1.18"}, "443": {"name": "https", "tunnel": "ssl"}},
+    )
+    write_json(
+        host_dir / "state.json",
+        {"modules": {name: {"status": "OK"} for name in ("nmap", "sslscan", "nuclei")}},
+    )
+    write_json(host_dir / "tls" / "tls_summary.json", {"ports": [443]})
+    (host_dir / "tls" / "sslscan_443.txt").write_text("report", encoding="utf-8")
+    (host_dir / "nuclei").mkdir()
+    (host_dir / "nuclei" / "results.jsonl").write_text(
+        "\n".join(
+            json.dumps({"template-id": f"t{port}", "severity": "info", "matched-at": f"http://{host}:{port}/"})
+            for port in (80, 443)
+        ),
+        encoding="utf-8",
+    )
+
+
+def test_diff_services() -> None:
+    before = {22: {"name": "ssh"}, 80: {"name": "http", "version": "1.18"}, 443: {"name": "https"}}
+    after = {80: {"name": "http", "version": "1.25"}, 443: {"name": "https"}, 8080: {"name": "http"}}
+    delta = diff_services(before, after)
+    assert (delta.added, delta.removed, delta.changed, delta.unchanged) == ([8080], [22], [80], [443])
+    assert not delta.is_unchanged
+
+
+def test_baseline_carries_over_unchanged_services(tmp_path: Path) -> None:
+    host = "192.0.2.1"
+    _baseline_host(tmp_path / "old", host)
+    baseline = Baseline(tmp_path / "old", modules=["sslscan", "nuclei"])
+    assert baseline.is_unchanged(host, 443, {"name": "https", "tunnel": "ssl"})
+    assert not baseline.is_unchanged(host, 443, {})
+    assert baseline.unverified(host, {443: {}, 80: {"name": "http"}, 8443: {}}) == [443]
+    assert not baseline.is_unchanged(host, 80, {"name": "http", "product": "nginx", "version": "1.25"})
+
+    host_dir = tmp_path / "new" / host
+    host_dir.mkdir(parents=True)
+    services = {80: {"name": "http", "product": "nginx", "version": "1.25"}, 443: {"name": "https", "tunnel": "ssl"}}
+    baseline.carry_over(host, host_dir, "new", services, ["sslscan", "nuclei"])
+    baseline.carry_over(host, host_dir, "new", services, ["sslscan", "nuclei"])
+
+    assert json.loads((host_dir / "tls" / "tls_summary.json").read_text(encoding="utf-8")) == {"ports": [443]}
+    assert (host_dir / "tls" / "sslscan_443.txt").read_text(encoding="utf-8") == "report"
+    lines = (host_dir / "nuclei" / "results.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["template-id"] for line in lines] == ["t443"]
+    state = json.loads((host_dir / "state.json").read_text(encoding="utf-8"))
+    assert state["modules"]["nuclei"]["status"] == "OK"
+    assert state["modules"]["nuclei"]["artifacts"]["baseline"] == "old"
+
+
+def test_incomplete_baseline_host_is_rescanned(tmp_path: Path) -> None:
+    host = "192.0.2.1"
+    _baseline_host(tmp_path / "old", host)
+    baseline = Baseline(tmp_path / "old", modules=["sslscan", "ffuf"])
+    assert baseline.services(host) is None
+    assert not baseline.is_unchanged(host, 443, {"name": "https", "tunnel": "ssl"})
+
+
+def test_merged_artifacts_still_verify_on_resume(tmp_path: Path) -> None:
+    host = "192.0.2.1"
+    _baseline_host(tmp_path / "old", host)
+    baseline = Baseline(tmp_path / "old", modules=["sslscan", "nuclei"])
+    root = tmp_path / "new"
+    host_dir = root / host
+    (host_dir / "nuclei").mkdir(parents=True)
+    write_json(host_dir / "services.json", {"80": {"name": "http"}, "443": {"name": "https", "tunnel": "ssl"}})
+    (host_dir / "nuclei" / "results.jsonl").write_text(
+        json.dumps({"template-id": "fresh", "severity": "info", "matched-at": f"http://{host}:80/"}) + "\n",
+        encoding="utf-8",
+    )
+    store = StateStore(root)
+    set_state_store(store)
+    state_path = host_dir / "state.json"
+    try:
+        state = HostState.load(state_path, engagement_name="new", host=host)
+        for name in ("nmap", "sslscan", "nuclei"):
+            mark_finished(init_module_state(state, name), "OK", exit_code=0)
+        state.modules["nmap"].artifacts["open_ports"] = "2"
+        state.save(state_path)
+        services = {80: {"name": "http", "version": "1.25"}, 443: {"name": "https", "tunnel": "ssl"}}
+        baseline.carry_over(host, host_dir, "new", services, ["sslscan", "nuclei"])
+    finally:
+        set_state_store(None)
+
+    lines = (host_dir / "nuclei" / "results.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["template-id"] for line in lines] == ["fresh", "t443"]
+    assert store.completed_hosts(["sslscan", "nuclei"]) == {host}
+    store.close()
@@ -0,0 +1,52 @@
+import time
+from pathlib import Path
+
+from reconator.cache import ScanCache
+
+
+def _artifact(host_dir: Path, relative: str, content: str) -> None:
+    path = host_dir / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+def test_scan_cache_round_trip_across_engagements(tmp_path: Path) -> None:
+    cache = ScanCache(tmp_path / "cache", ttl_s=3600, max_bytes=1 << 20)
+    first = tmp_path / "eng_a" / "192.0.2.1"
+    second = tmp_path / "eng_b" / "192.0.2.1"
+    _artifact(first, "services.json", '{"80": {}}')
+
+    key_a = cache.key("nmap", ["nmap", "-oX", str(first / "nmap" / "triage.xml"), "192.0.2.1"], "192.0.2.1", first)
+    key_b = cache.key("nmap", ["nmap", "-oX", str(second / "nmap" / "triage.xml"), "192.0.2.1"], "192.0.2.1", second)
+    assert key_a == key_b
+    assert cache.fetch("nmap", key_a, second) is None
+
+    cache.store("nmap", key_a, "192.0.2.1", first, ["services.json", "nmap/followup.xml"], {"module_artifacts": {"open_ports": "1"}})
+    meta = cache.fetch("nmap", key_b, second)
+    assert meta["module_artifacts"] == {"open_ports": "1"}
+    assert (second / "services.json").read_text(encoding="utf-8") == '{"80": {}}'
+    assert cache.stats["nmap"] == {"hits": 1, "misses": 1, "stores": 1}
+    cache.close()
+
+
+def test_scan_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ScanCache(tmp_path / "cache", ttl_s=3600, max_bytes=150)
+    host_dir = tmp_path / "host"
+    _artifact(host_dir, "findings.json", "x" * 100)
+    cache.store("nuclei", "a" * 64, "h1", host_dir, ["findings.json"], {})
+    time.sleep(0.01)
+    cache.store("nuclei", "b" * 64, "h2", host_dir, ["findings.json"], {})
+    assert cache.fetch("nuclei", "a" * 64, tmp_path / "out") is None
+    assert cache.fetch("nuclei", "b" * 64, tmp_path / "out") is not None
+    cache.close()
+
+
+def test_scan_cache_counts_an_entry_removed_behind_the_index_as_a_miss(tmp_path: Path) -> None:
+    cache = ScanCache(tmp_path / "cache", ttl_s=3600, max_bytes=1 << 20)
+    host_dir = tmp_path / "host"
+    _artifact(host_dir, "findings.json", "[]")
+    cache.store("nuclei", "c" * 64, "h1", host_dir, ["findings.json"], {})
+    (cache.root / "objects" / "cc" / ("c" * 64) / "findings.json").unlink()
+    assert cache.fetch("nuclei", "c" * 64, tmp_path / "out") is None
+    assert cache.stats["nuclei"] == {"hits": 0, "misses": 1, "stores": 1}
+    cache.close()
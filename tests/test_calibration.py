@@ -0,0 +1,58 @@
+import asyncio
+import itertools
+
+from reconator.calibration import calibrate, decide
+
+COUNTER = itertools.count()
+
+
+def _serve(route):
+    async def handle(reader, writer):
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                status, body = route(request.split(b" ")[1].decode())
+                writer.write(f"HTTP/1.1 {status} X\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    return handle
+
+
+def _calibrate(route):
+    async def scenario():
+        server = await asyncio.start_server(_serve(route), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await calibrate(f"http://127.0.0.1:{port}/", timeout_s=2)
+        finally:
+            server.close()
+
+    return asyncio.run(scenario())
+
+
+def test_calibrate_filters_static_catch_all() -> None:
+    calibration = _calibrate(lambda path: (200, b"<html>welcome</html>"))
+    assert calibration.filters == {"length": 20} and calibration.skip_reason is None
+    assert len({item["sha256"] for item in calibration.fingerprints}) == 1
+
+
+def test_calibrate_falls_back_to_words_then_skips() -> None:
+    # Same word count, different length each time.
+    echo = _calibrate(lambda path: (200, f"not found: {'x' * next(COUNTER)}".encode()))
+    assert echo.filters == {"words": 3}
+    noisy = _calibrate(lambda path: (200, " ".join(["x"] * next(COUNTER)).encode() + b"\n" * next(COUNTER)))
+    assert noisy.filters == {} and noisy.skip_reason == "catch_all_unstable"
+
+
+def test_calibrate_leaves_real_404s_alone() -> None:
+    calibration = _calibrate(lambda path: (404, b"nope"))
+    assert calibration.filters == {} and calibration.skip_reason is None
+
+
+def test_decide_fuzzes_unreachable_urls_unfiltered() -> None:
+    unreachable = decide([None])
+    assert unreachable.filters == {} and unreachable.skip_reason is None
+    partial = decide([None, {"status": 200, "length": 5, "words": 1, "lines": 1}])
+    assert partial.filters == {} and partial.skip_reason is None
@@ -0,0 +1,53 @@
+import asyncio
+import json
+import os
+import stat
+from pathlib import Path
+
+from reconator.discovery import HostSweeper, record_down_host
+from reconator.portscan import ConnectScanner
+
+
+def _fake_nmap(bin_dir: Path) -> None:
+    bin_dir.mkdir(exist_ok=True)
+    path = bin_dir / "nmap"
+    path.write_text(
+        "#!/bin/sh\n"
+        'while [ "$1" != "-oX" ]; do shift; done\n'
+        "cat > \"$2\" <<'XML'\n"
+        '<nmaprun><host><status state="up"/><address addr="192.0.2.1" addrtype="ipv4"/></host></nmaprun>\n'
+        "XML\n",
+        encoding="utf-8",
+    )
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+
+def test_sweep_falls_back_to_connect_probe(tmp_path: Path, monkeypatch) -> None:
+    _fake_nmap(tmp_path / "bin")
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+
+    async def scenario():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            sweeper = HostSweeper(
+                "both", tmp_path / "discovery", 10, scanner=ConnectScanner([port], timeout_s=0.5)
+            )
+            return sweeper, await sweeper.sweep(["192.0.2.1", "127.0.0.1"])
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    sweeper, alive = asyncio.run(scenario())
+    assert alive == {"192.0.2.1", "127.0.0.1"}
+    assert sweeper.stats == {"swept": 2, "alive": 2, "down": 0}
+
+
+def test_record_down_host(tmp_path: Path) -> None:
+    host_dir = tmp_path / "192.0.2.9"
+    record_down_host(host_dir, "192.0.2.9", "eng", "ping")
+    state = json.loads((host_dir / "state.json").read_text(encoding="utf-8"))
+    nmap = state["modules"]["nmap"]
+    assert nmap["status"] == "OK"
+    assert nmap["artifacts"] == {"discovery": "ping", "host_state": "down", "open_ports": "0"}
+    assert json.loads((host_dir / "services.json").read_text(encoding="utf-8")) == {}
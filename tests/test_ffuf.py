@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+
+from reconator import ffuf
+from reconator.ffuf import FfufBatcher, HitWriter, iter_ffuf_results, run_ffuf, set_ffuf_batcher
+
+FAKE_FFUF = """\
+import json, sys
+from pathlib import Path
+args = sys.argv[1:]
+Path(__file__).with_name("calls.log").open("a").write(" ".join(args) + "\\n")
+lists = dict(reversed(value.rsplit(":", 1)) for flag, value in zip(args, args[1:]) if flag == "-w")
+urls = Path(lists["URL"]).read_text().split()
+results = [
+    {"input": {"URL": url, "FUZZ": "admin"}, "url": url + "admin", "status": 200, "length": 10, "words": 2}
+    for url in urls
+]
+Path(args[args.index("-o") + 1]).write_text(json.dumps({"results": results}))
+"""
+
+
+def _read_jsonl(path: Path) -> list:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def _fake_ffuf(bin_dir: Path) -> Path:
+    bin_dir.mkdir()
+    path = bin_dir / "ffuf"
+    path.write_text(f"#!{sys.executable}\n{FAKE_FFUF}", encoding="utf-8")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return bin_dir / "calls.log"
+
+
+def test_batched_ffuf_splits_results_per_host(tmp_path: Path, monkeypatch) -> None:
+    calls = _fake_ffuf(tmp_path / "bin")
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("admin\n", encoding="utf-8")
+    monkeypatch.setattr(ffuf, "discover_wordlist", lambda: wordlist)
+
+    hosts = {
+        "192.0.2.1": ["http://192.0.2.1:80/", "https://192.0.2.1:443/"],
+        "192.0.2.2": ["http://192.0.2.2:8080/"],
+    }
+
+    async def scenario() -> None:
+        set_ffuf_batcher(FfufBatcher(tmp_path / "batches", wordlist, timeout_s=10, batch_size=3, linger_s=5))
+        try:
+            await asyncio.gather(
+                *(run_ffuf(tmp_path / host, host, urls, timeout_s=10, resume=False) for host, urls in hosts.items())
+            )
+        finally:
+            set_ffuf_batcher(None)
+
+    asyncio.run(scenario())
+
+    # A full batch is flushed at once, without waiting out the linger time.
+    invocations = calls.read_text(encoding="utf-8").splitlines()
+    assert len(invocations) == 1 and "-t 15" in invocations[0]
+    hits = _read_jsonl(tmp_path / "192.0.2.1" / "web" / "ffuf_hits.jsonl")
+    assert sorted(hit["url"] for hit in hits) == ["http://192.0.2.1:80/admin", "https://192.0.2.1:443/admin"]
+    legacy = json.loads((tmp_path / "192.0.2.1" / "web" / "ffuf_hits.json").read_text(encoding="utf-8"))
+    assert legacy == hits
+    per_port = _read_jsonl(tmp_path / "192.0.2.2" / "web" / "ffuf_8080.jsonl")
+    assert [item["url"] for item in per_port] == ["http://192.0.2.2:8080/admin"]
+    state = json.loads((tmp_path / "192.0.2.2" / "state.json").read_text(encoding="utf-8"))
+    [batch_dir] = (tmp_path / "batches").iterdir()
+    assert state["modules"]["ffuf"]["artifacts"]["batch"] == batch_dir.name
+
+
+def test_iter_ffuf_results_streams_the_results_array(tmp_path: Path) -> None:
+    items = [{"url": f"http://h:80/{index}", "status": 200, "input": {"FUZZ": "a,]}"}} for index in range(50)]
+    document = {"commandline": "ffuf -o results.json", "results": items, "config": {"results": "x"}}
+    path = tmp_path / "ffuf_80.json"
+    path.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    assert list(iter_ffuf_results(path, chunk_size=64)) == items
+
+    # A file cut off mid-item yields the complete items before the cut.
+    text = path.read_text(encoding="utf-8")
+    path.write_text(text[: text.index('"http://h:80/10"')], encoding="utf-8")
+    assert [item["url"] for item in iter_ffuf_results(path, chunk_size=64)][-1] == "http://h:80/9"
+
+
+def test_hit_writer_caps_and_samples_per_url(tmp_path: Path) -> None:
+    writer = HitWriter(tmp_path / "ffuf_hits.jsonl", max_hits=3, sample_every=4)
+    writer.add("http://h:80/", ({"url": f"http://h:80/{index}", "status": 200} for index in range(20)))
+    writer.add("http://h:8080/", [{"url": "http://h:8080/a", "status": 200}])
+    writer.close()
+    kept = [hit["url"].rsplit("/", 1)[1] for hit in _read_jsonl(tmp_path / "ffuf_hits.jsonl")]
+    assert kept == ["0", "1", "2", "6", "10", "14", "18", "a"]
+    assert writer.counts["http://h:80/"] == {"results": 20, "kept": 7}
+
+
+def test_batch_size_keeps_threads_per_url(tmp_path: Path) -> None:
+    batcher = FfufBatcher(tmp_path, tmp_path / "words.txt", timeout_s=10, batch_size=64, max_threads=20)
+    assert batcher.batch_size == 20 // ffuf.THREADS_PER_URL
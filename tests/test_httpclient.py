@@ -0,0 +1,40 @@
+import asyncio
+
+from reconator.httpclient import HttpConnection
+
+
+def test_connection_reuses_keep_alive_and_reads_chunked_bodies() -> None:
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        while True:
+            request = await reader.readuntil(b"\r\n\r\n")
+            if request.startswith(b"GET /chunked"):
+                writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n6\r\n world\r\n0\r\n\r\n")
+            elif request.startswith(b"GET /close"):
+                writer.write(b"HTTP/1.1 404 Not Found\r\nConnection: close\r\n\r\ngone")
+                await writer.drain()
+                writer.close()
+                return
+            else:
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+
+    async def scenario():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        connection = HttpConnection(f"http://127.0.0.1:{port}/", timeout_s=2)
+        try:
+            responses = [await connection.get(path) for path in ("/a", "/chunked", "/close", "/b")]
+        finally:
+            await connection.close()
+            server.close()
+        return connection, responses
+
+    connection, responses = asyncio.run(scenario())
+    assert [response.status for response in responses] == [200, 200, 404, 200]
+    assert responses[1].body == b"hello world" and responses[1].words == 2
+    assert responses[2].body == b"gone"
+    # One connection until the server closed it, then one more.
+    assert connection.connects == 2 and len(connections) == 2
@@ -1,6 +1,68 @@
+import asyncio
+import json
+import os
+import stat
+import sys
 from pathlib import Path
 
-from reconator.nmap import derive_web_urls, parse_nmap_xml_ports
+from reconator.baseline import Baseline, set_baseline
+from reconator.cache import ScanCache, set_scan_cache
+from reconator.nmap import (
+    derive_web_urls,
+    iter_nmap_hosts,
+    parse_nmap_xml_ports,
+    run_nmap,
+    run_nmap_batch,
+    split_nmap_xml,
+    tail_nmap_ports,
+)
+from reconator.portscan import ConnectScanner, set_port_scanner
+from reconator.utils import write_json
+
+# Triage finishes 192.0.2.1 and hangs inside 192.0.2.2; follow-ups return at once.
+HANGING_NMAP = """\
+import sys, time
+from pathlib import Path
+args = sys.argv[1:]
+host = '<host><status state="up"/><address addr="192.0.2.1" addrtype="ipv4"/><ports>'
+port = '<port protocol="tcp" portid="80"><state state="open"/><service name="http"/></port>'
+with open(args[args.index("-oX") + 1], "w") as out:
+    out.write("<nmaprun>" + host + port + "</ports></host>")
+    if "-p" in args:
+        out.write("</nmaprun>")
+        sys.exit(0)
+    out.write('<host><status state="up"/><address addr="192.0.2.2"')
+    out.flush()
+    time.sleep(30)
+"""
+
+# Triage reports only 192.0.2.1; with FAIL set in the environment nmap then exits 1 without closing the XML.
+PARTIAL_NMAP = """\
+import os, sys
+args = sys.argv[1:]
+host = '<host><status state="up"/><address addr="192.0.2.1" addrtype="ipv4"/><ports>'
+port = '<port protocol="tcp" portid="80"><state state="open"/><service name="http"/></port>'
+with open(args[args.index("-oX") + 1], "w") as out:
+    out.write("<nmaprun>" + host + port + "</ports></host>")
+    if os.environ.get("FAIL") and "-p" not in args:
+        sys.exit(1)
+    out.write("</nmaprun>")
+"""
+
+# Logs its arguments and reports every requested port; only port $SAME keeps its baseline fingerprint.
+FINGERPRINT_NMAP = """\
+import os, sys
+args = sys.argv[1:]
+with open(os.environ["NMAP_LOG"], "a") as log:
+    log.write(" ".join(args) + "\\n")
+ports = ""
+for port in args[args.index("-p") + 1].split(","):
+    product = "nginx" if port == os.environ["SAME"] else "apache"
+    ports += f'<port protocol="tcp" portid="{port}"><state state="open"/><service name="http" product="{product}"/></port>'
+with open(args[args.index("-oX") + 1], "w") as out:
+    out.write('<nmaprun><host><status state="up"/><address addr="127.0.0.1" addrtype="ipv4"/>')
+    out.write("<ports>" + ports + "</ports></host></nmaprun>")
+"""
 
 
 def test_parse_nmap_xml_ports(tmp_path: Path) -> None:
@@ -38,3 +100,180 @@ def test_derive_web_urls() -> None:
     urls = derive_web_urls("192.0.2.10", services)
     assert "http://192.0.2.10:80/" in urls
     assert "https://192.0.2.10:443/" in urls
+
+
+def test_split_nmap_xml(tmp_path: Path) -> None:
+    xml_content = """
+<nmaprun scanner="nmap" args="nmap -sV -iL targets.txt">
+  <host>
+    <status state="up"/>
+    <address addr="192.0.2.1" addrtype="ipv4"/>
+    <ports><port protocol="tcp" portid="22"><state state="open"/><service name="ssh"/></port></ports>
+  </host>
+  <host>
+    <status state="up"/>
+    <address addr="192.0.2.2" addrtype="ipv4"/>
+    <ports><port protocol="tcp" portid="80"><state state="open"/><service name="http"/></port></ports>
+  </host>
+</nmaprun>
+"""
+    batch_xml = tmp_path / "batch.xml"
+    batch_xml.write_text(xml_content, encoding="utf-8")
+    found = split_nmap_xml(batch_xml, ["192.0.2.1", "192.0.2.2", "192.0.2.3"], "triage.xml", tmp_path)
+    assert list(found) == ["192.0.2.1", "192.0.2.2"]
+    assert found["192.0.2.2"].ports[80]["name"] == "http"
+    assert list(parse_nmap_xml_ports(tmp_path / "192.0.2.1" / "nmap" / "triage.xml")) == [22]
+    assert list(parse_nmap_xml_ports(tmp_path / "192.0.2.2" / "nmap" / "triage.xml")) == [80]
+
+
+def test_iter_nmap_hosts_stops_at_truncation(tmp_path: Path) -> None:
+    xml_content = """<nmaprun>
+  <host>
+    <status state="down"/>
+    <address addr="192.0.2.1" addrtype="ipv4"/>
+  </host>
+  <host>
+    <status state="up"/>
+    <address addr="192.0.2.2" addrtype="ipv4"/>
+    <ports><port protocol="tcp" portid="443"><state state="open"/><service name="http" tunnel="ssl"/>
+      <script id="ssl-cert" output="Subject: commonName=example"/></port></ports>
+  </host>
+  <host>
+    <status state="up"/>
+    <address addr="192.0.2.3"
+"""
+    xml_path = tmp_path / "partial.xml"
+    xml_path.write_text(xml_content, encoding="utf-8")
+    records = list(iter_nmap_hosts(xml_path))
+    assert [(record.address, record.is_down) for record in records] == [
+        ("192.0.2.1", True),
+        ("192.0.2.2", False),
+    ]
+    assert records[1].ports[443]["tunnel"] == "ssl"
+    assert records[1].scripts[443]["ssl-cert"].startswith("Subject")
+    assert list(parse_nmap_xml_ports(xml_path)) == [443]
+
+
+def test_tail_nmap_ports_reports_ports_while_written(tmp_path: Path) -> None:
+    xml_path = tmp_path / "triage.xml"
+    chunks = [
+        '<?xml version="1.0"?><nmaprun><host><status state="up"/>',
+        '<address addr="192.0.2.1" addrtype="ipv4"/><ports>',
+        '<port protocol="tcp" portid="443"><state state="open"/><service name="https"/></port>',
+        '<port protocol="tcp" portid="22"><state state="closed"/></port>',
+        '<port protocol="tcp" portid="80"><state state="open"/><service name="http"/></port>',
+        "</ports></host></nmaprun>",
+    ]
+
+    async def write_slowly():
+        with xml_path.open("w", encoding="utf-8") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+                handle.flush()
+                await asyncio.sleep(0.05)
+
+    async def scenario():
+        writer = asyncio.ensure_future(write_slowly())
+        seen = []
+        async for address, port, meta in tail_nmap_ports(xml_path, writer, poll_interval_s=0.01):
+            seen.append((address, port, meta["name"], writer.done()))
+        return seen
+
+    seen = asyncio.run(scenario())
+    assert [item[:3] for item in seen] == [("192.0.2.1", 443, "https"), ("192.0.2.1", 80, "http")]
+    assert not seen[0][3]
+
+
+def test_batch_triage_timeout_keeps_finished_hosts(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "nmap"
+    fake.write_text(f"#!{sys.executable}\n{HANGING_NMAP}", encoding="utf-8")
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    output_dir = tmp_path / "out"
+
+    results = asyncio.run(
+        run_nmap_batch(output_dir, ["192.0.2.1", "192.0.2.2"], timeout_s=30, resume=False, batch_timeout_s=1)
+    )
+
+    assert list(results) == ["192.0.2.1"] and list(results["192.0.2.1"]) == [80]
+    finished = json.loads((output_dir / "192.0.2.1" / "state.json").read_text(encoding="utf-8"))
+    assert finished["modules"]["nmap"]["status"] == "OK"
+    assert finished["modules"]["nmap"]["artifacts"]["salvaged"] == "triage timeout"
+    unfinished = json.loads((output_dir / "192.0.2.2" / "state.json").read_text(encoding="utf-8"))
+    assert unfinished["modules"]["nmap"]["status"] == "TIMEOUT"
+
+
+def test_batch_triage_only_marks_missing_hosts_down_after_a_clean_run(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "nmap"
+    fake.write_text(f"#!{sys.executable}\n{PARTIAL_NMAP}", encoding="utf-8")
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    cache = ScanCache(tmp_path / "cache", ttl_s=3600, max_bytes=1 << 20)
+
+    def module(output_dir: Path, host: str) -> dict:
+        return json.loads((output_dir / host / "state.json").read_text(encoding="utf-8"))["modules"]["nmap"]
+
+    set_scan_cache(cache)
+    try:
+        monkeypatch.setenv("FAIL", "1")
+        failed = tmp_path / "failed"
+        asyncio.run(run_nmap_batch(failed, ["192.0.2.1", "192.0.2.2"], timeout_s=30, resume=False))
+        assert module(failed, "192.0.2.2")["status"] == "FAILED"
+        assert "host_state" not in module(failed, "192.0.2.2")["artifacts"]
+        assert module(failed, "192.0.2.1")["artifacts"]["salvaged"] == "triage failed"
+        assert cache.stats["nmap"].get("stores", 0) == 1
+
+        monkeypatch.delenv("FAIL")
+        clean = tmp_path / "clean"
+        asyncio.run(run_nmap_batch(clean, ["192.0.2.1", "192.0.2.2"], timeout_s=30, resume=False))
+        assert module(clean, "192.0.2.2")["status"] == "OK"
+        assert module(clean, "192.0.2.2")["artifacts"]["host_state"] == "down"
+    finally:
+        set_scan_cache(None)
+        cache.close()
+
+
+def test_connect_triage_fingerprints_baseline_ports_before_carrying_them_over(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "nmap"
+    fake.write_text(f"#!{sys.executable}\n{FINGERPRINT_NMAP}", encoding="utf-8")
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("NMAP_LOG", str(tmp_path / "nmap.log"))
+
+    async def scenario() -> dict:
+        servers = [await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0) for _ in range(2)]
+        same, changed = (server.sockets[0].getsockname()[1] for server in servers)
+        monkeypatch.setenv("SAME", str(same))
+        old = tmp_path / "old" / "127.0.0.1"
+        # Connect triage reports no fingerprints, so both ports look alike until -sV runs.
+        write_json(
+            old / "services.json",
+            {str(port): {"name": "http", "product": "nginx"} for port in (same, changed)},
+        )
+        write_json(old / "state.json", {"modules": {"nmap": {"status": "OK"}}})
+        set_baseline(Baseline(tmp_path / "old"))
+        set_port_scanner(ConnectScanner([same, changed], timeout_s=0.5))
+        try:
+            ports = await run_nmap(tmp_path / "new" / "127.0.0.1", "127.0.0.1", timeout_s=30, resume=False)
+        finally:
+            set_baseline(None)
+            set_port_scanner(None)
+            for server in servers:
+                server.close()
+        return {"same": same, "changed": changed, "ports": ports}
+
+    result = asyncio.run(scenario())
+    same, changed = result["same"], result["changed"]
+    assert result["ports"][same]["product"] == "nginx" and result["ports"][changed]["product"] == "apache"
+    verify, followup = (tmp_path / "nmap.log").read_text(encoding="utf-8").splitlines()
+    assert "-sC" not in verify and f"-p {min(same, changed)},{max(same, changed)}" in verify
+    assert f"-p {changed} " in followup
+    state = json.loads((tmp_path / "new" / "127.0.0.1" / "state.json").read_text(encoding="utf-8"))
+    artifacts = state["modules"]["nmap"]["artifacts"]
+    assert (artifacts["baseline_verified"], artifacts["baseline_unchanged"]) == ("2", "1")
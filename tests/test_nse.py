@@ -0,0 +1,90 @@
+import asyncio
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+
+from reconator.nmap import parse_nmap_xml_ports, run_nmap
+from reconator.nse import PROFILE_BUDGETS, NsePlanner, set_nse_planner
+
+FAKE_NMAP = """\
+from pathlib import Path
+import sys
+args = sys.argv[1:]
+Path(__file__).with_name("calls.log").open("a").write(" ".join(args) + "\\n")
+services = {22: ("ssh", "OpenSSH", ""), 80: ("http", "nginx", ""), 443: ("http", "nginx", "ssl")}
+ports = [int(port) for port in args[args.index("-p") + 1].split(",")] if "-p" in args else sorted(services)
+body = ['<nmaprun><host><status state="up"/><address addr="192.0.2.5" addrtype="ipv4"/><ports>']
+for port in ports:
+    name, product, tunnel = services[port]
+    body.append(
+        f'<port protocol="tcp" portid="{port}"><state state="open"/>'
+        f'<service name="{name}" product="{product}" tunnel="{tunnel}"/>'
+        '<script id="probe" output="ok"/></port>'
+    )
+body.append("</ports></host></nmaprun>")
+Path(args[args.index("-oX") + 1]).write_text("".join(body))
+"""
+
+SERVICES = {
+    22: {"name": "ssh", "product": "OpenSSH"},
+    80: {"name": "http", "product": "nginx"},
+    443: {"name": "http", "product": "nginx", "tunnel": "ssl"},
+    9999: {"name": "unknown"},
+}
+
+
+def test_planner_groups_ports_within_the_profile_budget() -> None:
+    runs = {run.label: run for run in NsePlanner("safe").plan(SERVICES)}
+    assert sorted(runs) == ["http", "none", "ssh", "tls+http"]
+    assert runs["tls+http"].scripts[:4] == ["ssl-cert", "ssl-date", "tls-alpn", "http-title"]
+    assert len(runs["tls+http"].scripts) == 6 and len(runs["http"].scripts) == 6
+    assert runs["none"].ports == [9999] and runs["none"].script_args(PROFILE_BUDGETS["safe"]) == []
+    aggressive = {run.label: run for run in NsePlanner("aggressive").plan(SERVICES)}
+    assert len(aggressive["http"].scripts) == 9
+    assert aggressive["http"].script_args(PROFILE_BUDGETS["aggressive"])[-2:] == ["--script-timeout", "120s"]
+
+
+def test_targeted_followup_runs_per_category_and_records_runtime(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "nmap"
+    fake.write_text(f"#!{sys.executable}\n{FAKE_NMAP}", encoding="utf-8")
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    host_dir = tmp_path / "192.0.2.5"
+    planner = NsePlanner("safe")
+
+    async def scenario():
+        set_nse_planner(planner)
+        try:
+            return await run_nmap(host_dir, "192.0.2.5", timeout_s=30, resume=False)
+        finally:
+            set_nse_planner(None)
+
+    ports = asyncio.run(scenario())
+
+    assert sorted(ports) == [22, 80, 443]
+    calls = (bin_dir / "calls.log").read_text(encoding="utf-8").splitlines()
+    followups = [line for line in calls if "-p" in line]
+    assert len(followups) == 3
+    assert all("-sC" not in line and "--script-timeout 30s" in line for line in followups)
+    assert sorted(parse_nmap_xml_ports(host_dir / "nmap" / "followup.xml")) == [22, 80, 443]
+    assert not list((host_dir / "nmap").glob("followup.*.xml"))
+    state = json.loads((host_dir / "state.json").read_text(encoding="utf-8"))
+    assert state["modules"]["nmap"]["artifacts"]["nse_plan"] == "nmap/nse_plan.json"
+    plan = json.loads((host_dir / "nmap" / "nse_plan.json").read_text(encoding="utf-8"))
+    assert {run["label"]: run["ports"] for run in plan["runs"]} == {
+        "ssh": [22],
+        "http": [80],
+        "tls+http": [443],
+    }
+    # The mixed run's time is split between its categories by script count (3 tls, 3 http scripts).
+    [mixed] = [run for run in plan["runs"] if run["label"] == "tls+http"]
+    assert mixed["categories"]["tls"]["scripts"] == ["ssl-cert", "ssl-date", "tls-alpn"]
+    shares = [mixed["categories"][name]["duration_s"] for name in ("tls", "http")]
+    assert abs(shares[0] - shares[1]) <= 0.001 and abs(sum(shares) - mixed["duration_s"]) <= 0.002
+    assert sorted(plan["categories"]) == ["http", "ssh", "tls"] and plan["categories"]["http"]["ports"] == 2
+    assert planner.stats["ssh"]["runs"] == 1 and planner.stats["tls"]["ports"] == 1
+    assert planner.stats["http"] == {"runs": 2, "ports": 2, "seconds": planner.stats["http"]["seconds"]}
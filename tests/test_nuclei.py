@@ -0,0 +1,214 @@
+import asyncio
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+
+from reconator.cache import ScanCache, set_scan_cache
+from reconator.nuclei import FindingsRollup, NucleiBatcher, run_nuclei, set_nuclei_batcher
+from reconator.pipeline import Feed
+from reconator.techmap import TemplateSelector, load_tech_map, set_template_selector
+
+FAKE_NUCLEI = """\
+import json, sys
+from pathlib import Path
+args = sys.argv[1:]
+Path(__file__).with_name("calls.log").open("a").write(" ".join(args) + "\\n")
+urls = Path(args[args.index("-l") + 1]).read_text().split()
+with open(args[args.index("-o") + 1], "w") as out:
+    for url in urls:
+        host = url.split("//")[1].split(":")[0]
+        out.write(json.dumps({"template-id": "tech-detect", "severity": "info", "matched-at": url, "host": url}) + "\\n")
+        if url.startswith("https://"):
+            # A network template matching a port that was not in the URL list.
+            out.write(json.dumps({"template-id": "ssh-auth", "severity": "low", "matched-at": host + ":22", "host": host}) + "\\n")
+"""
+
+SLOW_NUCLEI = """\
+import json, sys, time
+args = sys.argv[1:]
+with open(args[args.index("-o") + 1], "w", buffering=1) as out:
+    for extractor in ("v1", "v1", "v2"):
+        out.write(json.dumps({"template-id": "version", "severity": "info", "matched-at": "http://192.0.2.9:80/", "extractor-name": extractor}) + "\\n")
+    time.sleep(30)
+"""
+
+ROUND_NUCLEI = """\
+import sys, time
+args = sys.argv[1:]
+print("round", " ".join(open(args[args.index("-l") + 1]).read().split()), flush=True)
+open(args[args.index("-o") + 1], "w").close()
+time.sleep(0.7)
+"""
+
+
+def _fake_nuclei(bin_dir: Path, script: str = FAKE_NUCLEI) -> Path:
+    bin_dir.mkdir()
+    path = bin_dir / "nuclei"
+    path.write_text(f"#!{sys.executable}\n{script}", encoding="utf-8")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return bin_dir / "calls.log"
+
+
+def _matched(path: Path) -> list:
+    return sorted(json.loads(line)["matched-at"] for line in path.read_text(encoding="utf-8").splitlines())
+
+
+def test_batched_nuclei_fans_results_out_per_host(tmp_path: Path, monkeypatch) -> None:
+    calls = _fake_nuclei(tmp_path / "bin")
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+
+    async def scenario() -> None:
+        set_nuclei_batcher(
+            NucleiBatcher(tmp_path / "batches", "safe", timeout_s=10, batch_size=3, shards=2, rate_limit=100, linger_s=5)
+        )
+        feed: Feed[str] = Feed(["https://192.0.2.2:8443/"])
+        asyncio.get_running_loop().call_later(0.2, feed.close)
+        try:
+            await asyncio.gather(
+                run_nuclei(
+                    tmp_path / "192.0.2.1",
+                    "192.0.2.1",
+                    ["http://192.0.2.1:80/", "https://192.0.2.1:443/"],
+                    "safe",
+                    timeout_s=10,
+                    resume=False,
+                ),
+                run_nuclei(tmp_path / "192.0.2.2", "192.0.2.2", feed, "safe", timeout_s=10, resume=False),
+            )
+        finally:
+            set_nuclei_batcher(None)
+
+    asyncio.run(scenario())
+
+    # One process for both hosts, with the rate limit split between the shards.
+    invocations = calls.read_text(encoding="utf-8").splitlines()
+    assert len(invocations) == 1 and "-rate-limit 50" in invocations[0]
+    assert _matched(tmp_path / "192.0.2.1" / "nuclei" / "results.jsonl") == [
+        "192.0.2.1:22",
+        "http://192.0.2.1:80/",
+        "https://192.0.2.1:443/",
+    ]
+    assert _matched(tmp_path / "192.0.2.2" / "nuclei" / "results.jsonl") == ["192.0.2.2:22", "https://192.0.2.2:8443/"]
+    findings = json.loads((tmp_path / "192.0.2.2" / "nuclei" / "findings.json").read_text(encoding="utf-8"))
+    assert [item["template_id"] for item in findings["low"]] == ["ssh-auth"]
+    state = json.loads((tmp_path / "192.0.2.1" / "state.json").read_text(encoding="utf-8"))
+    [batch_dir] = (tmp_path / "batches").iterdir()
+    assert state["modules"]["nuclei"]["artifacts"]["batch"] == batch_dir.name
+
+
+def test_batched_nuclei_shard_timeout_scales_and_is_reported_per_host(tmp_path: Path, monkeypatch) -> None:
+    _fake_nuclei(tmp_path / "bin", SLOW_NUCLEI)
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+    host_dir = tmp_path / "192.0.2.9"
+    cache = ScanCache(tmp_path / "cache", ttl_s=3600, max_bytes=1 << 20)
+    batcher = NucleiBatcher(tmp_path / "batches", "safe", timeout_s=30, rate_limit=100, linger_s=0.1, batch_timeout_s=1)
+    assert NucleiBatcher(tmp_path, "safe", timeout_s=30, shards=2, rate_limit=100).shard_timeout(20) == 30 * 4
+
+    async def scenario() -> None:
+        set_nuclei_batcher(batcher)
+        set_scan_cache(cache)
+        try:
+            await run_nuclei(host_dir, "192.0.2.9", ["http://192.0.2.9:80/"], "safe", timeout_s=30, resume=False)
+        finally:
+            set_nuclei_batcher(None)
+            set_scan_cache(None)
+
+    asyncio.run(scenario())
+
+    state = json.loads((host_dir / "state.json").read_text(encoding="utf-8"))
+    assert state["modules"]["nuclei"]["status"] == "TIMEOUT"
+    findings = json.loads((host_dir / "nuclei" / "findings.json").read_text(encoding="utf-8"))
+    assert [item["extractor"] for item in findings["info"]] == ["v1", "v2"]
+    assert cache.stats["nuclei"].get("stores", 0) == 0
+    cache.close()
+
+
+def test_findings_rollup_dedupes_and_flushes_on_record_threshold(tmp_path: Path) -> None:
+    path = tmp_path / "findings.json"
+    rollup = FindingsRollup(path, flush_every=2, flush_interval_s=3600)
+    line = json.dumps({"template-id": "panel", "severity": "high", "matched-at": "http://192.0.2.1:80/"})
+    assert rollup.add_line(line)
+    assert not rollup.add_line(line)
+    rollup.maybe_flush()
+    assert not path.exists()
+    assert rollup.add_line(line.replace(":80/", ":8080/"))
+    rollup.maybe_flush()
+    findings = json.loads(path.read_text(encoding="utf-8"))
+    assert [item["matched_at"] for item in findings["high"]] == ["http://192.0.2.1:80/", "http://192.0.2.1:8080/"]
+    assert (rollup.unique, rollup.duplicates) == (2, 1)
+
+
+def test_run_nuclei_keeps_findings_of_a_timed_out_scan(tmp_path: Path, monkeypatch) -> None:
+    _fake_nuclei(tmp_path / "bin", SLOW_NUCLEI)
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+    host_dir = tmp_path / "192.0.2.9"
+    cache = ScanCache(tmp_path / "cache", ttl_s=3600, max_bytes=1 << 20)
+    set_scan_cache(cache)
+    try:
+        asyncio.run(run_nuclei(host_dir, "192.0.2.9", ["http://192.0.2.9:80/"], "safe", timeout_s=1, resume=False))
+    finally:
+        set_scan_cache(None)
+
+    findings = json.loads((host_dir / "nuclei" / "findings.json").read_text(encoding="utf-8"))
+    assert [item["extractor"] for item in findings["info"]] == ["v1", "v2"]
+    state = json.loads((host_dir / "state.json").read_text(encoding="utf-8"))
+    assert state["modules"]["nuclei"]["artifacts"]["duplicates"] == "1"
+    # A truncated scan is not final and must not be served to other engagements.
+    assert state["modules"]["nuclei"]["status"] == "TIMEOUT"
+    assert cache.stats["nuclei"].get("stores", 0) == 0
+    cache.close()
+
+
+def test_targeted_nuclei_runs_selected_templates_per_url(tmp_path: Path, monkeypatch) -> None:
+    calls = _fake_nuclei(tmp_path / "bin")
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+    host_dir = tmp_path / "192.0.2.1"
+
+    async def scenario() -> None:
+        set_template_selector(TemplateSelector(load_tech_map(), probe=False))
+        try:
+            await run_nuclei(
+                host_dir,
+                "192.0.2.1",
+                ["http://192.0.2.1:80/", "https://192.0.2.1:443/"],
+                "safe",
+                timeout_s=10,
+                resume=False,
+                services={80: {"name": "http", "product": "nginx"}, 443: {"name": "https"}},
+            )
+        finally:
+            set_template_selector(None)
+
+    asyncio.run(scenario())
+
+    invocations = sorted(calls.read_text(encoding="utf-8").splitlines())
+    assert len(invocations) == 2
+    assert "-tags" not in invocations[0]
+    assert invocations[1].endswith("-tags exposure,misconfig,nginx,tech")
+    assert _matched(host_dir / "nuclei" / "results.jsonl")[1:] == ["http://192.0.2.1:80/", "https://192.0.2.1:443/"]
+    selection = json.loads((host_dir / "nuclei" / "selection.json").read_text(encoding="utf-8"))
+    assert selection["urls"]["http://192.0.2.1:80/"]["mode"] == "targeted"
+    assert selection["urls"]["https://192.0.2.1:443/"]["mode"] == "full"
+
+
+def test_streamed_nuclei_rounds_share_one_timeout_and_keep_every_log(tmp_path: Path, monkeypatch) -> None:
+    _fake_nuclei(tmp_path / "bin", ROUND_NUCLEI)
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+    host_dir = tmp_path / "192.0.2.1"
+
+    async def scenario() -> None:
+        feed: Feed[str] = Feed(["http://192.0.2.1:80/"])
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.2, feed.put, "http://192.0.2.1:8080/")
+        loop.call_later(0.3, feed.close)
+        await run_nuclei(host_dir, "192.0.2.1", feed, "safe", timeout_s=1, resume=False)
+
+    asyncio.run(scenario())
+
+    # The second round only gets what the first left of the budget and is killed.
+    state = json.loads((host_dir / "state.json").read_text(encoding="utf-8"))
+    assert state["modules"]["nuclei"]["status"] == "TIMEOUT"
+    rounds = (host_dir / "nuclei" / "stdout.log").read_text(encoding="utf-8").splitlines()
+    assert rounds == ["round http://192.0.2.1:80/", "round http://192.0.2.1:8080/"]
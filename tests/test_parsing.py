@@ -2,7 +2,7 @@ from pathlib import Path
 
 import pytest
 
-from reconator.parsing import parse_targets_file
+from reconator.parsing import iter_targets_file, parse_targets_file
 from reconator.utils import ReconatorError, normalize_engagement_name
 
 
@@ -28,7 +28,35 @@ def test_parse_targets_file_cidr_cap(tmp_path: Path) -> None:
         parse_targets_file(target_file, allow_cidr_expand=True, cidr_cap=4)
 
 
+def test_iter_targets_file_checks_caps_while_streaming(tmp_path: Path) -> None:
+    target_file = tmp_path / "targets.txt"
+    target_file.write_text("192.0.2.1\n198.51.100.0/24\n192.0.2.2\n", encoding="utf-8")
+    targets = iter_targets_file(target_file, allow_cidr_expand=True, cidr_cap=16)
+    assert next(targets) == "192.0.2.1"
+    with pytest.raises(ReconatorError):
+        next(targets)
+
+
 def test_engagement_name_validation() -> None:
     assert normalize_engagement_name("Acme Test") == "Acme_Test"
     with pytest.raises(ReconatorError):
         normalize_engagement_name("bad/name")
+
+
+def test_iter_targets_file_streams_and_dedupes(tmp_path: Path) -> None:
+    target_file = tmp_path / "targets.txt"
+    target_file.write_text(
+        "198.51.100.2\n198.51.100.0/29\n198.51.100.4/30\n2001:db8::/126\n", encoding="utf-8"
+    )
+    targets = iter_targets_file(target_file, allow_cidr_expand=True, cidr_cap=16)
+    assert next(targets) == "198.51.100.2"
+    remaining = list(targets)
+    assert remaining[:5] == ["198.51.100.1", "198.51.100.3", "198.51.100.4", "198.51.100.5", "198.51.100.6"]
+    assert remaining[5:] == ["2001:db8::1", "2001:db8::2", "2001:db8::3"]
+
+
+def test_iter_targets_file_large_cidr_is_lazy(tmp_path: Path) -> None:
+    target_file = tmp_path / "targets.txt"
+    target_file.write_text("10.0.0.0/8\n", encoding="utf-8")
+    targets = iter_targets_file(target_file, allow_cidr_expand=True, cidr_cap=2**24)
+    assert next(targets) == "10.0.0.1"
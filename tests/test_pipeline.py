@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from reconator.pipeline import Feed, Stage, run_pipeline
+
+
+def test_run_pipeline_overlaps_independent_branches() -> None:
+    async def publish_services(_):
+        return {"services": {443: {}}}
+
+    async def publish_urls(_):
+        return {"urls": ["https://h:443/"]}
+
+    async def slow(_):
+        await asyncio.sleep(0.2)
+        return {}
+
+    stages = [
+        Stage("nmap", (), publish_services, provides=("services",)),
+        Stage("urls", ("services",), publish_urls, provides=("urls",)),
+        Stage("sslscan", ("services",), slow),
+        Stage("ffuf", ("urls",), slow),
+        Stage("nuclei", ("urls",), slow),
+    ]
+    start = time.monotonic()
+    result = asyncio.run(run_pipeline(stages))
+    assert time.monotonic() - start < 0.5
+    assert sorted(result.completed) == ["ffuf", "nmap", "nuclei", "sslscan", "urls"]
+
+
+def test_run_pipeline_skips_stages_without_inputs() -> None:
+    async def nothing(_):
+        return None
+
+    async def boom(_):
+        raise RuntimeError("boom")
+
+    stages = [
+        Stage("nmap", (), nothing, provides=("services",)),
+        Stage("sslscan", ("services",), nothing),
+        Stage("other", (), boom),
+    ]
+    result = asyncio.run(run_pipeline(stages))
+    assert result.completed == ["nmap"]
+    assert result.not_run == ["sslscan"]
+    assert str(result.errors["other"]) == "boom"
+
+
+def test_run_pipeline_waits_for_cancelled_stages_to_clean_up() -> None:
+    cleaned = []
+
+    async def hang(_):
+        try:
+            await asyncio.sleep(10)
+        finally:
+            await asyncio.sleep(0.05)
+            cleaned.append("hang")
+
+    async def scenario():
+        task = asyncio.ensure_future(run_pipeline([Stage("hang", (), hang)]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return list(cleaned)
+
+    assert asyncio.run(scenario()) == ["hang"]
+
+
+def test_feed_replays_items_to_late_consumers() -> None:
+    async def scenario():
+        feed = Feed()
+        feed.put(1)
+
+        async def consume():
+            return [item async for item in feed]
+
+        early = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        feed.put(2)
+        late = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        assert not early.done()
+        feed.put(3)
+        feed.close()
+        return await early, await late
+
+    assert asyncio.run(scenario()) == ([1, 2, 3], [1, 2, 3])
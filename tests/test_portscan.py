@@ -0,0 +1,80 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from reconator.portscan import ConnectScanner, _HostTiming, parse_port_spec
+from reconator.utils import ReconatorError
+
+
+def test_parse_port_spec() -> None:
+    assert parse_port_spec("22, 80,8000-8002,80") == [22, 80, 8000, 8001, 8002]
+    assert len(parse_port_spec("top100")) == 100
+    assert 443 in parse_port_spec("top100,9000")
+    with pytest.raises(ReconatorError):
+        parse_port_spec("70000")
+    with pytest.raises(ReconatorError):
+        parse_port_spec("http")
+
+
+def test_connect_scanner_finds_loopback_listeners() -> None:
+    async def scenario():
+        async def handle(reader, writer):
+            writer.close()
+
+        servers = [await asyncio.start_server(handle, host, 0) for host in ("127.0.0.1", "127.0.0.2")]
+        open_ports = {server.sockets[0].getsockname()[0]: server.sockets[0].getsockname()[1] for server in servers}
+        # A port that was just released is closed on both addresses.
+        probe = await asyncio.start_server(handle, "127.0.0.1", 0)
+        closed_port = probe.sockets[0].getsockname()[1]
+        probe.close()
+        await probe.wait_closed()
+        scanner = ConnectScanner(
+            [*open_ports.values(), closed_port], concurrency=8, rate_per_host=200, timeout_s=1.0
+        )
+        try:
+            return open_ports, closed_port, {scan.host: scan async for scan in scanner.scan(open_ports)}
+        finally:
+            for server in servers:
+                server.close()
+                await server.wait_closed()
+
+    open_ports, closed_port, scans = asyncio.run(scenario())
+    for host, port in open_ports.items():
+        scan = scans[host]
+        assert port in scan.open_ports
+        assert closed_port not in scan.open_ports
+        assert scan.responded
+        # Loopback answers quickly, so the adaptive timeout shrinks to its floor.
+        assert scan.timeout_s < 1.0
+
+
+def test_connect_scanner_bounds_hosts_and_probes_in_flight() -> None:
+    class Recording(ConnectScanner):
+        in_flight: Counter = Counter()
+        peak_hosts = peak_probes = 0
+
+        async def _probe(self, host, port, timing):
+            self.in_flight[host] += 1
+            self.peak_hosts = max(self.peak_hosts, len(+self.in_flight))
+            self.peak_probes = max(self.peak_probes, sum(self.in_flight.values()))
+            await asyncio.sleep(0)
+            self.in_flight[host] -= 1
+            return "open" if port == 80 else "closed"
+
+    scanner = Recording(range(1, 201), concurrency=8, host_window=3)
+
+    async def scenario():
+        return [scan async for scan in scanner.scan(f"192.0.2.{index}" for index in range(1, 21))]
+
+    results = asyncio.run(scenario())
+    assert len(results) == 20 and all(scan.open_ports == [80] and scan.closed == 199 for scan in results)
+    # The last probes of a window's hosts may still be in flight as the next hosts start.
+    assert scanner.peak_probes <= 8 and scanner.peak_hosts <= 2 * 3
+
+
+def test_adaptive_timeout_grows_on_slow_links() -> None:
+    scanner = ConnectScanner([80], timeout_s=0.5)
+    timing = _HostTiming(scanner.timeout_s)
+    timing.observe(1.0, scanner.min_timeout_s, scanner.max_timeout_s)
+    assert timing.timeout_s == scanner.max_timeout_s == 2.0
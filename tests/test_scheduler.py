@@ -0,0 +1,111 @@
+import asyncio
+
+from reconator.scheduler import ResourceScheduler, ToolPolicy
+
+
+def test_weighted_admission_lets_cheap_tools_through() -> None:
+    scheduler = ResourceScheduler(
+        cpu_budget=5,
+        policies={"nmap": ToolPolicy(weight=4), "sslscan": ToolPolicy(weight=1)},
+    )
+    peaks = []
+
+    async def run(tool: str, delay: float) -> None:
+        async with scheduler.slot(tool):
+            peaks.append(dict(scheduler.running))
+            await asyncio.sleep(delay)
+
+    async def main() -> None:
+        await asyncio.gather(run("nmap", 0.05), run("nmap", 0.05), run("sslscan", 0.01))
+
+    asyncio.run(main())
+    assert {"nmap": 1, "sslscan": 1} in peaks
+    assert all(peak.get("nmap", 0) <= 1 for peak in peaks)
+
+
+def test_tool_pool_limit() -> None:
+    scheduler = ResourceScheduler(cpu_budget=10, policies={"nuclei": ToolPolicy(max_concurrent=1)})
+    peaks = []
+
+    async def run() -> None:
+        async with scheduler.slot("nuclei"):
+            peaks.append(scheduler.running.get("nuclei", 0))
+            await asyncio.sleep(0.01)
+
+    async def main() -> None:
+        await asyncio.gather(run(), run(), run())
+
+    asyncio.run(main())
+    assert peaks == [1, 1, 1]
+
+
+def test_load_backpressure_delays_admission() -> None:
+    loads = [9.0, 9.0, 0.5]
+    scheduler = ResourceScheduler(
+        cpu_budget=10,
+        max_load=4.0,
+        load_reader=lambda: loads.pop(0) if loads else 0.5,
+        poll_interval_s=0.01,
+    )
+    peaks = []
+
+    async def run(tool: str) -> None:
+        async with scheduler.slot(tool):
+            peaks.append(dict(scheduler.running))
+            await asyncio.sleep(0.2)
+
+    async def main() -> None:
+        await asyncio.gather(run("nmap"), run("sslscan"))
+
+    asyncio.run(main())
+    assert loads == []
+    assert peaks[-1] == {"nmap": 1, "sslscan": 1}
+
+
+def test_light_tools_do_not_starve_an_earlier_heavy_one() -> None:
+    scheduler = ResourceScheduler(
+        cpu_budget=4,
+        policies={"nmap": ToolPolicy(weight=4), "sslscan": ToolPolicy(weight=1)},
+    )
+    order = []
+
+    async def run(name: str, tool: str, delay: float) -> None:
+        async with scheduler.slot(tool):
+            order.append(name)
+            await asyncio.sleep(delay)
+
+    async def main() -> None:
+        first = asyncio.ensure_future(run("light-0", "sslscan", 0.05))
+        await asyncio.sleep(0)
+        heavy = asyncio.ensure_future(run("heavy", "nmap", 0.01))
+        await asyncio.sleep(0)
+        # These would fit next to light-0, but the heavy waiter came first.
+        lights = [asyncio.ensure_future(run(f"light-{index}", "sslscan", 0.01)) for index in range(1, 4)]
+        await asyncio.gather(first, heavy, *lights)
+
+    asyncio.run(main())
+    assert order == ["light-0", "heavy", "light-1", "light-2", "light-3"]
+
+
+def test_cancelled_waiter_gives_up_its_place() -> None:
+    scheduler = ResourceScheduler(cpu_budget=1, policies={"nmap": ToolPolicy(weight=1)})
+    order = []
+
+    async def run(name: str) -> None:
+        async with scheduler.slot("nmap"):
+            order.append(name)
+            await asyncio.sleep(0.02)
+
+    async def main() -> None:
+        first = asyncio.ensure_future(run("first"))
+        await asyncio.sleep(0)
+        cancelled = asyncio.ensure_future(run("cancelled"))
+        later = asyncio.ensure_future(run("later"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(first, later)
+        assert cancelled.cancelled()
+
+    asyncio.run(main())
+    assert order == ["first", "later"]
+    assert scheduler.running == {}
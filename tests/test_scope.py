@@ -0,0 +1,22 @@
+from reconator.parsing import filter_targets_by_scope
+from reconator.scope import ScopeIndex
+
+
+def test_scope_index_mixed_families() -> None:
+    index = ScopeIndex(["203.0.113.0/24", "198.51.100.128/25", "2001:db8::/32"])
+    assert "203.0.113.7" in index
+    assert "198.51.100.200" in index
+    assert "198.51.100.127" not in index
+    assert "2001:db8::1" in index
+    assert "2001:db9::1" not in index
+
+
+def test_filter_targets_by_scope_regexes() -> None:
+    targets = ["203.0.113.1", "203.0.113.10", "203.0.113.20", "192.0.2.1"]
+    scoped = filter_targets_by_scope(
+        targets,
+        ["203.0.113.0/24"],
+        allow_regex=r"\.1\d*$",
+        deny_regex=r"\.10$",
+    )
+    assert scoped == ["203.0.113.1"]
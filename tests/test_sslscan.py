@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import stat
+import time
+from pathlib import Path
+
+from reconator.cache import ScanCache, set_scan_cache
+from reconator.pipeline import Feed
+from reconator.reporting import tls_posture
+from reconator.sslscan import parse_sslscan_xml, run_sslscan
+
+SSLSCAN_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<document title="SSLScan Results" version="2.0.16" web="http://github.com/rbsec/sslscan">
+ <ssltest host="192.0.2.1" sniname="192.0.2.1" port="443">
+  <protocol type="ssl" version="3" enabled="0" />
+  <protocol type="tls" version="1.0" enabled="1" />
+  <protocol type="tls" version="1.2" enabled="1" />
+  <protocol type="tls" version="1.3" enabled="0" />
+  <cipher status="preferred" sslversion="TLSv1.2" bits="256" cipher="ECDHE-RSA-AES256-GCM-SHA384" strength="strong" />
+  <cipher status="accepted" sslversion="TLSv1.2" bits="112" cipher="DES-CBC3-SHA" strength="medium" />
+  <cipher status="preferred" sslversion="TLSv1.0" bits="128" cipher="RC4-SHA" strength="weak" />
+  <certificates>
+   <certificate type="short">
+    <signature-algorithm>sha256WithRSAEncryption</signature-algorithm>
+    <pk error="false" type="RSA" bits="2048" />
+    <subject><![CDATA[example.test]]></subject>
+    <issuer><![CDATA[example.test]]></issuer>
+    <self-signed>true</self-signed>
+    <not-valid-before>Jan  1 00:00:00 2020 GMT</not-valid-before>
+    <not-valid-after>Jan  1 00:00:00 2021 GMT</not-valid-after>
+    <expired>true</expired>
+   </certificate>
+  </certificates>
+ </ssltest>
+</document>
+"""
+
+
+def test_parse_sslscan_xml(tmp_path: Path) -> None:
+    path = tmp_path / "sslscan_443.xml"
+    path.write_text(SSLSCAN_XML, encoding="utf-8")
+    endpoint = parse_sslscan_xml(path)
+    assert endpoint["reachable"]
+    assert endpoint["protocols"] == ["TLSv1", "TLSv1.2"]
+    assert endpoint["negotiated"]["cipher"] == "ECDHE-RSA-AES256-GCM-SHA384"
+    assert endpoint["weak_ciphers"] == ["DES-CBC3-SHA", "RC4-SHA"]
+    certificate = endpoint["certificate"]
+    assert certificate["key_bits"] == 2048 and certificate["expired"]
+    assert certificate["not_after"] == "2021-01-01T00:00:00Z"
+
+    posture = tls_posture({"ports": [443], "endpoints": {"443": endpoint}})
+    assert posture["legacy_protocols"] == ["TLSv1"]
+    assert posture["cert_not_after"] == "2021-01-01T00:00:00Z" and posture["min_key_bits"] == 2048
+
+    # A report cut off by a timeout keeps what was written before the kill.
+    truncated = tmp_path / "truncated.xml"
+    truncated.write_text(SSLSCAN_XML[: SSLSCAN_XML.index("<certificates>")], encoding="utf-8")
+    partial = parse_sslscan_xml(truncated)
+    assert partial["protocols"] == ["TLSv1", "TLSv1.2"] and "certificate" not in partial
+    assert parse_sslscan_xml(tmp_path / "missing.xml")["reachable"] is False
+
+
+def test_run_sslscan_scans_ports_concurrently(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "sslscan"
+    fake.write_text(
+        "#!/bin/sh\n"
+        "sleep 0.5\n"
+        'for arg in "$@"; do case "$arg" in --xml=*) out="${arg#--xml=}";; esac; done\n'
+        "cat > \"$out\" <<'XML'\n" + SSLSCAN_XML + "XML\n",
+        encoding="utf-8",
+    )
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    host_dir = tmp_path / "192.0.2.1"
+    services = {port: {"name": "https"} for port in (443, 8443, 9443, 10443)}
+    started = time.monotonic()
+    ports = asyncio.run(run_sslscan(host_dir, "192.0.2.1", services, timeout_s=10, resume=False))
+    elapsed = time.monotonic() - started
+
+    assert ports == [443, 8443, 9443, 10443]
+    assert elapsed < 1.5
+    summary = json.loads((host_dir / "tls" / "tls_summary.json").read_text(encoding="utf-8"))
+    assert sorted(summary["endpoints"]) == ["10443", "443", "8443", "9443"]
+    assert summary["endpoints"]["8443"]["engine"] == "sslscan"
+
+
+def test_streamed_sslscan_is_restored_from_cache_once_the_feed_closes(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "sslscan"
+    script = (
+        'for arg in "$@"; do case "$arg" in --xml=*) out="${arg#--xml=}";; esac; done\n'
+        "cat > \"$out\" <<'XML'\n" + SSLSCAN_XML + "XML\n"
+    )
+    fake.write_text("#!/bin/sh\n" + script, encoding="utf-8")
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    cache = ScanCache(tmp_path / "cache", ttl_s=3600, max_bytes=1 << 20)
+    services = {443: {"name": "https"}, 8443: {"name": "https"}}
+
+    async def streamed():
+        feed: Feed = Feed(services.items())
+        asyncio.get_running_loop().call_later(0.2, feed.close)
+        return await run_sslscan(tmp_path / "second" / "192.0.2.1", "192.0.2.1", feed, timeout_s=30, resume=False)
+
+    set_scan_cache(cache)
+    try:
+        asyncio.run(run_sslscan(tmp_path / "first" / "192.0.2.1", "192.0.2.1", services, timeout_s=10, resume=False))
+        # A slow scanner now: the second run must be cut short by the cache hit.
+        fake.write_text("#!/bin/sh\nsleep 20\n" + script, encoding="utf-8")
+        started = time.monotonic()
+        ports = asyncio.run(streamed())
+        elapsed = time.monotonic() - started
+    finally:
+        set_scan_cache(None)
+        cache.close()
+
+    assert ports == [443, 8443] and elapsed < 10
+    host_dir = tmp_path / "second" / "192.0.2.1"
+    state = json.loads((host_dir / "state.json").read_text(encoding="utf-8"))
+    assert state["modules"]["sslscan"]["artifacts"]["cache"] == "hit"
+    summary = json.loads((host_dir / "tls" / "tls_summary.json").read_text(encoding="utf-8"))
+    assert sorted(summary["endpoints"]) == ["443", "8443"]
+    assert not list(host_dir.glob(".cache.*"))
+
+
+def test_timed_out_sslscan_is_not_cached(tmp_path: Path, monkeypatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "sslscan"
+    fake.write_text("#!/bin/sh\nsleep 20\n", encoding="utf-8")
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    cache = ScanCache(tmp_path / "cache", ttl_s=3600, max_bytes=1 << 20)
+    host_dir = tmp_path / "192.0.2.1"
+
+    set_scan_cache(cache)
+    try:
+        asyncio.run(run_sslscan(host_dir, "192.0.2.1", {443: {"name": "https"}}, timeout_s=1, resume=False))
+    finally:
+        set_scan_cache(None)
+
+    state = json.loads((host_dir / "state.json").read_text(encoding="utf-8"))
+    assert state["modules"]["sslscan"]["status"] == "TIMEOUT"
+    assert "443" in state["modules"]["sslscan"]["error"]
+    assert cache.stats["sslscan"].get("stores", 0) == 0
+    cache.close()
@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+from reconator.state import (
+    HostState,
+    StateStore,
+    init_module_state,
+    mark_finished,
+    set_state_store,
+)
+
+
+def test_state_store_merges_modules_and_exports(tmp_path: Path) -> None:
+    store = StateStore(tmp_path, flush_interval_s=60, flush_threshold=100)
+    set_state_store(store)
+    state_path = tmp_path / "192.0.2.1" / "state.json"
+    try:
+        first = HostState.load(state_path, engagement_name="acme", host="192.0.2.1")
+        second = HostState.load(state_path, engagement_name="acme", host="192.0.2.1")
+        mark_finished(init_module_state(first, "sslscan"), "OK", exit_code=0)
+        first.save(state_path)
+        mark_finished(init_module_state(second, "ffuf"), "OK", exit_code=0)
+        second.save(state_path)
+        assert not state_path.exists()
+        store.export_pending()
+    finally:
+        set_state_store(None)
+        store.close()
+
+    exported = json.loads(state_path.read_text(encoding="utf-8"))
+    assert sorted(exported["modules"]) == ["ffuf", "sslscan"]
+
+    reopened = StateStore(tmp_path)
+    try:
+        modules = reopened.get("192.0.2.1")["modules"]
+        assert modules["ffuf"]["status"] == "OK"
+        assert modules["sslscan"]["status"] == "OK"
+    finally:
+        reopened.close()
+
+
+def test_completed_hosts_checks_manifest_artifacts(tmp_path: Path) -> None:
+    store = StateStore(tmp_path)
+    set_state_store(store)
+    try:
+        for host, open_ports in (("192.0.2.1", "1"), ("192.0.2.2", "0")):
+            state_path = tmp_path / host / "state.json"
+            (tmp_path / host).mkdir()
+            (tmp_path / host / "services.json").write_text("{}", encoding="utf-8")
+            state = HostState.load(state_path, engagement_name="acme", host=host)
+            nmap = init_module_state(state, "nmap")
+            nmap.artifacts["open_ports"] = open_ports
+            mark_finished(nmap, "OK", exit_code=0)
+            state.save(state_path)
+    finally:
+        set_state_store(None)
+
+    # 192.0.2.1 has open ports but sslscan never ran.
+    assert store.completed_hosts(["sslscan"]) == {"192.0.2.2"}
+
+    (tmp_path / "192.0.2.2" / "services.json").write_text('{"22": {}}', encoding="utf-8")
+    assert store.completed_hosts(["sslscan"]) == set()
+    assert store.get("192.0.2.2")["modules"]["nmap"]["status"] == "PENDING"
+    store.close()
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import ipaddress
+
+from reconator.targets import AddressSet, IntervalSet, TargetSet
+
+
+def test_interval_set_reports_uncovered_ranges() -> None:
+    intervals = IntervalSet()
+    assert intervals.add(10, 20) == [(10, 20)]
+    assert intervals.add(5, 25) == [(5, 9), (21, 25)]
+    assert intervals.add(26, 30) == [(26, 30)]
+    assert list(intervals) == [(5, 30)]
+    assert 30 in intervals and 31 not in intervals
+
+    intervals.update([(40, 45), (1, 3), (31, 35), (44, 50), (4, 4)])
+    assert list(intervals) == [(1, 35), (40, 50)]
+
+
+def test_address_set_dedupes_singles_against_networks() -> None:
+    seen = AddressSet()
+    assert seen.add("192.0.2.2") and not seen.add("192.0.2.2")
+    assert list(seen.add_network(ipaddress.ip_network("192.0.2.0/29"))) == [
+        "192.0.2.1",
+        "192.0.2.3",
+        "192.0.2.4",
+        "192.0.2.5",
+        "192.0.2.6",
+    ]
+    assert not seen.add("192.0.2.5") and "192.0.2.6" in seen and "192.0.2.9" not in seen
+
+
+def test_target_set_sorted_difference_and_write(tmp_path: Path) -> None:
+    targets = TargetSet(["10.0.0.10", "2001:db8::2", "10.0.0.2", "2001:db8::1", "10.0.0.2"])
+    assert list(targets) == ["10.0.0.2", "10.0.0.10", "2001:db8::1", "2001:db8::2"]
+    assert len(targets) == 4
+    assert "2001:db8::2" in targets and "10.0.0.3" not in targets
+
+    remaining = targets.difference(TargetSet(["10.0.0.10", "2001:db8::1"]))
+    assert list(remaining) == ["10.0.0.2", "2001:db8::2"]
+
+    path = tmp_path / "final_targets.txt"
+    targets.write(path)
+    assert path.read_text(encoding="utf-8").splitlines() == list(targets)
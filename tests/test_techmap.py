@@ -0,0 +1,58 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from reconator.techmap import TechMap, TemplateSelector, load_tech_map
+
+
+class _Jenkins(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = b"<html><head><title>Dashboard [Jenkins]</title></head></html>"
+        self.send_response(200)
+        self.send_header("Server", "Jetty(10.0.13)")
+        self.send_header("Set-Cookie", "JSESSIONID.1a2b=node0; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_tech_map_matches_whole_words_and_versions_its_content() -> None:
+    tech_map = load_tech_map()
+    assert tech_map.match(["Microsoft-IIS/10.0", "PHP/8.1", "Apache Tomcat"]) == ["apache", "iis", "php", "tomcat"]
+    assert tech_map.match(["phpinfo", "nginxish"]) == []
+    custom = TechMap({"version": 1, "technologies": {"nginx": {"tags": ["nginx"], "ids": ["nginx-status"]}}})
+    assert custom.templates(["nginx"]) == (["nginx"], ["nginx-status"])
+    assert custom.version.startswith("1-") and custom.version != tech_map.version
+
+
+def test_selector_combines_service_and_http_fingerprints() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Jenkins)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    probed = f"http://127.0.0.1:{port}/"
+    selector = TemplateSelector(load_tech_map(), timeout_s=5)
+
+    async def scenario():
+        return await selector.group(
+            [probed, "http://127.0.0.1:1/", "http://127.0.0.1:2/"],
+            {1: {"name": "http", "product": "nginx", "version": "1.18"}},
+        )
+
+    try:
+        selections, groups = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+    by_url = {item.url: item for item in selections}
+    assert by_url[probed].technologies == ["jenkins", "jetty", "jsessionid"]
+    assert "jenkins" in by_url[probed].tags and "tech" in by_url[probed].tags
+    assert by_url["http://127.0.0.1:1/"].technologies == ["nginx"]
+    # Nothing recognised (the port is closed): the full template set, no extra arguments.
+    assert by_url["http://127.0.0.1:2/"].full
+    assert groups[()] == ["http://127.0.0.1:2/"]
+    assert len(groups) == 3 and selector.stats["targeted"] == 2
@@ -0,0 +1,104 @@
+import asyncio
+import shutil
+import ssl
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from reconator.tlsprobe import TLSProber, is_weak_cipher
+
+
+def _self_signed(tmp_path: Path, name: str) -> ssl.SSLContext:
+    cert, key = tmp_path / f"{name}.crt", tmp_path / f"{name}.key"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", f"/CN={name}", "-keyout", str(key), "-out", str(cert)],
+        check=True,
+        capture_output=True,
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def test_is_weak_cipher() -> None:
+    assert is_weak_cipher("RC4-SHA")
+    assert is_weak_cipher("EXP-DES-CBC-SHA")
+    assert is_weak_cipher("AES128-SHA", bits=56)
+    assert not is_weak_cipher("ECDHE-RSA-AES128-GCM-SHA256", bits=128)
+
+
+@pytest.mark.skipif(shutil.which("openssl") is None, reason="openssl CLI required for test certificates")
+def test_prober_dedupes_identical_endpoints(tmp_path: Path) -> None:
+    shared = _self_signed(tmp_path, "pool")
+    other = _self_signed(tmp_path, "other")
+
+    async def scenario():
+        async def handle(reader, writer):
+            writer.close()
+
+        servers = [await asyncio.start_server(handle, "127.0.0.1", 0, ssl=context) for context in (shared, shared, other)]
+        prober = TLSProber(concurrency=20, timeout_s=2)
+        try:
+            results = await asyncio.gather(
+                *(prober.probe("127.0.0.1", server.sockets[0].getsockname()[1]) for server in servers)
+            )
+        finally:
+            for server in servers:
+                server.close()
+                await server.wait_closed()
+        return prober, results
+
+    prober, results = asyncio.run(scenario())
+    first, second, third = results
+    assert first["reachable"] and "TLSv1.2" in first["protocols"]
+    assert first["ciphers"]["TLSv1.2"]
+    assert first["chain_sha256"] == second["chain_sha256"] != third["chain_sha256"]
+    deduped = [result for result in (first, second) if "deduplicated_from" in result]
+    assert len(deduped) == 1 and "deduplicated_from" not in third
+    assert deduped[0]["protocols"] == first["protocols"]
+    assert prober.stats["deduplicated"] == 1
+
+
+def test_prober_reports_unreachable_endpoint() -> None:
+    async def scenario():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+        return await TLSProber(timeout_s=1).probe("127.0.0.1", port)
+
+    assert asyncio.run(scenario()) == {"engine": "native", "reachable": False}
+
+
+def test_prober_never_dedupes_certificateless_endpoints() -> None:
+    class Anonymous(TLSProber):
+        async def _handshake(self, host, port, context):
+            return "TLSv1.2", ("ADH-AES128-SHA", "TLSv1.2", 128), []
+
+    prober = Anonymous()
+
+    async def scenario():
+        return await asyncio.gather(prober.probe("192.0.2.1", 443), prober.probe("192.0.2.2", 443))
+
+    results = asyncio.run(scenario())
+    assert all(result["chain_sha256"] is None and "deduplicated_from" not in result for result in results)
+    assert prober.stats["deduplicated"] == 0
+
+
+def test_prober_caps_handshakes_per_endpoint() -> None:
+    class Counting(TLSProber):
+        in_flight = peak = 0
+
+        async def _handshake(self, host, port, context):
+            Counting.in_flight += 1
+            Counting.peak = max(Counting.peak, Counting.in_flight)
+            await asyncio.sleep(0.001)
+            Counting.in_flight -= 1
+            return "TLSv1.2", ("AES128-SHA", "TLSv1.2", 128), [b"cert"]
+
+    prober = Counting(concurrency=100, endpoint_concurrency=3)
+    result = asyncio.run(prober.probe("192.0.2.1", 443))
+    assert len(result["ciphers"]["TLSv1.2"]) > 3
+    assert Counting.peak == 3
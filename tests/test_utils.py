@@ -0,0 +1,51 @@
+import asyncio
+import os
+import stat
+import time
+from pathlib import Path
+
+from reconator.utils import run_command_async
+
+
+def _fake_tool(bin_dir: Path, name: str, body: str) -> None:
+    bin_dir.mkdir(exist_ok=True)
+    path = bin_dir / name
+    path.write_text("#!/bin/sh\n" + body, encoding="utf-8")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+
+def test_run_command_async_captures_output(tmp_path: Path, monkeypatch) -> None:
+    _fake_tool(tmp_path / "bin", "faketool", 'echo "scanned $1"\nexit 3\n')
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+    result = asyncio.run(
+        run_command_async(["faketool", "192.0.2.1"], tmp_path / "out.log", tmp_path / "err.log", 5)
+    )
+    assert result.returncode == 3
+    assert not result.timed_out
+    assert (tmp_path / "out.log").read_text(encoding="utf-8").strip() == "scanned 192.0.2.1"
+
+
+def test_run_command_async_timeout_kills_process_group(tmp_path: Path, monkeypatch) -> None:
+    pid_file = tmp_path / "child.pid"
+    _fake_tool(tmp_path / "bin", "slowtool", f"sleep 30 &\necho $! > {pid_file}\nwait\n")
+    monkeypatch.setenv("PATH", f"{tmp_path / 'bin'}{os.pathsep}{os.environ['PATH']}")
+    start = time.monotonic()
+    result = asyncio.run(run_command_async(["slowtool"], tmp_path / "out.log", tmp_path / "err.log", 1))
+    assert result.timed_out
+    assert result.returncode is None
+    assert time.monotonic() - start < 5
+    child = int(pid_file.read_text(encoding="utf-8"))
+    time.sleep(0.1)
+    assert not _is_running(child)
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    stat_path = Path(f"/proc/{pid}/stat")
+    if stat_path.exists():
+        # Killed orphans may linger as zombies until init reaps them.
+        return stat_path.read_text(encoding="utf-8").split(") ")[1][0] != "Z"
+    return True
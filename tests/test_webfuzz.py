@@ -0,0 +1,67 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from reconator import ffuf
+from reconator.ffuf import run_ffuf
+from reconator.webfuzz import ContentDiscovery, set_content_discovery
+
+
+class _Site(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self) -> None:
+        type(self).connections += 1
+        super().setup()
+
+    def do_GET(self) -> None:
+        if self.path == "/admin":
+            status, body, headers = 200, b"admin panel", {}
+        elif self.path == "/login":
+            status, body, headers = 301, b"", {"Location": "/login/"}
+        else:
+            status, body, headers = 404, b"not found", {}
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_native_engine_fuzzes_over_pipelined_keep_alive(tmp_path: Path, monkeypatch) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Site)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("\n".join(["# comment", "admin", "login", *(f"w{index}" for index in range(200))]))
+    monkeypatch.setattr(ffuf, "discover_wordlist", lambda: wordlist)
+    engine = ContentDiscovery(connections_per_url=3, pipeline_depth=8, timeout_s=5)
+
+    async def scenario() -> None:
+        set_content_discovery(engine)
+        try:
+            await run_ffuf(tmp_path / "host", "127.0.0.1", [url], timeout_s=30, resume=False, calibrate=True)
+        finally:
+            set_content_discovery(None)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+    web_dir = tmp_path / "host" / "web"
+    hits = [json.loads(line) for line in (web_dir / "ffuf_hits.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert sorted((hit["url"], hit["status"]) for hit in hits) == [(f"{url}admin", 200), (f"{url}login", 301)]
+    assert set(hits[0]) == {"url", "status", "length", "words"}
+    streamed = (web_dir / f"ffuf_{server.server_address[1]}.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(streamed) == 2
+    assert engine.stats["requests"] == 202 and engine.stats["pipelined_exchanges"] > 0
+    # Three fuzzing connections plus the calibration connection.
+    assert _Site.connections == 4